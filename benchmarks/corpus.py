@@ -0,0 +1,67 @@
+"""
+    Corpus of expressions used by the benchmarks, grouped by size.
+    Each expression is a dictionary with the expression string,
+    the values of its variables (for calc), the variable to
+    compute the derivative with respect to and to solve for.
+    Operations listed in 'skip' are not benchmarked for an expression.
+"""
+
+
+def _polynomial(n):
+    # sum of n terms like '3x^2y'
+    return " + ".join(f"{k + 1}x^{k}y^{k % 3}" for k in range(n))
+
+
+def _trig(n):
+    # sum of n products of trigonometric and exponential functions
+    return " + ".join(
+        f"sin({k}x)cos({k + 1}y)/({k} + exp({k}x))" for k in range(1, n + 1)
+    )
+
+
+small = [
+    dict(string="2 + 10/4 - sqrt(9)*2", values={}, wrt=None, solve_for=None),
+    dict(string="3x + 2", values=dict(x=2), wrt="x", solve_for="x"),
+    dict(string="x^2 - 4", values=dict(x=3), wrt="x", solve_for="x"),
+]
+
+medium = [
+    dict(
+        string="(x^2 + 2x + 1)/(x + 1) + sin(x)^2 + cos(x)^2",
+        values=dict(x=1.5),
+        wrt="x",
+        solve_for="x",
+    ),
+    dict(
+        # quadratic in y, so that it can be solved symbolically
+        string="exp(2x)y + log(x + 1)/sqrt(x^2 + 1) - 3x^3y^2",
+        values=dict(x=0.5, y=2),
+        wrt="x",
+        solve_for="y",
+    ),
+    dict(
+        string="x^4 - 3x^3 + 2x^2 - x + 7 = 2y",
+        values=dict(x=2, y=1),
+        wrt="x",
+        solve_for="y",
+    ),
+]
+
+huge = [
+    dict(
+        string=_polynomial(60),
+        values=dict(x=0.5, y=1.1),
+        wrt="x",
+        solve_for="y",
+    ),
+    # sympy's simplify takes minutes on sums of trigonometric terms
+    dict(
+        string=_trig(25),
+        values=dict(x=0.3, y=0.7),
+        wrt="x",
+        solve_for=None,
+        skip=("simplify", "solve"),
+    ),
+]
+
+corpus = dict(small=small, medium=medium, huge=huge)
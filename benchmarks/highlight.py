@@ -0,0 +1,78 @@
+import statistics
+import argparse
+import time
+
+"""
+    Measures the time to highlight long expressions (high order
+    derivatives printed as unicode strings) with mathcli's Highlighter,
+    which scans the text once with a single regular expression.
+    For comparison the same patterns are also applied one at a time,
+    as rich's RegexHighlighter does.
+
+        python benchmarks/highlight.py [--repeat N] [--max-order N]
+
+    Requires mathcli to be installed (e.g. pip install -e .).
+"""
+
+expression = "exp(sin(x) y^2) / (x^2 + 1) + log(x) cos(x y)"
+
+
+def time_highlighter(highlighter, string, repeat):
+    """
+        Highlights a string repeat times and
+        returns the median time in seconds
+    """
+    from rich.text import Text
+
+    times = []
+    for _ in range(repeat):
+        text = Text(string)
+        start = time.perf_counter()
+        highlighter.highlight(text)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def run(repeat=20, max_order=6):
+    """
+        Times highlighting derivatives of increasing order and
+        returns a list of (order, n characters, single pass time, one regex per style time)
+    """
+    from sympy import Symbol
+    from rich.highlighter import RegexHighlighter
+    from mathcli.expression import Expression
+    from mathcli._unicode import to_unicode
+    from mathcli.theme import Highlighter, highlighter
+
+    class PerStyleHighlighter(RegexHighlighter):
+        base_style = Highlighter.base_style
+        highlights = Highlighter.highlights
+
+    per_style = PerStyleHighlighter()
+    x = Symbol("x")
+    derivative = Expression(expression).expression
+
+    results = []
+    for order in range(1, max_order + 1):
+        derivative = derivative.diff(x)
+        string = to_unicode(derivative)
+
+        single = time_highlighter(highlighter, string, repeat)
+        multiple = time_highlighter(per_style, string, repeat)
+        results.append((order, len(string), single, multiple))
+        print(
+            f"order {order}: {len(string):>7} characters   "
+            f"single pass {single * 1000:7.2f} ms   "
+            f"one regex per style {multiple * 1000:7.2f} ms   "
+            f"({multiple / single:4.1f}x)"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-order", type=int, default=6)
+    args = parser.parse_args()
+
+    run(repeat=args.repeat, max_order=args.max_order)
@@ -0,0 +1,260 @@
+from pathlib import Path
+import statistics
+import argparse
+import platform
+import json
+import time
+import sys
+import io
+
+from corpus import corpus
+
+"""
+    Times each of mathcli's operations over the expressions
+    in benchmarks/corpus.py, in the spirit of asv: each operation
+    is run a few times on each expression with mathcli's caches
+    cleared before each run, and the median and min times are recorded.
+
+        python benchmarks/operations.py [--repeat N] [--sizes small medium]
+            [--ops calc solve] [--output results.json]
+            [--baseline baseline.json] [--threshold 0.25] [--startup]
+
+    Requires mathcli to be installed (e.g. pip install -e .).
+    Results are saved as JSON. When a baseline (a previously saved
+    results file) is given, operations whose median time grew by
+    more than the threshold are flagged as regressions and the
+    script exits with a non zero exit code.
+"""
+
+baseline_path = Path(__file__).parent / "baseline.json"
+
+# ---------------------------------------------------------------------------- #
+#                                  operations                                  #
+# ---------------------------------------------------------------------------- #
+
+
+def _parse(expression):
+    from mathcli.expression import parse, clean
+
+    parse(clean(expression["string"]))
+
+
+def _expression(expression):
+    from mathcli.expression import Expression
+
+    Expression(expression["string"])
+
+
+def _calc(expression):
+    from mathcli import math
+
+    math.calc.__wrapped__(
+        expression["string"], show_result=False, **expression["values"]
+    )
+
+
+def _simplify(expression):
+    from mathcli import math
+
+    math.simplify.__wrapped__(expression["string"], show_result=False)
+
+
+def _derivative(expression):
+    from mathcli import math
+
+    math.derivative.__wrapped__(
+        expression["string"], expression["wrt"], show_result=False
+    )
+
+
+def _solve(expression):
+    from mathcli import math
+
+    math.solve.__wrapped__(
+        expression["string"], expression["solve_for"], show_result=False
+    )
+
+
+def _unicode(expression):
+    from mathcli.expression import Expression
+
+    Expression(expression["string"]).unicode
+
+
+def _render(expression):
+    from mathcli.expression import Expression
+    from mathcli.results import Result
+    from mathcli import theme
+
+    result = Result(Expression(expression["string"]), footer="calculate")
+    theme.console.print(result)
+
+
+operations = dict(
+    parse=_parse,
+    expression=_expression,
+    calc=_calc,
+    simplify=_simplify,
+    derivative=_derivative,
+    solve=_solve,
+    unicode=_unicode,
+    render=_render,
+)
+
+
+def clear_caches():
+    """
+        Clears mathcli's in memory caches so that
+        each run starts from a cold state
+    """
+    from mathcli.expression import parsed, lambdified, bound
+
+    parsed.clear()
+    lambdified.clear()
+    bound.clear()
+
+
+# ---------------------------------------------------------------------------- #
+#                                    running                                   #
+# ---------------------------------------------------------------------------- #
+
+
+def time_operation(operation, expression, repeat):
+    """
+        Runs an operation repeat times on an expression
+        and returns the wall time of each run
+    """
+    times = []
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        operation(expression)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run(repeat=5, sizes=None, ops=None):
+    """
+        Times each operation on each expression in the corpus.
+
+        Arguments:
+            repeat: int. Number of runs of each operation
+            sizes: list of str, optional. Sizes of expressions to include
+            ops: list of str, optional. Operations to include
+
+        Returns:
+            dictionary of benchmarks ('operation/size/n') with the median
+            and min time in seconds, or the error raised by the operation.
+    """
+    from mathcli.cache import results as results_cache
+    from mathcli import theme
+
+    # don't use the on disk cache and discard rendered output
+    results_cache.enabled = False
+    theme.set_console(file=io.StringIO(), width=120)
+
+    # import everything upfront so that imports aren't timed
+    from mathcli import math  # noqa: F401
+
+    results = {}
+    for op in ops or operations.keys():
+        for size in sizes or corpus.keys():
+            for n, expression in enumerate(corpus[size]):
+                if op in expression.get("skip", ()):
+                    continue
+
+                name = f"{op}/{size}/{n}"
+                try:
+                    times = time_operation(operations[op], expression, repeat)
+                except Exception as e:
+                    results[name] = dict(error=f"{type(e).__name__}: {e}")
+                    print(f"{name:>22}: failed with {type(e).__name__}")
+                    continue
+
+                results[name] = dict(
+                    median=statistics.median(times), min=min(times)
+                )
+                print(
+                    f"{name:>22}: median {results[name]['median'] * 1000:9.2f} ms   "
+                    f"min {results[name]['min'] * 1000:9.2f} ms"
+                )
+    return results
+
+
+def environment():
+    """
+        Describes the environment the benchmarks ran in
+    """
+    import sympy
+
+    return dict(
+        python=platform.python_version(),
+        sympy=sympy.__version__,
+        machine=platform.machine(),
+        platform=platform.platform(),
+        time=time.strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
+
+def compare(results, baseline, threshold=0.25, min_time=0.001):
+    """
+        Compares benchmark results to a baseline.
+
+        Arguments:
+            results: dict. Benchmarks results, see run
+            baseline: dict. Benchmarks results of the baseline
+            threshold: float. Relative increase in median time flagged as a regression
+            min_time: float. Changes smaller than this (in seconds) are ignored as noise
+
+        Returns:
+            regressions: list of (name, baseline median, median) tuples
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name, {})
+        if "median" not in result or "median" not in base:
+            continue
+
+        increase = result["median"] - base["median"]
+        if increase > min_time and increase > threshold * base["median"]:
+            regressions.append((name, base["median"], result["median"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sizes", nargs="+", choices=list(corpus.keys()))
+    parser.add_argument("--ops", nargs="+", choices=list(operations.keys()))
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--startup", action="store_true")
+    args = parser.parse_args()
+
+    results = run(repeat=args.repeat, sizes=args.sizes, ops=args.ops)
+    if args.startup:
+        import startup
+
+        for name, result in startup.run(repeat=args.repeat).items():
+            results[f"startup/{name}"] = result
+
+    data = dict(environment=environment(), results=results)
+    if args.output:
+        args.output.write_text(json.dumps(data, indent=2))
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(data, indent=2))
+        print(f"Saved baseline to {baseline_path}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = compare(results, baseline, threshold=args.threshold)
+        for name, before, after in regressions:
+            print(
+                f"REGRESSION {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms "
+                f"({after / before:.2f}x)"
+            )
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
@@ -0,0 +1,91 @@
+import subprocess
+import statistics
+import argparse
+import time
+import sys
+
+"""
+    Measures the startup time of the `math` command line interface
+    by timing fresh interpreter invocations of a few commands.
+
+        python benchmarks/startup.py [--repeat N] [--importtime]
+
+    With --importtime the slowest imports of each command
+    are listed (see python -X importtime).
+"""
+
+commands = {
+    "import": ["-c", "import mathcli"],
+    "help": ["-m", "mathcli.cli", "--help"],
+    "latex": ["-m", "mathcli.cli", "latex", "x^2"],
+    "calc": ["-m", "mathcli.cli", "calc", "1+1"],
+}
+
+
+def time_command(args, repeat):
+    """
+        Runs a python command repeat times and
+        returns the wall time of each run
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def slowest_imports(args, n=10):
+    """
+        Returns the n slowest (cumulative) imports of
+        a python command, using python -X importtime
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    ).stderr
+
+    imports = []
+    for line in out.splitlines()[1:]:
+        try:
+            _, cumulative, name = line.split("|")
+            imports.append((int(cumulative), name.strip()))
+        except ValueError:
+            continue
+    return sorted(imports, reverse=True)[:n]
+
+
+def run(repeat=10, importtime=False):
+    """
+        Times each command and returns a dictionary
+        with the median and min time in seconds
+    """
+    results = {}
+    for name, args in commands.items():
+        times = time_command(args, repeat)
+        results[name] = dict(median=statistics.median(times), min=min(times))
+        print(
+            f"{name:>8}: median {results[name]['median'] * 1000:7.1f} ms   "
+            f"min {results[name]['min'] * 1000:7.1f} ms"
+        )
+
+        if importtime:
+            for us, module in slowest_imports(args):
+                print(f"{'':>12}{us / 1000:7.1f} ms  {module}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--importtime", action="store_true")
+    args = parser.parse_args()
+
+    run(repeat=args.repeat, importtime=args.importtime)
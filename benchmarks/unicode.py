@@ -0,0 +1,85 @@
+import statistics
+import argparse
+import time
+import math
+
+"""
+    Measures the time to print expressions of growing size as
+    unicode strings (see mathcli._unicode), to check that it
+    scales linearly with the number of nodes in the expression.
+
+        python benchmarks/unicode.py [--repeat N] [--max-terms N]
+
+    The slope of log(time) vs log(number of nodes) is printed:
+    it should be close to 1.
+
+    Requires mathcli to be installed (e.g. pip install -e .).
+"""
+
+
+def make_expression(n_terms):
+    """
+        Returns a sum of n_terms terms with powers,
+        exponentials, square roots and fractions
+    """
+    from sympy import Symbol, exp, sqrt, sin
+
+    x = [Symbol(f"x_{n}") for n in range(n_terms)]
+    terms = [
+        [
+            v ** 2,
+            exp(2 * v) / (v + 1),
+            sqrt(v) * sin(v),
+            (v - 1) / (3 * v ** 3),
+        ][n % 4]
+        for n, v in enumerate(x)
+    ]
+    return sum(terms)
+
+
+def count_nodes(expression):
+    from sympy import preorder_traversal
+
+    return sum(1 for _ in preorder_traversal(expression))
+
+
+def run(repeat=5, max_terms=3200):
+    """
+        Times to_unicode on expressions of growing size and
+        returns a list of (number of nodes, median time in seconds)
+    """
+    from mathcli._unicode import to_unicode
+
+    results = []
+    n_terms = 100
+    while n_terms <= max_terms:
+        expression = make_expression(n_terms)
+        nodes = count_nodes(expression)
+
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            to_unicode(expression)
+            times.append(time.perf_counter() - start)
+        median = statistics.median(times)
+        results.append((nodes, median))
+        print(
+            f"{n_terms:>6} terms {nodes:>7} nodes: {median * 1000:8.1f} ms   "
+            f"{median / nodes * 1e6:6.2f} us/node"
+        )
+        n_terms *= 2
+
+    if len(results) > 1:
+        (n0, t0), (n1, t1) = results[0], results[-1]
+        slope = math.log(t1 / t0) / math.log(n1 / n0)
+        print(f"slope: {slope:.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-terms", type=int, default=3200)
+    args = parser.parse_args()
+
+    run(repeat=args.repeat, max_terms=args.max_terms)
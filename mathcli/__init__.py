@@ -1,17 +1,49 @@
-from pyinspect import install_traceback
-from rich import pretty
+import sys
 
-install_traceback()
-pretty.install()
+"""
+    Imports are kept lazy to keep the startup time of the
+    command line interface short: sympy, rich etc. are only imported
+    when they are used by a command.
+"""
 
-from loguru import logger
-import sys
 
-# comment these two lines out to show logging info
-logger.remove()
-logger.add(sys.stderr, level="INFO")
+def _excepthook(*args):
+    # install pyinspect's traceback only once an error occurs
+    from pyinspect import install_traceback
+
+    install_traceback()
+    sys.excepthook(*args)
+
+
+sys.excepthook = _excepthook
+
+if hasattr(sys, "ps1"):
+    # interactive session
+    from rich import pretty
+
+    pretty.install()
+
+
+# to show logging info lower the logging level in mathcli._log
+from mathcli._log import logger
+
+_api = (
+    "calc",
+    "calc_batch",
+    "solve",
+    "solve_batch",
+    "solve_system",
+    "simplify",
+    "derivative",
+    "gradient",
+    "jacobian",
+    "hessian",
+)
+
 
-logger.level("EXPRESSION", no=15, color="<yellow>", icon="🖇")
-logger.level("MATH", no=15, color="<green>", icon="🖇")
+def __getattr__(name):
+    if name in _api:
+        from mathcli import math
 
-from mathcli.math import calc, solve, simplify, derivative
+        return getattr(math, name)
+    raise AttributeError(f"module 'mathcli' has no attribute '{name}'")
@@ -0,0 +1,91 @@
+import sys
+
+"""
+    Lazy wrapper around loguru's logger.
+    Importing loguru is relatively slow and most log messages
+    are below the logging level, so loguru is only imported
+    (and configured) when a message is actually going to be logged.
+"""
+
+# lower this (e.g. to 'DEBUG') to show logging info
+level = "INFO"
+
+levels = dict(
+    TRACE=5,
+    DEBUG=10,
+    EXPRESSION=15,
+    MATH=15,
+    INFO=20,
+    SUCCESS=25,
+    WARNING=30,
+    ERROR=40,
+    CRITICAL=50,
+)
+
+_logger = None
+
+
+def get_logger():
+    """
+        Imports and configures loguru's logger on first use
+    """
+    global _logger
+    if _logger is None:
+        from loguru import logger
+
+        logger.remove()
+        logger.add(sys.stderr, level=level)
+
+        logger.level("EXPRESSION", no=15, color="<yellow>", icon="🖇")
+        logger.level("MATH", no=15, color="<green>", icon="🖇")
+        _logger = logger
+    return _logger
+
+
+def is_enabled(lvl):
+    """
+        Checks if messages at a given level are logged
+    """
+    return levels.get(lvl, 0) >= levels[level]
+
+
+class Logger(object):
+    def __init__(self, **options):
+        """
+            Exposes the subset of loguru.logger used by mathcli,
+            messages below the logging level are discarded without
+            importing loguru.
+
+            Arguments:
+                options: kwargs, optional. Options for loguru.logger.opt
+        """
+        self.options = options
+
+    def opt(self, **options):
+        return Logger(**options)
+
+    def log(self, lvl, message, *args, **kwargs):
+        if not is_enabled(lvl):
+            return
+
+        logger = get_logger()
+        if self.options:
+            logger = logger.opt(**self.options)
+        logger.log(lvl, message, *args, **kwargs)
+
+    def debug(self, message, *args, **kwargs):
+        self.log("DEBUG", message, *args, **kwargs)
+
+    def info(self, message, *args, **kwargs):
+        self.log("INFO", message, *args, **kwargs)
+
+    def warning(self, message, *args, **kwargs):
+        self.log("WARNING", message, *args, **kwargs)
+
+    warn = warning
+
+    def error(self, message, *args, **kwargs):
+        self.log("ERROR", message, *args, **kwargs)
+
+
+logger = Logger()
@@ -1,131 +1,289 @@
-from unicodeit import replace
+from sympy import S, Integer, exp as exp_function
+from sympy.printing.str import StrPrinter
+from sympy.printing.precedence import precedence, PRECEDENCE
 
-from ._utils import get_closed_parenthesis, get_opened_parenthesis
+"""
+    Printing of sympy expressions as unicode strings, like:
+        x**2 + 2*exp(3*y) - sqrt(z)/2  ->  x² +2e³ʸ -√z/2
 
+    UnicodePrinter walks the expression tree once, and each node is printed
+    from the strings of its children, so the time it takes is linear
+    in the size of the expression.
+"""
 
-def to_unicode(ltx):
-    """
-        Convert a latex string to unicode characters
-    """
-    ltx = ltx.replace("-", "MINUS")
-    ltx_to_replace = [
-        ("=", " = "),
-        ("+", " +"),
-        ("*", " *"),
-        ("-", " -"),
-        ("}", ""),
-        ("{", ""),
-        ("( ", "("),
-        (" )", ")"),
-    ]
-
-    for to, rep in ltx_to_replace:
-        ltx = ltx.replace(to, rep)
-
-    # to unicode
-    uni = replace(ltx).replace("MINUS", " -")
-    return uni
+# unicode characters
+symbols = "√│─¬≦≺…≅≧⋅═∫∑Π∓%▽÷≨≤≩‥−"
 
+mathcal = "Aℬℑℯℒℋℰℛℊ𝒩"
 
-def replace_in_string(string, idx, _with):
-    return "".join([s if e != idx else _with for e, s in enumerate(string)])
+greek = "αβγΓδΔϵζηHθΘιIκKλΛμnuνNξΞoOπΠρPσΣτTυϒϕΦχXψΨωΩ"
 
+superscripts = "ˣʸᶻᵖʳˢᵗᵘᵛʷʰⁱʲᵏˡᵐⁿᵒᵃᵇᶜᵈᵉᶠᵍᴾᴿᵀᵁᵂᴴᴵᴶᴷᴸᴹᴺᴼᴬᴮᴰᴱᴳᵠᵡᵟᵞᵝ⁸⁹˂⁼˃⁰¹²³⁴⁵⁶⁷⁽⁾₉₈₇₆₅₄₃₂₁₀₋₋₊₎₍ᵨᵪᵩᵦᵧ"
 
-def parse_exponents(ltx):
+# sums with more (terms x variables) than this are printed
+# in sympy's canonical order instead of lexicographic order
+lex_max_size = 400
+
+# characters that have a superscript or subscript version
+superscript = str.maketrans(
+    "0123456789+-=()abcdefghijklmnoprstuvwxyzABDEGHIJKLMNOPRTUW",
+    "⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻⁼⁽⁾ᵃᵇᶜᵈᵉᶠᵍʰⁱʲᵏˡᵐⁿᵒᵖʳˢᵗᵘᵛʷˣʸᶻᴬᴮᴰᴱᴳᴴᴵᴶᴷᴸᴹᴺᴼᴾᴿᵀᵁᵂ",
+)
+subscript = str.maketrans(
+    "0123456789+-=()aehijklmnoprstuvx", "₀₁₂₃₄₅₆₇₈₉₊₋₌₍₎ₐₑₕᵢⱼₖₗₘₙₒₚᵣₛₜᵤᵥₓ",
+)
+
+greek_letters = dict(
+    alpha="α",
+    beta="β",
+    gamma="γ",
+    Gamma="Γ",
+    delta="δ",
+    Delta="Δ",
+    epsilon="ϵ",
+    zeta="ζ",
+    eta="η",
+    theta="θ",
+    Theta="Θ",
+    iota="ι",
+    kappa="κ",
+    lamda="λ",
+    lambda_="λ",
+    Lambda="Λ",
+    mu="μ",
+    nu="ν",
+    xi="ξ",
+    Xi="Ξ",
+    pi="π",
+    Pi="Π",
+    rho="ρ",
+    sigma="σ",
+    Sigma="Σ",
+    tau="τ",
+    upsilon="υ",
+    phi="ϕ",
+    Phi="Φ",
+    chi="χ",
+    psi="ψ",
+    Psi="Ψ",
+    omega="ω",
+    Omega="Ω",
+)
+
+
+def to_superscript(string):
     """
-        Parse a string with latex code to replace
-        all exp(x) with unicode equivalents,
-        has to happen before to_unicode takes place
+        Returns a string as superscript, or None if
+        some of its characters have no superscript version
     """
+    sup = string.translate(superscript)
+    if any(a == b for a, b in zip(string, sup)):
+        return None
+    return sup
 
-    while "^" in ltx:
-        # find where the next exponent is
-        idx = ltx.find("^")
-
-        # get base
-        if ltx[idx - 1] == "}":
-            base_start = get_opened_parenthesis(ltx[:idx])
-            base = ltx[base_start : idx - 1]
-        else:
-            base_start = idx - 1
-            base = ltx[idx - 1]
-
-        # get exponent indices
-        exp_end = get_closed_parenthesis(ltx[idx + 1 :])
-        exp = ltx[idx + 2 : idx + 1 + exp_end]
-
-        # to unicode
-        if len(base) > 1:
-            uni = replace(f"{{{base}}}^{{{exp}}}")
-        else:
-            uni = replace(f"{base}^{{{exp}}}")
 
-        ltx = ltx[:base_start] + uni + ltx[idx + exp_end + 2 :]
-    return ltx
-
-
-def parse_frac(frac):
+def to_subscript(string):
     """
-        Parse a string with latex code
-        for a fractional
+        Returns a string as subscript, or None if
+        some of its characters have no subscript version
     """
-    # get pre - numerator / denominator - post
-    pre, post = frac.split("}{")
-
-    n = get_opened_parenthesis(pre + "}")
-    m = get_closed_parenthesis("{" + post)
-
-    pre, numerator = pre[:n], pre[n:]
-    denominator, post = post[:m], post[m:]
+    sub = string.translate(subscript)
+    if any(a == b for a, b in zip(string, sub)):
+        return None
+    return sub
 
-    if len(numerator) > 1:
-        numerator = f"({numerator})"
 
-    if len(denominator) > 1:
-        denominator = f"({denominator})"
-
-    out = f"{to_unicode(pre)} {to_unicode(numerator)}/{to_unicode(denominator)} {to_unicode(post)}"
-
-    return out
-
-
-def parse_derivation(der):
+class UnicodePrinter(StrPrinter):
     """
-        Parses (∂)/(∂x) to ∂/∂x
+        Prints sympy expressions as unicode strings, with superscript
+        exponents, subscript indices, greek letters, implicit multiplication
+        (e.g. 2xy) and '+'/'-' attached to the following term (e.g. x -y).
     """
-    der = der.replace("(", "").replace(")", "")
-    return der + " "
 
-
-def clean_latex(ltx):
-    """
-        Clean a latex string to facilitate
-        the creation of a unicode string
+    printmethod = "_mathcli_unicode"
+
+    def parenthesize(self, item, level, strict=False):
+        string = self._print(item)
+        if precedence(item) < level or (strict and precedence(item) <= level):
+            return f"({string})"
+        return string
+
+    def _print_Symbol(self, expr):
+        name, _, index = expr.name.partition("_")
+        name = greek_letters.get(name, name)
+        if not index:
+            return name
+        return name + (to_subscript(index) or f"_{index}")
+
+    _print_Dummy = _print_Symbol
+
+    def _print_Pi(self, expr):
+        return "π"
+
+    def _print_Exp1(self, expr):
+        return "e"
+
+    def _print_ImaginaryUnit(self, expr):
+        return "i"
+
+    def _print_Infinity(self, expr):
+        return "∞"
+
+    def _print_NegativeInfinity(self, expr):
+        return "-∞"
+
+    def _print_Rational(self, expr):
+        if expr.q == 1:
+            return str(expr.p)
+        return f"{expr.p}/{expr.q}"
+
+    def _print_Add(self, expr, order=None):
+        if len(expr.args) * len(expr.free_symbols) > lex_max_size:
+            # lex ordering compares the monomials of all terms over
+            # all the variables, use sympy's canonical order instead
+            order = "none"
+        terms = self._as_ordered_terms(expr, order=order)
+        out = []
+        for n, term in enumerate(terms):
+            string = self._print(term)
+            if string.startswith("-"):
+                sign, string = "-", string[1:]
+            else:
+                sign = "+"
+            if precedence(term) < PRECEDENCE["Add"]:
+                string = f"({string})"
+
+            if n == 0:
+                out.append(string if sign == "+" else "-" + string)
+            else:
+                out.append(f" {sign}{string}")
+        return "".join(out)
+
+    def _print_Mul(self, expr):
+        sign, factors = "", []
+        for factor in expr.as_ordered_factors():
+            coefficient, rest = factor.as_coeff_Mul()
+            if coefficient.is_negative:
+                # the sign of negative factors is printed in front, also
+                # in unevaluated products (e.g. x*(-1)*y is -xy)
+                sign = "" if sign else "-"
+                factor = -coefficient * rest
+            if factor != 1:
+                factors.append(factor)
+
+        numerator, denominator = [], []
+        for factor in factors:
+            if (
+                factor.is_Pow
+                and factor.exp.is_Rational
+                and factor.exp.is_negative
+            ):
+                denominator.append(factor.base ** -factor.exp)
+            elif factor.is_Rational and factor.q != 1:
+                if factor.p != 1:
+                    numerator.append(Integer(factor.p))
+                denominator.append(Integer(factor.q))
+            else:
+                numerator.append(factor)
+
+        out = sign + (self._product(numerator) if numerator else "1")
+        if not denominator:
+            return out
+
+        below = self._product(denominator)
+        if len(denominator) > 1 or denominator[0].is_Mul:
+            below = f"({below})"
+        return f"{out}/{below}"
+
+    def _product(self, factors):
+        """
+            Prints factors next to each other (implicit multiplication),
+            with a dot between numbers and after square roots
+        """
+        out, previous = "", ""
+        for factor in factors:
+            string = self.parenthesize(factor, PRECEDENCE["Mul"], strict=False)
+            if string.startswith("-") and out:
+                string = f"({string})"
+            if out and (
+                # e.g. 2⋅3 and √2⋅x
+                (out[-1].isdigit() or out[-1] == ".")
+                and (string[0].isdigit() or string[0] == ".")
+                or previous.startswith("√")
+            ):
+                out += "⋅"
+            out += string
+            previous = string
+        return out
+
+    def _print_Pow(self, expr, rational=False):
+        base, exp = expr.base, expr.exp
+
+        if exp == S.Half:
+            return "√" + self.parenthesize(base, PRECEDENCE["Atom"])
+        if exp.is_Rational and exp.is_negative:
+            return "1/" + self.parenthesize(base ** -exp, PRECEDENCE["Pow"])
+
+        exponent = self._print(exp)
+        sup = to_superscript(exponent.replace(" ", ""))
+        string = self.parenthesize(base, PRECEDENCE["Pow"], strict=True)
+        if isinstance(base, exp_function):
+            # e.g. (eˣ)²
+            string = f"({string})"
+        elif base.is_Function and sup is not None and exp.is_Integer:
+            name, paren, args = string.partition("(")
+            if paren and name.isalpha():
+                # e.g. sin²(x)
+                return f"{name}{sup}({args}"
+
+        if sup is not None:
+            return string + sup
+        return f"{string}^{self.parenthesize(exp, PRECEDENCE['Pow'], strict=True)}"
+
+    def _print_exp(self, expr):
+        exponent = self._print(expr.args[0])
+        sup = to_superscript(exponent.replace(" ", ""))
+        if sup is not None:
+            return "e" + sup
+        return f"exp({exponent})"
+
+    def _print_Function(self, expr):
+        return (
+            expr.func.__name__
+            + "("
+            + ", ".join(self._print(arg) for arg in expr.args)
+            + ")"
+        )
+
+    def _print_Derivative(self, expr):
+        variables = []
+        for var, count in expr.variable_count:
+            name = self._print(var)
+            variables.append(
+                f"∂{name}" + (to_superscript(str(count)) if count > 1 else "")
+            )
+        order = expr.derivative_count
+        numerator = "∂" + (to_superscript(str(order)) if order > 1 else "")
+        return f"{numerator}/{''.join(variables)} [{self._print(expr.expr)}]"
+
+    def _print_Relational(self, expr):
+        operator = {"==": "=", "!=": "≠", "<=": "≤", ">=": "≥"}.get(
+            expr.rel_op, expr.rel_op
+        )
+        return f"{self._print(expr.lhs)} {operator} {self._print(expr.rhs)}"
+
+
+_printer = UnicodePrinter()
+
+
+def to_unicode(expression):
     """
-    latex_to_replace = [
-        ("$", ""),
-        (r"\left", ""),
-        (r"\right", ""),
-        (r"\log", "log"),
-        (r"\sin", "sin"),
-        (r"\cos", "cos"),
-        (r"\tan", "tan"),
-        (" ", ""),
-    ]
-    latex_to_replace.extend(
-        [("partial^{" + i, "partial^{" + i + "}") for i in "1234567890"]
-    )
-
-    for to, rep in latex_to_replace:
-        ltx = ltx.replace(to, rep)
-    return ltx
+        Prints a sympy expression as a unicode string
 
+        Arguments:
+            expression: sympy expression
 
-# unicode characters
-symbols = "√│─¬≦≺…≅≧⋅═∫∑Π∓%▽÷≨≤≩‥−"
-
-mathcal = "Aℬℑℯℒℋℰℛℊ𝒩"
-
-greek = "αβγΓδΔϵζηHθΘιIκKλΛμnuνNξΞoOπΠρPσΣτTυϒϕΦχXψΨωΩ"
-
-superscripts = "ˣʸᶻᵖʳˢᵗᵘᵛʷʰⁱʲᵏˡᵐⁿᵒᵃᵇᶜᵈᵉᶠᵍᴾᴿᵀᵁᵂᴴᴵᴶᴷᴸᴹᴺᴼᴬᴮᴰᴱᴳᵠᵡᵟᵞᵝ⁸⁹˂⁼˃⁰¹²³⁴⁵⁶⁷⁽⁾₉₈₇₆₅₄₃₂₁₀₋₋₊₎₍ᵨᵪᵩᵦᵧ"
+        Returns:
+            str
+    """
+    return _printer.doprint(expression)
@@ -1,75 +1,53 @@
 from sympy.core.numbers import Float, Integer, Rational
-from sympy.sets import ConditionSet, FiniteSet, EmptySet
-from pyinspect.utils import _class_name
-from loguru import logger
+from sympy.sets import FiniteSet, ImageSet, Union
+from sympy import S
+from ._log import logger
+from pathlib import Path
 
 
-def get_closed_parenthesis(string):
-    """
-        Given a string like '{xx{xx}xx}'
-        it finds when the second parenthesis is closed
-    """
-    count = 0
-    for n, letter in enumerate(string):
-        if letter == "{":
-            count += 1
-        elif letter == "}":
-            count -= 1
-        if count == 0:
-            break
-    return n
-
-
-def get_opened_parenthesis(string):
-    """
-        Given a string like '{xx{xx}xx}'
-        this function walks backwards and finds when the 
-        last parenthesis was first opened
-    """
-    count = 0
-    for n, letter in enumerate(string[::-1]):
-        if letter == "}":
-            count += 1
-        elif letter == "{":
-            count -= 1
-
-        if count == 0:
-            break
-    return len(string) - n
-
-
-def parse_solveset(solution):
+def parse_solveset(solution, all_solutions=False):
     """
         Given what sympy.solvest(eq) returned while
         trying to solve a sympy.Eq equation, return
         a string expression that can be parsed by Expression. 
+        For periodic solutions (e.g. of sin(x) = 0) the solution
+        for n=0 is used (e.g. 0 for 2*n*pi).
 
         Arguments:
             solution: sympy.set.Set subclasses, output of sympy.solveset
+            all_solutions: bool. If true all the solutions are returned
 
         Returns:
-            solution: str. A string expression with the solution
+            solution: str. A string expression with the solution, or None if there are no solutions.
+                If all_solutions is true a list of str with all solutions (empty if there are none)
+
+        Raises:
+            NotImplementedError: if the solutions can't be expressed as a finite set of expressions
     """
     logger.debug(f"PARSE SOLVESET with solution: {solution}")
     if solution is None:
-        return None
-
-    if isinstance(solution, ConditionSet):
-        try:
-            return str(solution.base_set.args[0])
-        except IndexError:
-            raise NotImplementedError(
-                f"Unrecognized solution: {_class_name(solution)}"
-            )
+        solutions = []
     elif isinstance(solution, FiniteSet):
-        return str(solution.args[0])
-    elif _class_name(solution) == "EmptySet" or isinstance(solution, EmptySet):
-        return None
+        solutions = [str(s) for s in solution.args]
+    elif solution.is_empty:
+        solutions = []
+    elif isinstance(solution, ImageSet) and solution.base_sets == (
+        S.Integers,
+    ):
+        solutions = [str(solution.lamda(0))]
+    elif isinstance(solution, Union):
+        solutions = []
+        for subset in solution.args:
+            solutions.extend(parse_solveset(subset, all_solutions=True))
     else:
         raise NotImplementedError(
-            f"Unrecognized solution: {_class_name(solution)}"
+            f"Unrecognized solution: {type(solution).__name__}"
         )
 
+    if all_solutions:
+        return solutions
+    return solutions[0] if solutions else None
+
 
 def fmt_number(num):
     """
@@ -92,6 +70,54 @@ def fmt_number(num):
         return f"{num:.3f}"
 
 
+def _round_mpf(value, digits, rounding):
+    """
+        Rounds an mpmath mpf value (a tuple, see mpmath.libmp) to a decimal
+        string with a number of significant digits, with decimal's rounding mode
+    """
+    from decimal import Decimal, localcontext
+    from mpmath.libmp import to_str
+
+    sign, man, exp, _ = value
+    if not man:
+        # zero, infinity and nan
+        return to_str(value, digits)
+
+    # exact decimal value, man * 2^exp = man * 5^-exp * 10^exp
+    if exp >= 0:
+        exact = Decimal(man * 2 ** exp)
+    else:
+        exact = Decimal(f"{man * 5 ** -exp}E{exp}")
+    with localcontext() as context:
+        context.prec = digits
+        context.rounding = rounding
+        return str(+(-exact if sign else exact))
+
+
+def fmt_precise(value, digits):
+    """
+        Formats a number computed with arbitrary precision (see Expression.calc_precise)
+        with a number of significant digits. Intervals are formatted as '[a, b]',
+        with the bounds rounded outwards so that they still contain the exact value.
+
+        Arguments:
+            value: sympy Float, mpmath mpf or interval, or any other object
+            digits: int. Number of significant digits
+        Returns:
+            formatted number: str.
+    """
+    from decimal import ROUND_FLOOR, ROUND_CEILING
+    from mpmath.libmp import to_str
+
+    if hasattr(value, "_mpi_"):
+        a, b = value._mpi_
+        return f"[{_round_mpf(a, digits, ROUND_FLOOR)}, {_round_mpf(b, digits, ROUND_CEILING)}]"
+    elif hasattr(value, "_mpf_"):
+        # sympy Float and mpmath mpf
+        return to_str(value._mpf_, digits)
+    return str(value)
+
+
 def is_number(x):
     """
         Checks if a given input is a number
@@ -102,3 +128,83 @@ def is_number(x):
             is number: bool. True if x is a number
     """
     return isinstance(x, (Float, Integer, Rational, float, int))
+
+
+def to_json(value):
+    """
+        Converts the result of an operation to a
+        JSON serializable value.
+    """
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    elif is_number(value):
+        value = float(value)
+        return int(value) if value.is_integer() else value
+    elif isinstance(value, dict):
+        return {str(k): to_json(v) for k, v in value.items()}
+    elif isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    elif hasattr(value, "tolist"):
+        # numpy arrays
+        return to_json(value.tolist())
+    else:
+        return str(value)
+
+
+def load_values(filepath):
+    """
+        Loads columns of variables values from file.
+        Supported formats:
+            - .csv: comma separated values with a header row of variables names
+            - .npy: structured array with one field per variable, or a 2D array
+                with one column per variable
+            - .npz: one array per variable
+
+        Arguments:
+            filepath: str, Path. Path to the file
+
+        Returns:
+            values: dict of variables names and their np.ndarray of values,
+                or a 2D np.ndarray if the file doesn't specify variables names
+    """
+    import numpy as np
+
+    filepath = Path(filepath)
+    logger.debug(f"LOADING VALUES from {filepath}")
+
+    if filepath.suffix == ".csv":
+        data = np.genfromtxt(
+            filepath, delimiter=",", names=True, dtype=float, ndmin=1
+        )
+    elif filepath.suffix == ".npz":
+        with np.load(filepath) as data:
+            return {k: data[k] for k in data.files}
+    elif filepath.suffix == ".npy":
+        data = np.load(filepath)
+    else:
+        raise ValueError(
+            f"Unrecognized values file format: {filepath.suffix}, use .csv, .npy or .npz"
+        )
+
+    if data.dtype.names is not None:
+        return {name: data[name] for name in data.dtype.names}
+    return data
+
+
+def save_values(filepath, values):
+    """
+        Saves an array of values to file, either as
+        .npy or as text (e.g. .csv or .txt)
+
+        Arguments:
+            filepath: str, Path. Path to the file
+            values: np.ndarray
+    """
+    import numpy as np
+
+    filepath = Path(filepath)
+    if filepath.suffix == ".npy":
+        np.save(filepath, values)
+    else:
+        np.savetxt(filepath, values, delimiter=",", fmt="%.17g")
+    logger.debug(f"SAVED VALUES to {filepath}")
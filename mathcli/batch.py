@@ -0,0 +1,278 @@
+from collections import deque
+import json
+
+from ._log import logger
+from ._utils import to_json
+from .errors import OperationTimeoutError
+from .serialization import loads
+
+"""
+    Batch processing of many jobs in a single process.
+    Jobs are read lazily line by line, either as JSON objects like:
+        {"op": "solve", "expression": "3x + 2y = 1", "solve_for": "x", "given": {"y": 1}}
+    or as plain expression strings (processed with a default operation).
+    Each job is processed as it's read and its result is yielded as a
+    dictionary ready to be written out as JSON, so memory use doesn't
+    grow with the number of jobs.
+    Simplify and solve jobs accept a "timeout" (seconds) field, simplify
+    jobs "fallback" and "tier" fields, see mathcli.math.simplify, and solve jobs
+    "method", "interval" and "all" fields, see mathcli.math.solve.
+    Calc jobs accept "precision" (digits) and "interval" (true for interval
+    arithmetic) fields, see mathcli.math.calc: their results are strings.
+
+    Jobs can be distributed across a pool of worker processes, in which
+    case expressions are parsed once in the main process and shipped to
+    the workers serialized (see mathcli.serialization) instead of as text
+    to be re-parsed.
+"""
+
+
+# operations take a job and return a dictionary of output fields
+def _calc(job):
+    from mathcli import math
+    from ._utils import fmt_precise
+
+    precision, interval = job.get("precision"), job.get("interval", False)
+    result = math.calc.__wrapped__(
+        job["expression"],
+        show_result=False,
+        precision=precision,
+        interval=interval,
+        **job.get("values", {}),
+    )
+    if precision or interval:
+        # arbitrary precision numbers, as strings
+        result = fmt_precise(result, precision or math.default_precision)
+    return dict(result=result)
+
+
+def _simplify(job):
+    from .expression import Expression
+
+    simplified = Expression(job["expression"]).simplify(
+        timeout=job.get("timeout"),
+        fallback=job.get("fallback", True),
+        tier=job.get("tier", "auto"),
+    )
+    return dict(
+        result=simplified.string,
+        tier=simplified.tier,
+        strategy=simplified.strategy,
+    )
+
+
+def _derivative(job):
+    from mathcli import math
+    from .expression import parse, evaluated
+
+    derivative = math.derivative.__wrapped__(
+        job["expression"], job.get("wrt"), show_result=False
+    )
+    return dict(result=str(loads(evaluated(parse(derivative)))))
+
+
+def _solve(job):
+    from mathcli import math
+
+    result = math.solve.__wrapped__(
+        job["expression"],
+        job.get("solve_for"),
+        show_result=False,
+        timeout=job.get("timeout"),
+        method=job.get("method", "auto"),
+        interval=job.get("interval", (-10, 10)),
+        all_solutions=job.get("all", False),
+        **job.get("given", {}),
+    )
+    return dict(result=result)
+
+
+operations = dict(
+    calc=_calc, simplify=_simplify, derivative=_derivative, solve=_solve,
+)
+
+
+def read_jobs(lines, operation="calc", timeout=None):
+    """
+        Parses lines into jobs.
+
+        Arguments:
+            lines: iterable of str. E.g. an open file or sys.stdin
+            operation: str. Operation for lines with a plain expression string
+            timeout: float, optional. Default time budget in seconds for simplify and solve jobs
+
+        Returns:
+            generator of jobs dictionaries with (at least) 'id', 'op' and 'expression'
+    """
+    for n, line in enumerate(lines):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        if line.startswith("{"):
+            try:
+                job = json.loads(line)
+            except ValueError as e:
+                job = dict(expression=line, invalid=f"Invalid JSON: {e}")
+        else:
+            job = dict(expression=line)
+
+        job.setdefault("id", n)
+        job.setdefault("op", operation)
+        if timeout is not None:
+            job.setdefault("timeout", timeout)
+        yield job
+
+
+def run_job(job):
+    """
+        Runs a single job, errors are reported in the
+        output instead of being raised.
+
+        Arguments:
+            job: dict. Job dictionary as returned by read_jobs
+
+        Returns:
+            dict with the job's id, op and expression and its 'result' or 'error'
+    """
+    output = dict(
+        id=job.get("id"), op=job.get("op"), expression=job.get("expression")
+    )
+    try:
+        if "invalid" in job:
+            raise ValueError(job["invalid"])
+        if job.get("op") not in operations:
+            raise ValueError(f"Unrecognized operation: {job.get('op')}")
+        if "expression" not in job:
+            raise ValueError("Job has no expression")
+        if "tree" in job:
+            # parsed in the main process, see _submit
+            job = dict(job, expression=loads(job["tree"]))
+
+        fields = operations[job["op"]](job)
+    except Exception as e:
+        logger.debug(f"BATCH job {output['id']} failed: {e}")
+        output["error"] = f"{type(e).__name__}: {e}"
+        if isinstance(e, OperationTimeoutError):
+            output["timeout"] = True
+    else:
+        output.update({k: to_json(v) for k, v in fields.items()})
+    return output
+
+
+def _submit(executor, job):
+    """
+        Parses a job's expression and submits the job to a pool of workers.
+
+        Returns:
+            future: concurrent.futures.Future with the output of run_job
+            job: the job as it was read
+    """
+    from concurrent.futures import Future
+    from .expression import Expression
+    from .serialization import dumps
+
+    submitted = job
+    expression = job.get("expression")
+    if isinstance(expression, str) and "invalid" not in job:
+        try:
+            tree = dumps(Expression(expression).expression)
+            submitted = dict(job, tree=tree)
+        except Exception:
+            pass  # the worker will report the error
+
+    try:
+        future = executor.submit(run_job, submitted)
+    except Exception as e:
+        # e.g. the pool is broken, report the error as the job's output
+        future = Future()
+        future.set_exception(e)
+    return future, job
+
+
+def _collect(pending, ordered):
+    """
+        Waits for submitted jobs to finish and returns their outputs:
+        the first submitted job if ordered, otherwise all completed jobs.
+        Jobs which failed in the pool (e.g. a worker crashed) have an 'error' output.
+
+        Arguments:
+            pending: deque of (future, job) tuples. Jobs are removed once collected
+            ordered: bool. If true outputs are returned in the order jobs were submitted
+    """
+    from concurrent.futures import wait, FIRST_COMPLETED
+
+    if ordered:
+        done = [pending[0]]
+    else:
+        completed, _ = wait(
+            [future for future, _ in pending], return_when=FIRST_COMPLETED
+        )
+        done = [item for item in pending if item[0] in completed]
+
+    outputs = []
+    for item in done:
+        pending.remove(item)
+        future, job = item
+
+        try:
+            output = future.result()
+        except Exception as e:
+            logger.debug(f"BATCH job {job.get('id')} failed in the pool: {e}")
+            output = dict(
+                id=job.get("id"),
+                op=job.get("op"),
+                error=f"{type(e).__name__}: {e}",
+            )
+        output["expression"] = job.get("expression")
+        outputs.append(output)
+    return outputs
+
+
+def run_parallel(jobs, n_jobs, ordered=True):
+    """
+        Runs jobs in a pool of worker processes.
+        Only a limited number of jobs is submitted to the pool at any time,
+        so that memory use doesn't grow with the number of jobs.
+
+        Arguments:
+            jobs: iterable of dict. E.g. as returned by read_jobs
+            n_jobs: int. Number of worker processes
+            ordered: bool. If true outputs are returned in the same order as the jobs
+
+        Returns:
+            generator of outputs dictionaries, see run_job
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    max_pending = 4 * n_jobs
+    pending = deque()
+    with ProcessPoolExecutor(n_jobs) as executor:
+        for job in jobs:
+            pending.append(_submit(executor, job))
+            if len(pending) >= max_pending:
+                yield from _collect(pending, ordered)
+
+        while pending:
+            yield from _collect(pending, ordered)
+
+
+def run(jobs, n_jobs=1, ordered=True):
+    """
+        Runs jobs one at a time, or in a pool of worker processes.
+
+        Arguments:
+            jobs: iterable of dict. E.g. as returned by read_jobs
+            n_jobs: int. Number of worker processes, if 1 jobs run in the current process
+            ordered: bool. If true outputs are returned in the same order as the jobs,
+                only relevant when n_jobs > 1
+
+        Returns:
+            generator of outputs dictionaries, see run_job
+    """
+    if n_jobs > 1:
+        yield from run_parallel(jobs, n_jobs, ordered=ordered)
+        return
+
+    for job in jobs:
+        yield run_job(job)
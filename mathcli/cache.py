@@ -1,23 +1,44 @@
 from pathlib import Path
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import json
+import time
 import os
-from loguru import logger
+from ._log import logger
+from .profiling import stage
 
+# the directory is created when the cache is first used
 cache_dir = Path(os.path.join(os.path.expanduser("~"), ".mathcli"))
-cache_dir.mkdir(exist_ok=True)
 
-logger.debug(f"Cache directory: {cache_dir}")
+# part of the results' keys, changed when the format of results
+# changes (e.g. expressions stored serialized instead of as strings)
+cache_version = 2
 
 
 def to_cache(result):
-    with open(cache_dir / "last.txt", "w") as out:
-        out.write(result)
-        logger.debug(f"CACHED RESULT {result}")
+    from .expression import parse
+    from .serialization import dumps
+
+    # the parsed expression is stored too, so that it's not parsed again
+    try:
+        tree = dumps(parse(result, evaluate=False))
+    except Exception:
+        tree = None  # not an expression, it's parsed when loaded
+    results.set_last(result, tree)
+    logger.debug(f"CACHED RESULT {result}")
 
 
 def load_last():
-    with open(cache_dir / "last.txt", "r") as f:
-        last = f.read()
-        logger.debug(f"LOADED CACHED RESULT {last}")
+    last, tree = results.get_last(tree=True)
+    if last is None:
+        raise ValueError("No cached result to load as 'last'")
+    if tree is not None:
+        from .expression import parsed, clean
+        from .serialization import loads
+
+        parsed.set((clean(last), False), loads(tree))
+    logger.debug(f"LOADED CACHED RESULT {last}")
     return last
 
 
@@ -30,6 +51,7 @@ def cache_expression(func):
             - if the inner functin's output is an expression, it caches it
     """
 
+    @wraps(func)
     def cache(*args, **kwargs):
         # check if loading from cache
         args = list(args)
@@ -46,3 +68,322 @@ def cache_expression(func):
         return result
 
     return cache
+
+
+class LRUCache(object):
+    def __init__(self, maxsize=256):
+        """
+            In-memory least-recently-used cache with a limited
+            number of entries, keeping track of hits and misses.
+
+            Arguments:
+                maxsize: int. Max number of entries kept in the cache
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """
+            Returns the cached value for key (or default
+            if key is not in the cache) and updates the statistics
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """
+            Adds a value to the cache, evicting the
+            least recently used entry if the cache is full
+        """
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        """
+            Removes all entries and resets the statistics
+        """
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """
+            Returns a dictionary with the cache statistics
+        """
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            size=len(self._data),
+            maxsize=self.maxsize,
+        )
+
+
+class ResultsCache(object):
+    _missing = object()
+
+    def __init__(
+        self,
+        path=None,
+        ttl=30 * 24 * 3600,
+        max_entries=100000,
+        evict_every=100,
+    ):
+        """
+            Persistent cache of the results of expensive sympy operations
+            (e.g. simplify, solveset) stored in a SQLite database, so that
+            they are shared across processes.
+            Entries are content-addressed by a hash of the operation name, the
+            canonical (srepr) form of the expression and the operation's arguments.
+            Entries older than ttl are discarded and when the cache grows beyond
+            max_entries the least recently used entries are evicted.
+            Eviction only runs every evict_every insertions, so the cache can
+            temporarily hold up to evict_every entries more than max_entries.
+
+            Arguments:
+                path: str, Path, optional. Path to the database file
+                ttl: float. Time to live of each entry, in seconds
+                max_entries: int. Max number of entries kept in the cache
+                evict_every: int. Number of insertions between evictions
+        """
+        self.path = Path(path or cache_dir / "cache.db")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self._inserts = 0
+        self.enabled = os.environ.get("MATHCLI_CACHE", "1") != "0"
+
+        self.hits = 0
+        self.misses = 0
+
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self):
+        """
+            Opens the connection to the database on first use
+            (and again in forked processes)
+        """
+        if self._connection is None or self._pid != os.getpid():
+            import sqlite3
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            logger.debug(f"Results cache: {self.path}")
+            self._connection = sqlite3.connect(
+                str(self.path), timeout=30, isolation_level=None
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, op TEXT, result TEXT, "
+                "created REAL, accessed REAL)"
+            )
+            # indices for eviction, by age and by last access
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_created ON results (created)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            self._pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def key(op, expression, **args):
+        """
+            Returns the content address of an operation
+            on an expression with a given set of arguments
+        """
+        if not isinstance(expression, str):
+            from sympy import srepr
+
+            expression = srepr(expression)
+        content = json.dumps(
+            [
+                cache_version,
+                op,
+                expression,
+                sorted((k, str(v)) for k, v in args.items()),
+            ]
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, op, expression, default=None, **args):
+        """
+            Returns the cached result of an operation, or default
+            if the result is not in the cache (or has expired)
+        """
+        if not self.enabled:
+            return default
+
+        key = self.key(op, expression, **args)
+        row = self.connection.execute(
+            "SELECT result, created FROM results WHERE key = ?", (key,)
+        ).fetchone()
+
+        now = time.time()
+        if row is None or now - row[1] > self.ttl:
+            self.misses += 1
+            return default
+
+        self.connection.execute(
+            "UPDATE results SET accessed = ? WHERE key = ?", (now, key)
+        )
+        self.hits += 1
+        logger.debug(f"RESULTS CACHE hit for {op}")
+        return json.loads(row[0])
+
+    def set(self, op, expression, result, **args):
+        """
+            Stores the result of an operation in the cache.
+            The result must be JSON serializable (e.g. a string).
+        """
+        if not self.enabled:
+            return
+
+        now = time.time()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+            (
+                self.key(op, expression, **args),
+                op,
+                json.dumps(result),
+                now,
+                now,
+            ),
+        )
+
+        self._inserts += 1
+        if self._inserts >= self.evict_every:
+            self.evict()
+
+    def evict(self):
+        """
+            Removes expired entries and, if the cache is full,
+            the least recently used entries
+        """
+        self._inserts = 0
+        self.connection.execute(
+            "DELETE FROM results WHERE created < ?", (time.time() - self.ttl,)
+        )
+        n_entries = self.connection.execute(
+            "SELECT COUNT(*) FROM results"
+        ).fetchone()[0]
+
+        if n_entries > self.max_entries:
+            self.connection.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY accessed LIMIT ?)",
+                (n_entries - self.max_entries,),
+            )
+
+    def clear(self):
+        """
+            Removes all entries from the cache
+        """
+        self.connection.execute("DELETE FROM results")
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM results"
+        ).fetchone()[0]
+
+    def set_last(self, result, tree=None):
+        """
+            Stores the last result, which can be used as
+            expression by passing 'last'
+
+            Arguments:
+                result: str. The result
+                tree: str, optional. The result parsed and serialized, see mathcli.serialization
+        """
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+            [("last", result), ("last_tree", tree)],
+        )
+
+    def get_last(self, tree=False):
+        """
+            Returns the last stored result or None,
+            and its serialized tree (or None) if tree is true
+        """
+        rows = dict(
+            self.connection.execute(
+                "SELECT key, value FROM meta WHERE key IN ('last', 'last_tree')"
+            ).fetchall()
+        )
+        if tree:
+            return rows.get("last"), rows.get("last_tree")
+        return rows.get("last")
+
+    def cached(self, op):
+        """
+            Decorator for functions that take a sympy expression (and optionally
+            keyword arguments) and return a JSON serializable result, e.g. a string.
+            The function's results are stored and loaded from the cache.
+            The decorated function accepts an extra `timeout` keyword argument:
+            when given, results not in the cache are computed in a child process
+            within that time budget (see mathcli.timeout).
+        """
+
+        def decorator(func):
+            @wraps(func)
+            def inner(expression, timeout=None, **args):
+                result = self.get(op, expression, self._missing, **args)
+                if result is not self._missing:
+                    return result
+
+                if timeout is not None:
+                    from .timeout import call_with_timeout
+
+                    # computed and cached in the child process
+                    with stage("sympy"):
+                        return call_with_timeout(
+                            inner, expression, timeout=timeout, **args
+                        )
+
+                with stage("sympy"):
+                    result = func(expression, **args)
+                self.set(op, expression, result, **args)
+                return result
+
+            return inner
+
+        return decorator
+
+    def info(self):
+        """
+            Returns a dictionary with the cache statistics
+        """
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            size=len(self),
+            max_entries=self.max_entries,
+            path=str(self.path),
+        )
+
+
+results = ResultsCache()
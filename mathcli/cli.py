@@ -1,7 +1,8 @@
-from mathcli import math
-from mathcli.expression import Expression
 import typer
 from typing import List, Optional
+from pathlib import Path
+from enum import Enum
+import sys
 
 app = typer.Typer(help="Numerical and symbolic math in your terminal")
 
@@ -18,6 +19,8 @@ app = typer.Typer(help="Numerical and symbolic math in your terminal")
             Numerical and symbolic math in your terminal
 
             Options:
+            --profile / --no-profile        Show the time spent in each stage of the command
+            --profile-output PATH           File to save cProfile stats of the command to
             --install-completion [bash|zsh|fish|powershell|pwsh]
                                             Install completion for the specified shell.
             --show-completion [bash|zsh|fish|powershell|pwsh]
@@ -29,8 +32,16 @@ app = typer.Typer(help="Numerical and symbolic math in your terminal")
             Commands:
             calc        Calculate the value of an expression.
             derivative  Compute the derivative of an expression.
+            gradient    Compute the gradient of an expression.
+            jacobian    Compute the Jacobian matrix of several expressions.
+            hessian     Compute the Hessian matrix of an expression.
             simplify    Simplify an expression.
             solve       Solve an equation.
+            batch       Process many jobs in a single process.
+            serve       Start a daemon to run commands faster.
+
+    Each command imports only what it needs (e.g. sympy, rich) when
+    it runs, to keep the startup time short.
 """
 
 
@@ -59,36 +70,224 @@ def stitch(expression_tuple):
     return "".join(expression_tuple)
 
 
+class Format(str, Enum):
+    # how results are shown, see mathcli.math.print_text
+    rich = "rich"
+    plain = "plain"
+    json = "json"
+
+
+class Method(str, Enum):
+    # how equations are solved, see mathcli.math.solve
+    auto = "auto"
+    symbolic = "symbolic"
+    numeric = "numeric"
+
+
+class Backend(str, Enum):
+    # how expressions are evaluated over arrays of values, see mathcli.compiled
+    numpy = "numpy"
+    auto = "auto"
+    c = "c"
+    numba = "numba"
+
+
+class Tier(str, Enum):
+    # how thoroughly expressions are simplified, see mathcli.expression.Expression.simplify
+    auto = "auto"
+    full = "full"
+    trig = "trig"
+    rational = "rational"
+
+
+def format_option():
+    return typer.Option(
+        Format.rich,
+        "--format",
+        help="show results as a rich panel, plain text or compact JSON",
+    )
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: bool = typer.Option(
+        False, help="show the time spent in each stage of the command"
+    ),
+    profile_output: Optional[Path] = typer.Option(
+        None, help="file to save cProfile stats of the command to"
+    ),
+):
+    """
+        Numerical and symbolic math in your terminal
+
+        Arguments:
+            profile: bool. If true a breakdown of the time spent parsing, evaluating,
+                rendering etc. is shown after the command
+            profile_output: Path, optional. If given the command is run under cProfile and
+                the stats are saved to the file (inspect with 'python -m pstats')
+    """
+    if profile:
+        import time
+        from mathcli import profiling
+
+        start = time.perf_counter()
+        profiling.enable()
+
+        def show_profile():
+            from mathcli import theme
+
+            total = time.perf_counter() - start
+            profiling.disable()
+            theme.console.print(
+                profiling.report(profiling.breakdown(), total=total)
+            )
+
+        ctx.call_on_close(show_profile)
+
+    if profile_output is not None:
+        from mathcli import profiling
+
+        # the stats are saved when the command's context closes
+        ctx.with_resource(profiling.cprofile(profile_output))
+
+
 @app.command()
 def calc(
     expression: List[str] = typer.Argument(None),
     v: Optional[List[str]] = typer.Option(None, help="variables values"),
+    values_file: Optional[Path] = typer.Option(
+        None, help="file with columns of variables values (.csv, .npy, .npz)"
+    ),
+    output: Optional[Path] = typer.Option(
+        None, help="file to save the values computed with --values-file"
+    ),
+    backend: Backend = typer.Option(
+        Backend.numpy,
+        help="with --values-file: numpy, or compile the expression with auto, c or numba",
+    ),
+    precision: Optional[int] = typer.Option(
+        None, help="number of significant digits, with arbitrary precision"
+    ),
+    interval: bool = typer.Option(
+        False, help="compute guaranteed bounds with interval arithmetic"
+    ),
+    fmt: Format = format_option(),
 ):
     """
         Calculate the value of an expression. 
         If the expression is numeric (e.g. '3 + sqrt(10)') then no other arguments  are necessary.
         For symbolic expressions like '3x + 2' the value of the variables must be passed to 
         compute the expressions value. Use the '--v' options to pass variables value like 'x=1'.
+        Use '--values-file' to pass a file with columns of values for each variable: the expression
+        is evaluated once over the whole arrays and the values are printed one per line 
+        (or saved to the file given by '--output'). For long sweeps use '--backend auto' to compile
+        the expression to native code first (compiled expressions are cached on disk).
+        Use '--precision N' to compute the value to N significant digits with arbitrary
+        precision arithmetic, and '--interval' to compute bounds guaranteed to contain
+        the value with interval arithmetic (e.g. '[1.4142, 1.4143]').
+        Use '--format plain' or '--format json' to print just the result, or a JSON object.
         For more information: https://docs.sympy.org/latest/modules/evalf.html
 
         Arguments:
             expression: str. Numeric or symbolic expression.
             v: str, optional. A string with variables values like: 'x=1 y=2'
+            values_file: Path, optional. Path to a .csv, .npy or .npz file with variables values
+            output: Path, optional. Path to a .npy or .csv file to save the values to
+            backend: Backend. Backend used to evaluate the expression with --values-file
+            precision: int, optional. Number of significant digits
+            interval: bool. If true, compute bounds with interval arithmetic
+            fmt: Format. How to show the result: rich, plain or json
     """
-    math.calc(stitch(expression), **parse_kwargs(v))
+    from mathcli import math
+
+    if values_file is None:
+        math.calc(
+            stitch(expression),
+            render=fmt.value,
+            precision=precision,
+            interval=interval,
+            **parse_kwargs(v),
+        )
+        return
+
+    import numpy as np
+    from mathcli._utils import save_values, fmt_precise
+
+    if output is not None and (precision or interval):
+        raise typer.BadParameter(
+            "--output can't be used with --precision or --interval",
+            param_hint="--output",
+        )
+
+    result = math.calc_batch(
+        stitch(expression),
+        values=values_file,
+        backend=backend.value,
+        precision=precision,
+        interval=interval,
+        **parse_kwargs(v),
+    )
+    if precision or interval:
+        # arbitrary precision numbers, as strings
+        digits = precision or math.default_precision
+        result = [fmt_precise(r, digits) for r in np.ravel(result)]
+        if fmt == Format.json:
+            import json
+
+            typer.echo(json.dumps(result))
+        else:
+            typer.echo("\n".join(result))
+    elif output is not None:
+        save_values(output, result)
+    elif fmt == Format.json:
+        import json
+
+        typer.echo(json.dumps(np.atleast_1d(result).tolist()))
+    else:
+        np.savetxt(sys.stdout, np.atleast_1d(result), fmt="%.17g")
 
 
 @app.command()
-def simplify(expression: List[str] = typer.Argument(None)):
+def simplify(
+    expression: List[str] = typer.Argument(None),
+    timeout: Optional[float] = typer.Option(
+        None, help="time budget in seconds"
+    ),
+    fallback: bool = typer.Option(
+        True, help="use cheaper strategies if simplify times out"
+    ),
+    tier: Tier = typer.Option(
+        Tier.auto,
+        help="simplification tier, chosen from the expression's size by default",
+    ),
+    fmt: Format = format_option(),
+):
     """
         Simplify an expression.
         Simplifies an expression, e.g. '3x + 2x -1' becomes '5x -1'
+        With --timeout the simplification is aborted if it doesn't complete in time and
+        cheaper strategies (expand and cancel) are used instead, unless --no-fallback is passed.
+        Large expressions are simplified with cheaper strategies (trigsimp, together and
+        cancel) than sympy's simplify, --tier forces how thoroughly they're simplified.
         For more information about simplification: https://docs.sympy.org/latest/tutorial/simplification.html
 
         Arguments:
             expression: str. Numeric or symbolic expression.
+            timeout: float, optional. Time budget in seconds
+            fallback: bool. If false an error is raised when simplify times out
+            tier: Tier. auto, full (sympy's simplify), trig or rational
+            fmt: Format. How to show the result: rich, plain or json
     """
-    math.simplify(stitch(expression))
+    from mathcli import math
+
+    math.simplify(
+        stitch(expression),
+        timeout=timeout,
+        fallback=fallback,
+        render=fmt.value,
+        tier=tier.value,
+    )
 
 
 @app.command()
@@ -99,6 +298,8 @@ def latex(expression: List[str] = typer.Argument(None)):
         Arguments:
             expression: str. Numeric or symbolic expression.
     """
+    from mathcli.expression import Expression
+
     typer.echo(Expression(stitch(expression)).latex)
 
 
@@ -110,12 +311,16 @@ def unicode(expression: List[str] = typer.Argument(None)):
         Arguments:
             expression: str. Numeric or symbolic expression.
     """
+    from mathcli.expression import Expression
+
     typer.echo(Expression(stitch(expression)).unicode)
 
 
 @app.command()
 def derivative(
-    expression: List[str] = typer.Argument(None), wrt: str = typer.Option(None)
+    expression: List[str] = typer.Argument(None),
+    wrt: str = typer.Option(None),
+    fmt: Format = format_option(),
 ):
     """
         Compute the derivative of an expression.
@@ -130,8 +335,150 @@ def derivative(
         Arguments:
             expression: str. Numeric or symbolic expression.
             wrt: str, optional. A string with variables names like 'x'
+            fmt: Format. How to show the result: rich, plain or json
+    """
+    from mathcli import math
+
+    math.derivative(stitch(expression), wrt, render=fmt.value)
+
+
+def matrix_command(op, expression, wrt, values_file, output, backend, fmt):
+    """
+        Runs the gradient, jacobian and hessian commands: either
+        shows the matrix of derivatives or, with a values file, evaluates
+        it at each set of values and prints (or saves) one row of values
+        per set, with the matrix' entries flattened.
     """
-    math.derivative(stitch(expression), wrt)
+    from mathcli import math
+
+    function = getattr(math, op)
+    if values_file is None:
+        function(expression, wrt, render=fmt.value)
+        return
+
+    import numpy as np
+    from mathcli._utils import load_values, save_values
+
+    values = load_values(values_file)
+    result = function(
+        expression, wrt, as_function=True, backend=backend.value
+    )(**values)
+    # one matrix per set of values
+    result = np.moveaxis(np.asarray(result), -1, 0)
+    rows = result.reshape(len(result), -1)
+
+    if output is not None:
+        save_values(output, rows)
+    elif fmt == Format.json:
+        import json
+
+        typer.echo(json.dumps(result.tolist()))
+    else:
+        np.savetxt(sys.stdout, rows, fmt="%.17g")
+
+
+def values_file_option():
+    return typer.Option(
+        None,
+        help="file with columns of variables values (.csv, .npy, .npz) to evaluate the derivatives at",
+    )
+
+
+def output_option():
+    return typer.Option(
+        None, help="file to save the values computed with --values-file"
+    )
+
+
+def backend_option():
+    return typer.Option(
+        Backend.numpy,
+        help="with --values-file: numpy, or compile the derivatives with auto, c or numba",
+    )
+
+
+@app.command()
+def gradient(
+    expression: List[str] = typer.Argument(None),
+    wrt: str = typer.Option(None, help="variables names, e.g. 'x, y'"),
+    values_file: Optional[Path] = values_file_option(),
+    output: Optional[Path] = output_option(),
+    backend: Backend = backend_option(),
+    fmt: Format = format_option(),
+):
+    """
+        Compute the gradient of an expression: its partial derivatives w.r.t. each variable
+        (or each of the variables passed to --wrt, e.g. 'x, y').
+        With --values-file the gradient is evaluated at each set of values in the file and
+        one row of values is printed for each set (or saved to the file given by --output).
+
+        Arguments:
+            expression: str. Symbolic expression.
+            wrt: str, optional. Variables names separated by commas or spaces
+            values_file: Path, optional. Path to a .csv, .npy or .npz file with variables values
+            output: Path, optional. Path to a .npy or .csv file to save the values to
+            backend: Backend. Backend used to evaluate the derivatives with --values-file
+            fmt: Format. How to show the result: rich, plain or json
+    """
+    matrix_command(
+        "gradient", stitch(expression), wrt, values_file, output, backend, fmt
+    )
+
+
+@app.command()
+def jacobian(
+    expressions: List[str] = typer.Argument(None),
+    wrt: str = typer.Option(None, help="variables names, e.g. 'x, y'"),
+    values_file: Optional[Path] = values_file_option(),
+    output: Optional[Path] = output_option(),
+    backend: Backend = backend_option(),
+    fmt: Format = format_option(),
+):
+    """
+        Compute the Jacobian matrix of several expressions separated by ';' (e.g. 'x*y; x + y'):
+        the partial derivatives of each expression w.r.t. each variable (or each of the variables
+        passed to --wrt). With --values-file the matrix is evaluated at each set of values in the file
+        and one row of values (the matrix' rows one after the other) is printed for each set.
+
+        Arguments:
+            expressions: str. Symbolic expressions separated by ';'
+            wrt: str, optional. Variables names separated by commas or spaces
+            values_file: Path, optional. Path to a .csv, .npy or .npz file with variables values
+            output: Path, optional. Path to a .npy or .csv file to save the values to
+            backend: Backend. Backend used to evaluate the derivatives with --values-file
+            fmt: Format. How to show the result: rich, plain or json
+    """
+    matrix_command(
+        "jacobian", stitch(expressions), wrt, values_file, output, backend, fmt
+    )
+
+
+@app.command()
+def hessian(
+    expression: List[str] = typer.Argument(None),
+    wrt: str = typer.Option(None, help="variables names, e.g. 'x, y'"),
+    values_file: Optional[Path] = values_file_option(),
+    output: Optional[Path] = output_option(),
+    backend: Backend = backend_option(),
+    fmt: Format = format_option(),
+):
+    """
+        Compute the Hessian matrix of an expression: its second order partial derivatives
+        w.r.t. each pair of variables (or of the variables passed to --wrt).
+        With --values-file the matrix is evaluated at each set of values in the file and
+        one row of values (the matrix' rows one after the other) is printed for each set.
+
+        Arguments:
+            expression: str. Symbolic expression.
+            wrt: str, optional. Variables names separated by commas or spaces
+            values_file: Path, optional. Path to a .csv, .npy or .npz file with variables values
+            output: Path, optional. Path to a .npy or .csv file to save the values to
+            backend: Backend. Backend used to evaluate the derivatives with --values-file
+            fmt: Format. How to show the result: rich, plain or json
+    """
+    matrix_command(
+        "hessian", stitch(expression), wrt, values_file, output, backend, fmt
+    )
 
 
 @app.command()
@@ -139,6 +486,31 @@ def solve(
     expression: str,
     solve_for: str = typer.Option(None),
     given: Optional[List[str]] = typer.Option(None),
+    timeout: Optional[float] = typer.Option(
+        None, help="time budget in seconds"
+    ),
+    method: Method = typer.Option(
+        Method.auto,
+        help="solve symbolically, numerically or symbolically falling back to numerically",
+    ),
+    interval: str = typer.Option(
+        "-10, 10", help="interval in which roots are searched numerically"
+    ),
+    all_solutions: bool = typer.Option(
+        False, "--all", help="show all solutions, not just the first one"
+    ),
+    given_file: Optional[Path] = typer.Option(
+        None,
+        help="file with columns of values (.csv, .npy, .npz) of the variables not solving for",
+    ),
+    output: Optional[Path] = typer.Option(
+        None, help="file to save the solutions computed with --given-file"
+    ),
+    backend: Backend = typer.Option(
+        Backend.numpy,
+        help="with --given-file: numpy, or compile the solutions with auto, c or numba",
+    ),
+    fmt: Format = format_option(),
 ):
     """
         Solve an equation.
@@ -153,15 +525,166 @@ def solve(
         name to --solve-for (e.g. '--solve-for 'x''). Also when multiple variables are present, 
         the values of the other variables (not being solved for) can be passed with the 
         optional argument --given (e.g. 'solve '3x + 2y = 1' --solve-for 'x' --given 'y=1').
+        Equations that can't be solved symbolically (or not within --timeout) are solved
+        numerically when the values of all other variables are given, finding the roots
+        in --interval (e.g. --interval '0, 100').
+        Systems of equations are solved by separating the equations with ';' and
+        passing the unknowns to --solve-for (e.g. 'solve "x + y = 3; x - y = 1" --solve-for "x, y"').
+        Use '--given-file' to pass a file with columns of values of the other variables: the
+        equation is solved once, the solutions are compiled and evaluated over the whole
+        columns and one row of solutions is printed for each set of values (or saved to
+        the file given by '--output').
         For more information: https://docs.sympy.org/latest/modules/solvers/solveset.html
         
         Arguments:
             expression: str. Numeric or symbolic expression. Can be an equation. 
-            solve_for: str, optional. Name of the variable to solve for.
+            solve_for: str, optional. Name of the variable to solve for, or names of the
+                unknowns of a system of equations separated by commas
             given: str, optional. Values of variables not solving for (e.g. 'x=1')
+            timeout: float, optional. Time budget in seconds
+            method: Method. auto, symbolic or numeric
+            interval: str. Interval bounds separated by a comma (e.g. '-10, 10')
+            all_solutions: bool. If true all solutions are shown
+            given_file: Path, optional. Path to a .csv, .npy or .npz file with variables values
+            output: Path, optional. Path to a .npy or .csv file to save the solutions to
+            backend: Backend. Backend used to evaluate the solutions with --given-file
+            fmt: Format. How to show the result: rich, plain or json
+    """
+    from mathcli import math
+
+    try:
+        low, high = [float(bound) for bound in interval.split(",")]
+    except ValueError:
+        raise typer.BadParameter(
+            f"expected two numbers separated by a comma, got '{interval}'",
+            param_hint="--interval",
+        )
+
+    if given_file is None:
+        math.solve(
+            stitch(expression),
+            solve_for,
+            timeout=timeout,
+            render=fmt.value,
+            method=method.value,
+            interval=(low, high),
+            all_solutions=all_solutions,
+            **parse_kwargs(given),
+        )
+        return
+
+    import numpy as np
+    from mathcli._utils import save_values
+
+    result = math.solve_batch(
+        stitch(expression),
+        given=given_file,
+        solve_for=solve_for,
+        backend=backend.value,
+        timeout=timeout,
+        method=method.value,
+        interval=(low, high),
+        all_solutions=all_solutions,
+        **parse_kwargs(given),
+    )
+    if output is not None:
+        save_values(output, result)
+    elif fmt == Format.json:
+        import json
+
+        # nan is not valid JSON
+        typer.echo(
+            json.dumps(np.where(np.isnan(result), None, result).tolist())
+        )
+    else:
+        np.savetxt(sys.stdout, np.atleast_1d(result), fmt="%.17g")
+
+
+@app.command()
+def batch(
+    jobs_file: Optional[Path] = typer.Argument(
+        None, help="file with one job per line, reads from stdin if not given"
+    ),
+    operation: str = typer.Option(
+        "calc", help="operation for lines with a plain expression"
+    ),
+    output: Optional[Path] = typer.Option(
+        None, help="file to write the results to, stdout if not given"
+    ),
+    jobs: int = typer.Option(1, help="number of worker processes"),
+    ordered: bool = typer.Option(
+        True, help="write results in the same order as the jobs"
+    ),
+    timeout: Optional[float] = typer.Option(
+        None, help="time budget in seconds for simplify and solve jobs"
+    ),
+):
+    """
+        Process many jobs in a single process.
+        Jobs are read one per line, either as JSON objects like
+        '{"op": "calc", "expression": "3x + y", "values": {"x": 1, "y": 2}}'
+        (with 'op' one of calc, simplify, derivative or solve and fields 'values', 'wrt',
+        'solve_for' and 'given' matching the other commands' arguments) or as plain expressions
+        processed with --operation. Results are written as one JSON object per line as soon as 
+        each job is done. Use --jobs to distribute the jobs across several worker processes.
+
+        Arguments:
+            jobs_file: Path, optional. File with the jobs, if not given jobs are read from stdin
+            operation: str. Operation for lines with a plain expression (default calc)
+            output: Path, optional. File to write the results to, if not given results go to stdout
+            jobs: int. Number of worker processes (default 1)
+            ordered: bool. If false results are written as soon as they're ready, in any order
+            timeout: float, optional. Default time budget in seconds for simplify and solve jobs
     """
-    math.solve(stitch(expression), solve_for, **parse_kwargs(given))
+    import json
+    from mathcli import batch as _batch
+
+    lines = open(jobs_file) if jobs_file is not None else sys.stdin
+    out = open(output, "w") if output is not None else sys.stdout
+    try:
+        for result in _batch.run(
+            _batch.read_jobs(lines, operation, timeout=timeout),
+            n_jobs=jobs,
+            ordered=ordered,
+        ):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    finally:
+        if jobs_file is not None:
+            lines.close()
+        if output is not None:
+            out.close()
+
+
+@app.command()
+def serve(
+    socket: Optional[str] = typer.Option(
+        None, help="path to the daemon's Unix socket"
+    ),
+    stop: bool = typer.Option(False, help="stop the running daemon"),
+):
+    """
+        Start a daemon that keeps sympy loaded and the caches warm.
+        While the daemon is running, other `math` commands are forwarded
+        to it and run much faster. Set MATHCLI_NO_DAEMON=1 to run commands in process.
+
+        Arguments:
+            socket: str, optional. Path to the socket (default ~/.mathcli/mathcli.sock)
+            stop: bool. If true the running daemon is stopped
+    """
+    from mathcli import server
+
+    if stop:
+        if server.stop(socket):
+            typer.echo("Stopped mathcli daemon")
+        else:
+            typer.echo("No mathcli daemon running")
+        return
+
+    server.serve(socket)
 
 
 if __name__ == "__main__":
-    app()
+    from mathcli.client import main as client_main
+
+    client_main()
@@ -0,0 +1,104 @@
+import shutil
+import socket
+import json
+import sys
+import os
+
+from .cache import cache_dir
+
+"""
+    Thin client for the mathcli daemon (see mathcli.server).
+    When the daemon is running, commands are forwarded to it through a
+    Unix socket, avoiding the cost of importing sympy at each invocation.
+    This module only uses the standard library so that forwarding is fast.
+"""
+
+# commands that always run in the calling process
+local_commands = ("serve", "batch")
+
+
+def socket_path():
+    """
+        Path to the daemon's Unix socket, can be
+        set with the MATHCLI_SOCKET environment variable
+    """
+    return os.environ.get("MATHCLI_SOCKET") or str(cache_dir / "mathcli.sock")
+
+
+def send(request, path=None):
+    """
+        Sends a request to the daemon and returns its response.
+
+        Arguments:
+            request: dict. JSON serializable request
+            path: str, optional. Path to the daemon's socket
+
+        Returns:
+            response: dict or None if the daemon is not running
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(str(path or socket_path()))
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            sock.shutdown(socket.SHUT_WR)
+
+            with sock.makefile("rb") as f:
+                response = f.readline()
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+
+    if not response:
+        return None
+    return json.loads(response)
+
+
+def forward(argv, path=None):
+    """
+        Forwards a command to the daemon, if it is running.
+
+        Arguments:
+            argv: list of str. Command line arguments (e.g. ['calc', '1+1'])
+            path: str, optional. Path to the daemon's socket
+
+        Returns:
+            exit_code: int or None if the command couldn't be forwarded
+    """
+    # the command may come after global options (e.g. --profile batch),
+    # running other commands locally too when in doubt is harmless
+    if os.environ.get("MATHCLI_NO_DAEMON") or any(
+        arg in local_commands for arg in argv
+    ):
+        return None
+
+    response = send(
+        dict(
+            argv=argv,
+            cwd=os.getcwd(),
+            color=sys.stdout.isatty(),
+            width=shutil.get_terminal_size().columns,
+        ),
+        path=path,
+    )
+    if response is None:
+        return None
+
+    sys.stdout.write(response["output"])
+    sys.stdout.flush()
+    return response["exit_code"]
+
+
+def main():
+    """
+        Entry point of the `math` command: forwards the command to the daemon
+        when it is running, otherwise runs it in process.
+    """
+    exit_code = forward(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    from mathcli.cli import app
+
+    app(prog_name="math")
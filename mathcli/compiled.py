@@ -0,0 +1,434 @@
+import subprocess
+import tempfile
+import shutil
+import sys
+import os
+
+from ._log import logger
+from .cache import LRUCache, ResultsCache, cache_dir
+from .errors import CompilationError
+from .profiling import stage
+
+"""
+    Compilation of expressions to native code for fast evaluation
+    over large arrays of values (e.g. long parameter sweeps).
+
+    Backends:
+        c:      the expression is printed as C code (sympy.printing.c) in a loop
+                over the arrays, compiled to a shared library with the local C
+                compiler ($CC or cc) and loaded with ctypes.
+        numba:  the expression is printed as Python code and compiled to a
+                numpy ufunc with numba.vectorize, if numba is installed.
+        numpy:  the expression is lambdified with numpy as backend.
+
+    Common subexpressions are eliminated (sympy.cse) before generating
+    code, so that they're computed only once for each set of values.
+    Compiled artifacts are cached on disk in ~/.mathcli/compiled, keyed by
+    the hash of the expression, its variables and the backend, so each
+    expression is only compiled once across processes.
+    With backend 'auto' the first available backend is used, and if
+    compilation fails the expression falls back to numpy.
+"""
+
+backends = ("auto", "c", "numba", "numpy")
+
+compiled_dir = cache_dir / "compiled"
+
+# compiled functions, keyed by the artifact's hash
+compiled = LRUCache(maxsize=256)
+
+# version of the generated code, part of the artifacts' hash
+version = 2
+
+# the generated functions take the values of the arguments and return the values
+# of the expressions as (n arguments x n values) and (n expressions x n values) arrays
+c_template = """#include <math.h>
+
+void mathcli_eval(const double *args, double *out, long n) {{
+    for (long i = 0; i < n; i++) {{
+{arguments}
+{subexpressions}
+{outputs}
+    }}
+}}
+"""
+
+numba_template = """import math
+import numba
+
+
+@numba.njit(cache=True)
+def mathcli_eval(args, out):
+    for i in range(out.shape[1]):
+{arguments}
+{subexpressions}
+{outputs}
+"""
+
+
+def compiler():
+    """
+        Returns the path to the C compiler, or None if not available
+    """
+    return shutil.which(os.environ.get("CC", "cc"))
+
+
+def has_numba():
+    try:
+        import numba  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _arguments(expressions, variables):
+    """
+        Replaces the expressions' variables with generic
+        symbols (_arg0, _arg1...) to avoid clashes with
+        names in the generated code
+    """
+    from sympy import Symbol
+
+    arguments = [Symbol(f"_arg{n}") for n in range(len(variables))]
+    replacements = dict(zip(variables, arguments))
+    return [e.xreplace(replacements) for e in expressions], arguments
+
+
+def _cse(expressions, printer):
+    """
+        Eliminates common subexpressions from a list of expressions,
+        so that they're computed only once.
+
+        Arguments:
+            expressions: list of sympy expressions
+            printer: function printing sympy expressions as code
+
+        Returns:
+            subexpressions: list of (name, code) tuples, in order of evaluation
+            outputs: list of str. Code computing each expression from the subexpressions
+
+        Raises:
+            CompilationError: if the expressions include functions the printer doesn't support
+    """
+    from sympy import cse, numbered_symbols
+
+    replacements, reduced = cse(expressions, symbols=numbered_symbols("_cse"))
+    subexpressions = [(str(s), printer(sub)) for s, sub in replacements]
+    outputs = [printer(e) for e in reduced]
+
+    if any(
+        "Not supported" in code
+        for code in outputs + [sub for _, sub in subexpressions]
+    ):
+        raise CompilationError("", "unsupported functions in expression")
+    return subexpressions, outputs
+
+
+def _vectorize(function, n_args, n_outputs, single=False):
+    """
+        Wraps a function taking a (n arguments x n values) array and
+        returning a (n outputs x n values) array, broadcasting
+        the arguments against each other.
+
+        Returns:
+            function returning an array with shape (n_outputs, *shape), or
+            (*shape) if single is true (a float if all arguments are scalars)
+    """
+    import numpy as np
+
+    def vectorized(*values):
+        if len(values) != n_args:
+            raise ValueError(
+                f"Compiled function takes {n_args} arguments, got {len(values)}"
+            )
+        arrays = np.broadcast_arrays(*[np.asarray(v) for v in values])
+        shape = arrays[0].shape if arrays else ()
+        size = int(np.prod(shape))
+
+        args = np.empty((n_args, size), dtype=np.float64)
+        for n, array in enumerate(arrays):
+            args[n] = array.ravel()
+        result = function(args, size).reshape((n_outputs, *shape))
+
+        if not single:
+            return result
+        result = result[0]
+        return result if result.ndim else float(result)
+
+    return vectorized
+
+
+def compile_c(expressions, variables, path, single=False):
+    """
+        Compiles expressions to a shared library with a C compiler.
+
+        Arguments:
+            expressions: list of sympy expressions
+            variables: list of sympy symbols, the arguments of the function
+            path: Path. Path of the shared library, reused if it exists
+            single: bool. If true the function returns the values of the only expression
+
+        Returns:
+            function evaluating the expressions, see _vectorize
+    """
+    import ctypes
+    import numpy as np
+
+    if not path.exists():
+        from sympy.printing.c import ccode
+
+        cc = compiler()
+        if cc is None:
+            raise CompilationError("c", "no C compiler found")
+
+        expressions, arguments = _arguments(expressions, variables)
+        try:
+            subexpressions, outputs = _cse(
+                expressions, lambda e: ccode(e, standard="C99")
+            )
+        except CompilationError as e:
+            raise CompilationError("c", e.reason)
+        except Exception as e:
+            raise CompilationError("c", f"{type(e).__name__}: {e}")
+
+        source = c_template.format(
+            arguments="\n".join(
+                f"        const double {arg} = args[{n} * n + i];"
+                for n, arg in enumerate(arguments)
+            ),
+            subexpressions="\n".join(
+                f"        const double {name} = {sub};"
+                for name, sub in subexpressions
+            ),
+            outputs="\n".join(
+                f"        out[{n} * n + i] = {code};"
+                for n, code in enumerate(outputs)
+            ),
+        )
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=path.parent) as tmp:
+            src = os.path.join(tmp, "expression.c")
+            lib = os.path.join(tmp, path.name)
+            with open(src, "w") as f:
+                f.write(source)
+
+            compilation = subprocess.run(
+                [cc, "-O3", "-shared", "-fPIC", "-o", lib, src, "-lm"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+            )
+            if compilation.returncode != 0:
+                raise CompilationError("c", compilation.stdout)
+
+            # atomic, in case other processes compile the same expression
+            os.replace(lib, path)
+        logger.debug(f"COMPILED expression to {path}")
+
+    library = ctypes.CDLL(str(path))
+    library.mathcli_eval.restype = None
+    library.mathcli_eval.argtypes = [
+        ctypes.POINTER(ctypes.c_double),
+        ctypes.POINTER(ctypes.c_double),
+        ctypes.c_long,
+    ]
+    double_p = ctypes.POINTER(ctypes.c_double)
+
+    def function(args, size):
+        out = np.empty((len(expressions), size), dtype=np.float64)
+        library.mathcli_eval(
+            args.ctypes.data_as(double_p), out.ctypes.data_as(double_p), size
+        )
+        return out
+
+    # keep a reference to the library for as long as the function is used
+    function.library = library
+    return _vectorize(
+        function, len(variables), len(expressions), single=single
+    )
+
+
+def compile_numba(expressions, variables, path, single=False):
+    """
+        Compiles expressions to a loop over arrays of values with numba.
+
+        Arguments:
+            expressions: list of sympy expressions
+            variables: list of sympy symbols, the arguments of the function
+            path: Path. Path of the generated python module, reused if it exists
+            single: bool. If true the function returns the values of the only expression
+
+        Returns:
+            function evaluating the expressions, see _vectorize
+    """
+    import importlib.util
+    import numpy as np
+
+    if not has_numba():
+        raise CompilationError("numba", "numba is not installed")
+
+    if not path.exists():
+        from sympy.printing.pycode import pycode
+
+        expressions, arguments = _arguments(expressions, variables)
+        try:
+            subexpressions, outputs = _cse(
+                expressions, lambda e: pycode(e, fully_qualified_modules=True)
+            )
+        except CompilationError as e:
+            raise CompilationError("numba", e.reason)
+
+        source = numba_template.format(
+            arguments="\n".join(
+                f"        {arg} = args[{n}, i]"
+                for n, arg in enumerate(arguments)
+            ),
+            subexpressions="\n".join(
+                f"        {name} = {sub}" for name, sub in subexpressions
+            ),
+            outputs="\n".join(
+                f"        out[{n}, i] = {code}"
+                for n, code in enumerate(outputs)
+            ),
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(source)
+        os.replace(tmp, path)
+
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    # numba's cache looks the module up by name
+    sys.modules[spec.name] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception as e:
+        raise CompilationError("numba", f"{type(e).__name__}: {e}")
+
+    def function(args, size):
+        out = np.empty((len(expressions), size), dtype=np.float64)
+        try:
+            module.mathcli_eval(args, out)
+        except Exception as e:
+            # numba compiles the function on first call
+            raise CompilationError("numba", f"{type(e).__name__}: {e}")
+        return out
+
+    return _vectorize(
+        function, len(variables), len(expressions), single=single
+    )
+
+
+def compile_numpy(expressions, variables, single=False):
+    """
+        Lambdifies expressions with numpy as backend
+    """
+    import numpy as np
+    from .expression import get_lambda_function
+
+    if len(expressions) == 1:
+        lambda_function = get_lambda_function(expressions[0], variables)
+    else:
+        # a single function, sharing subexpressions across expressions
+        lambda_function = get_lambda_function(expressions, variables)
+
+    def function(args, size):
+        values = lambda_function(*args)
+        if len(expressions) == 1:
+            values = [values]
+        values = np.array([np.broadcast_to(v, size) for v in values])
+        if np.iscomplexobj(values):
+            # complex values are nan, unless the imaginary part is negligible
+            real = np.abs(values.imag) <= 1e-12 * np.maximum(
+                np.abs(values.real), 1
+            )
+            values = np.where(real, values.real, np.nan)
+        return values.astype(float)
+
+    return _vectorize(
+        function, len(variables), len(expressions), single=single
+    )
+
+
+def get_compiled_function(expression, variables, backend="auto"):
+    """
+        Compiles an expression to a function evaluating it over arrays of values.
+        Compiled functions are cached in memory and their artifacts on disk.
+
+        Arguments:
+            expression: sympy expression, or list of sympy expressions (e.g. the
+                entries of a matrix) evaluated together, sharing common subexpressions
+            variables: list of sympy symbols, the arguments of the function
+            backend: str. One of 'auto', 'c', 'numba' or 'numpy'. If the backend
+                is not available (e.g. there's no C compiler) the numpy backend is used
+
+        Returns:
+            function taking an array (or scalar) for each variable, broadcasting
+            them against each other and returning an array of values. For a list
+            of expressions, the array has an extra first dimension with one entry
+            for each expression.
+
+        Raises:
+            ValueError: if the backend is not recognized
+    """
+    if backend not in backends:
+        raise ValueError(
+            f"Unrecognized backend: {backend}, should be one of {backends}"
+        )
+
+    from sympy import sympify
+
+    single = not isinstance(expression, (list, tuple))
+    expressions = [
+        sympify(e) for e in ([expression] if single else expression)
+    ]
+
+    if backend == "auto":
+        candidates = ["c", "numba"]
+    elif backend == "numpy":
+        candidates = []
+    else:
+        candidates = [backend]
+
+    for candidate in candidates:
+        key = ResultsCache.key(
+            f"compile_{candidate}",
+            expressions,
+            variables=[str(var) for var in variables],
+            single=single,
+            version=version,
+        )
+        function = compiled.get(key)
+        if function is not None:
+            return function
+
+        try:
+            with stage("compile"):
+                if candidate == "c":
+                    function = compile_c(
+                        expressions,
+                        variables,
+                        compiled_dir / f"{key}.so",
+                        single=single,
+                    )
+                else:
+                    function = compile_numba(
+                        expressions,
+                        variables,
+                        compiled_dir / f"mc_{key}.py",
+                        single=single,
+                    )
+        except CompilationError as e:
+            logger.debug(f"COMPILE {e}")
+            if backend == "auto":
+                continue
+
+            # warn only once for each expression
+            logger.warning(f"{e}, falling back to numpy")
+            function = compile_numpy(expressions, variables, single=single)
+
+        compiled.set(key, function)
+        return function
+
+    return compile_numpy(expressions, variables, single=single)
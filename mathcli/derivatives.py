@@ -0,0 +1,165 @@
+from sympy import Matrix, hessian as sympy_hessian
+
+from .expression import Expression
+
+"""
+    Matrices of partial derivatives (gradient, Jacobian and Hessian)
+    of one or several expressions w.r.t. several variables.
+    All partial derivatives are computed in one pass and the matrices
+    can be compiled to a single function evaluating every entry at
+    many points at once, with the subexpressions shared by different
+    entries computed only once (see mathcli.compiled).
+"""
+
+
+def parse_expressions(expressions):
+    """
+        Parses one or several expressions.
+
+        Arguments:
+            expressions: str, list. Either a list of expressions (strings, sympy
+                expressions or Expression) or a string with expressions separated by ';'
+
+        Returns:
+            list of Expression
+    """
+    if isinstance(expressions, str):
+        expressions = [e for e in expressions.split(";") if e.strip()]
+    elif not isinstance(expressions, (list, tuple)):
+        expressions = [expressions]
+    return [
+        e if isinstance(e, Expression) else Expression(e) for e in expressions
+    ]
+
+
+def parse_wrt(wrt, expressions):
+    """
+        Returns the variables to differentiate with respect to.
+
+        Arguments:
+            wrt: str, list, optional. List of variables names or a string with names
+                separated by commas or spaces (e.g. 'x, y'). If not given all the
+                variables in the expressions are used, sorted by name
+            expressions: list of Expression
+
+        Returns:
+            list of sympy symbols
+    """
+    variables = {str(var): var for e in expressions for var in e.variables}
+    if not wrt:
+        return [variables[name] for name in sorted(variables)]
+
+    if isinstance(wrt, str):
+        wrt = wrt.replace(",", " ").split()
+
+    from sympy import Symbol
+
+    return [variables.get(str(name), Symbol(str(name))) for name in wrt]
+
+
+def jacobian_matrix(expressions, wrt=None):
+    """
+        Computes the Jacobian matrix of a list of expressions.
+
+        Arguments:
+            expressions: str, list. Expressions, see parse_expressions
+            wrt: str, list, optional. Variables, see parse_wrt
+
+        Returns:
+            matrix: sympy.Matrix with a row for each expression and a column for each variable
+            variables: list of sympy symbols
+    """
+    expressions = parse_expressions(expressions)
+    variables = parse_wrt(wrt, expressions)
+
+    functions = Matrix([e.evaluated_expression for e in expressions])
+    return functions.jacobian(variables), variables
+
+
+def gradient_matrix(expression, wrt=None):
+    """
+        Computes the gradient of an expression.
+
+        Arguments:
+            expression: str, sympy expression.
+            wrt: str, list, optional. Variables, see parse_wrt
+
+        Returns:
+            matrix: sympy.Matrix with a single row
+            variables: list of sympy symbols
+    """
+    return jacobian_matrix([expression], wrt=wrt)
+
+
+def hessian_matrix(expression, wrt=None):
+    """
+        Computes the Hessian matrix of an expression.
+
+        Arguments:
+            expression: str, sympy expression.
+            wrt: str, list, optional. Variables, see parse_wrt
+
+        Returns:
+            matrix: sympy.Matrix with a row and a column for each variable
+            variables: list of sympy symbols
+    """
+    expressions = parse_expressions([expression])
+    variables = parse_wrt(wrt, expressions)
+    return (
+        sympy_hessian(expressions[0].evaluated_expression, variables),
+        variables,
+    )
+
+
+def matrix_function(matrix, variables, backend="numpy"):
+    """
+        Compiles a matrix of expressions to a single function
+        evaluating all of its entries over arrays of values.
+
+        Arguments:
+            matrix: sympy.Matrix
+            variables: list of sympy symbols. The variables in the matrix' entries
+            backend: str. One of 'auto', 'c', 'numba' or 'numpy', see mathcli.compiled
+
+        Returns:
+            function taking the variables values as keyword arguments (arrays or scalars,
+            broadcasted against each other) and returning an array with shape
+            (rows, columns, *values shape). Values are needed for the variables and the
+            other variables in the matrix' entries. It raises a ValueError if values are
+            missing or given for unknown variables.
+    """
+    import numpy as np
+    from .compiled import get_compiled_function
+
+    # the matrix' entries may not depend on all the variables
+    arguments = sorted(
+        {var for entry in matrix for var in entry.free_symbols}, key=str
+    )
+    function = get_compiled_function(list(matrix), arguments, backend=backend)
+    rows, columns = matrix.shape
+    # the entries may also depend on variables not differentiated w.r.t.
+    names = [str(var) for var in variables]
+    names += [str(var) for var in arguments if str(var) not in names]
+
+    def evaluate(**values):
+        missing = [name for name in names if name not in values]
+        unknown = [name for name in values if name not in names]
+        if missing or unknown:
+            raise ValueError(
+                f"Expected values for the variables {names}, got values for {list(values)}"
+            )
+
+        result = function(*[values[str(var)] for var in arguments])
+
+        # entries are only as large as the values of the variables
+        # they depend on (e.g. constants), broadcast them to all values
+        shape = np.broadcast_shapes(*[np.shape(v) for v in values.values()])
+        padding = (1,) * (len(shape) - result.ndim + 1)
+        result = np.broadcast_to(
+            result.reshape((len(matrix), *padding, *result.shape[1:])),
+            (len(matrix), *shape),
+        )
+        return result.reshape((rows, columns, *shape))
+
+    evaluate.variables = names
+    return evaluate
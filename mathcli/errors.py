@@ -33,3 +33,40 @@ class DerivativeArgumentsNumberError(ValueError):
 
     def __str__(self):
         return self.message
+
+
+class OperationTimeoutError(TimeoutError):
+    """
+        An operation didn't complete within its time budget
+    """
+
+    def __init__(self, operation, timeout):
+        self.operation = operation
+        self.timeout = timeout
+        self.message = f"{operation} didn't complete within {timeout} seconds"
+
+    def __str__(self):
+        return self.message
+
+    def __reduce__(self):
+        return (OperationTimeoutError, (self.operation, self.timeout))
+
+
+class CompilationError(RuntimeError):
+    """
+        An expression couldn't be compiled with a backend
+        (e.g. no C compiler is available)
+    """
+
+    def __init__(self, backend, reason):
+        self.backend = backend
+        self.reason = reason
+        self.message = (
+            f"Failed to compile with the {backend} backend: {reason}"
+        )
+
+    def __str__(self):
+        return self.message
+
+    def __reduce__(self):
+        return (CompilationError, (self.backend, self.reason))
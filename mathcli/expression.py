@@ -1,5 +1,9 @@
 from sympy.parsing.sympy_parser import parse_expr
-from sympy import latex, lambdify, Derivative, preview, Eq
+from functools import cached_property
+from collections import namedtuple
+import time
+from contextlib import contextmanager
+from sympy import latex, lambdify, Derivative, Eq, srepr, sympify
 from sympy.parsing.sympy_parser import (
     function_exponentiation,
     standard_transformations,
@@ -7,14 +11,26 @@ from sympy.parsing.sympy_parser import (
     implicit_multiplication_application,
     convert_equals_signs,
 )
-from sympy import simplify as simp
-from sympy.parsing.latex import parse_latex
+from sympy import simplify as simp, expand, cancel
 
-from loguru import logger
+from ._log import logger
 
-from .errors import DerivativeArgumentsNumberError, ArgumentsNumberError
+from .errors import (
+    DerivativeArgumentsNumberError,
+    ArgumentsNumberError,
+    OperationTimeoutError,
+)
 from ._utils import is_number
-from mathcli import _unicode
+from .cache import LRUCache, results
+from .profiling import stage
+from .serialization import dumps, loads
+
+# lambdified functions, keyed by the expression's srepr and variables names
+lambdified = LRUCache(maxsize=512)
+
+# expressions with some of their variables bound to values, keyed
+# by the expression's string and the values, see Expression.bind
+bound = LRUCache(maxsize=512)
 
 
 def clean(expr):
@@ -28,8 +44,20 @@ def clean(expr):
     return expr
 
 
+transformations = standard_transformations + (
+    function_exponentiation,
+    implicit_multiplication_application,
+    implicit_application,
+    convert_equals_signs,
+)
+
+# parsed expressions, keyed by string and evaluate
+parsed = LRUCache(maxsize=2048)
+
+
 def parse(expr, evaluate=True):
-    """ wraps around sympy.parse_expr to give more control and add transformations
+    """ wraps around sympy.parse_expr to give more control and add transformations.
+        Parsed expressions are cached so that each string is only parsed once.
     
         Arguments:
             expr: string, expression
@@ -38,20 +66,279 @@ def parse(expr, evaluate=True):
     if not isinstance(expr, str):
         return expr
 
-    transformations = standard_transformations + (
-        function_exponentiation,
-        implicit_multiplication_application,
-        implicit_application,
-        convert_equals_signs,
-    )
+    key = (expr, evaluate)
+    expression = parsed.get(key)
+    if expression is not None:
+        return expression
 
     try:
-        return parse_expr(
-            expr, transformations=transformations, evaluate=evaluate
-        )
+        with stage("parse"):
+            expression = parse_expr(
+                expr, transformations=transformations, evaluate=evaluate
+            )
     except SyntaxError as e:
         raise ValueError(f"Failed to parse expression: {expr}: {e}")
 
+    parsed.set(key, expression)
+    return expression
+
+
+def _lambdify_modules(modules):
+    """
+        Returns the modules to lambdify an expression with and a function to prepare
+        the expression for them, for the modules names used by get_lambda_function
+    """
+    if modules == "numpy":
+        return modules, lambda expression: expression
+    elif modules == "mpmath":
+        # evaluate numbers (e.g. 1/3 as a Rational, not python's 1/3)
+        return modules, lambda expression: expression.doit()
+
+    import mpmath
+    from sympy import Float, Rational
+
+    # mpmath functions and constants with an interval version
+    namespace = {
+        name: getattr(mpmath.iv, name)
+        for name in dir(mpmath)
+        if not name.startswith("_") and hasattr(mpmath.iv, name)
+    }
+
+    def prepare(expression):
+        # intervals can't be created from binary floats, use exact decimals
+        expression = expression.doit()
+        return expression.xreplace(
+            {f: Rational(str(f)) for f in expression.atoms(Float)}
+        )
+
+    return [namespace, "mpmath"], prepare
+
+
+def get_lambda_function(expression, variables, modules="numpy"):
+    """
+        Lambdifies a sympy expression with numpy as backend, after common
+        subexpressions elimination (e.g. exp(2*x) in exp(2*x) + x*exp(2*x)
+        is computed once). The lambda functions are cached so that code
+        generation only happens once for each expression and set of variables.
+
+        Arguments:
+            expression: sympy expression
+            variables: list of sympy symbols, the arguments of the lambda function
+            modules: str. 'numpy', 'mpmath' for arbitrary precision or 'mpmath.iv'
+                for interval arithmetic (with mpmath.iv's functions)
+
+        Returns:
+            the lambda function
+    """
+    key = (
+        srepr(expression),
+        tuple(str(var) for var in variables),
+        modules,
+    )
+    lambda_function = lambdified.get(key)
+
+    if lambda_function is None:
+        modules, prepare = _lambdify_modules(modules)
+        with stage("lambdify"):
+            # with cse shared subexpressions are computed only once
+            lambda_function = lambdify(
+                variables, prepare(expression), modules=modules, cse=True
+            )
+        lambdified.set(key, lambda_function)
+    return lambda_function
+
+
+# max number of times the working precision is doubled to get tight intervals
+max_precision_doublings = 6
+
+
+def _interval_digits(interval):
+    """
+        Returns the number of significant digits on which
+        the bounds of an mpmath interval agree
+    """
+    import mpmath
+
+    if not hasattr(interval, "_mpi_"):
+        # not an interval, e.g. a complex interval
+        return float("inf")
+
+    width = mpmath.mpf(interval.delta.b)
+    size = max(abs(mpmath.mpf(interval.a.a)), abs(mpmath.mpf(interval.b.b)))
+    if width == 0 or not mpmath.isfinite(width):
+        # exact, or unbounded at any precision (e.g. at a pole)
+        return float("inf")
+    return float(-mpmath.log10(width / size))
+
+
+@contextmanager
+def working_precision(context, dps):
+    """
+        Sets the working precision (in decimal digits)
+        of an mpmath context (mpmath.mp or mpmath.iv)
+    """
+    previous = context.dps
+    context.dps = dps
+    try:
+        yield context
+    finally:
+        context.dps = previous
+
+
+# simplification tiers, from the most thorough to the cheapest, and
+# the strategy used by each of them, see Expression.simplify
+simplify_tiers = dict(
+    full="simplify",
+    trig="trigsimp/together/cancel",
+    rational="together/cancel",
+)
+
+# expressions up to small_max_nodes, or up to full_max_nodes and with a
+# low enough polynomial degree, are simplified with sympy's simplify, up
+# to trig_max_nodes with the 'trig' tier and with the 'rational' tier beyond that
+small_max_nodes = 50
+full_max_nodes = 150
+full_max_degree = 12
+trig_max_nodes = 500
+
+# fraction of the time budget of Expression.simplify
+# kept for the fallback to expand and cancel
+fallback_budget = 0.25
+
+# size of an expression: number of nodes in its tree, number of
+# operations (nodes which aren't atoms) and estimated polynomial degree
+Complexity = namedtuple("Complexity", ["nodes", "operations", "degree"])
+
+
+def _degree(expression, degrees):
+    """
+        Estimates the polynomial degree of an expression from
+        the degrees of its arguments (e.g. 2 for x y + 1)
+    """
+    args = [degrees[arg] for arg in expression.args]
+    if expression.is_Symbol:
+        return 1
+    elif expression.is_Atom:
+        return 0
+    elif expression.is_Mul:
+        return sum(args)
+    elif expression.is_Pow:
+        base, exp = args
+        if expression.exp.is_Integer:
+            # 1/x^n counts as degree n
+            return base * abs(int(expression.exp))
+        return max(base, min(exp, 1))
+    elif expression.is_Add or expression.is_Relational:
+        return max(args)
+    # functions (e.g. sin(x^2)) count as a variable
+    return min(max(args, default=0), 1)
+
+
+def complexity(expression):
+    """
+        Cheap estimate of how large an expression is, with a single walk of its tree.
+
+        Arguments:
+            expression: sympy expression
+
+        Returns:
+            Complexity
+    """
+    from sympy import postorder_traversal
+
+    degrees, nodes, operations = {}, 0, 0
+    for node in postorder_traversal(expression):
+        nodes += 1
+        operations += not node.is_Atom
+        if node not in degrees:
+            degrees[node] = _degree(node, degrees)
+    return Complexity(nodes, operations, degrees[expression])
+
+
+@results.cached("simplify")
+def simplified(expression):
+    """
+        Simplifies a sympy expression, results are
+        cached on disk across processes.
+
+        Arguments:
+            expression: sympy expression
+
+        Returns:
+            the simplified expression, serialized (see mathcli.serialization)
+    """
+    return dumps(simp(expression))
+
+
+def _on_sides(function, expression):
+    """
+        Applies a function to an expression, or to both sides of an equation
+    """
+    if isinstance(expression, Eq):
+        return Eq(
+            function(expression.lhs), function(expression.rhs), evaluate=False
+        )
+    return function(expression)
+
+
+@results.cached("quick_simplify")
+def quick_simplified(expression):
+    """
+        Cheap simplification of a sympy expression with expand and cancel,
+        used when sympy's simplify takes too long.
+
+        Arguments:
+            expression: sympy expression
+
+        Returns:
+            the simplified expression, serialized (see mathcli.serialization)
+    """
+    return dumps(_on_sides(lambda e: cancel(expand(e)), expression))
+
+
+@results.cached("simplify_tier")
+def tier_simplified(expression, tier="rational"):
+    """
+        Simplifies a sympy expression with the cheaper strategies used instead
+        of sympy's simplify for large expressions, see Expression.simplify.
+
+        Arguments:
+            expression: sympy expression
+            tier: str. 'rational' to combine fractions (together) and cancel common
+                factors in each term, 'trig' to simplify trigonometric functions first (trigsimp)
+
+        Returns:
+            the simplified expression, serialized (see mathcli.serialization)
+    """
+    from sympy import Add, together, trigsimp
+    from sympy.functions.elementary.trigonometric import TrigonometricFunction
+
+    def simplify(expression):
+        if tier == "trig" and expression.has(TrigonometricFunction):
+            expression = trigsimp(expression)
+        # term by term: putting a whole sum over a common
+        # denominator is what makes cancel slow for large sums
+        return Add(
+            *[cancel(together(term)) for term in Add.make_args(expression)]
+        )
+
+    return dumps(_on_sides(simplify, expression))
+
+
+@results.cached("doit")
+def evaluated(expression):
+    """
+        Evaluates unevaluated objects (e.g. derivatives) in a sympy
+        expression, results are cached on disk across processes.
+
+        Arguments:
+            expression: sympy expression
+
+        Returns:
+            the evaluated expression, serialized (see mathcli.serialization)
+    """
+    return dumps(expression.doit())
+
 
 # ---------------------------------------------------------------------------- #
 #                               ExpressionString                               #
@@ -71,7 +358,6 @@ class ExpressionString(object):
         self.string = clean(expression)
         self.expression = None
         self.result = ""
-        self.variables = []
 
     def __str__(self):
         return self.unicode
@@ -88,6 +374,8 @@ class ExpressionString(object):
             Parses an expression given by a string with
             latex format and creates a new instance of Expression for it
         """
+        from sympy.parsing.latex import parse_latex
+
         return cls(parse_latex(latex_expression))
 
     @property
@@ -101,63 +389,26 @@ class ExpressionString(object):
             expr = self.expression
         return "$$" + latex(expr) + "$$"
 
-    @property
+    @cached_property
     def unicode(self):
         """
-            Convert the latex form of the expression to unicode symbols,
-            see: https://github.com/svenkreiss/unicodeit
+            Convert the expression to a string with unicode symbols
+            (e.g. 'x² +√y'), see mathcli._unicode.
+            The unicode string is computed on first access.
         """
-        if not self.is_eq:
-            ltx = _unicode.clean_latex(latex(self.expression))
-        else:
-            ltx = (
-                _unicode.clean_latex(latex(self.expression.lhs))
-                + "="
-                + _unicode.clean_latex(latex(self.expression.rhs))
-            )
+        with stage("unicode"):
+            return self._to_unicode()
 
-        if self.is_derivative:
-            # clean up the latex for derivative expressions
-            try:
-                delta, expr = ltx.split("}(")
-            except ValueError:
-                # the derivative argument is not bounded by {}
-                idx = ltx.rfind("}")
-                delta = ltx[:idx]
-                expr = ltx[idx + 1 :] + "}"
-            ltx = delta + "} [" + expr[:-1].strip() + "] "
-
-        # parse exponentials
-        ltx = _unicode.parse_exponents(ltx)
-
-        # split based on latex's \\frac and clean them up
-        out = []
-        for frac in ltx.split("\\frac"):
-            if not frac:
-                continue
-            if "}{" in frac:
-                out.append(_unicode.parse_frac(frac))
-            else:
-                out.append(_unicode.to_unicode(frac))
-
-        if self.is_derivative:
-            out[0] = _unicode.parse_derivation(
-                out[0]
-            )  # clean up derivation symbols
+    def _to_unicode(self):
+        from mathcli._unicode import to_unicode
 
-        if self.is_eq:
-            l, r = "".join(out).split("=")
-            out = [l + "="]
-
-            r = _unicode.replace_in_string(r, r.find("("), "")
-            r = _unicode.replace_in_string(r, r.rfind(")"), "")
-            out.append(r)
-        out = "".join(out).replace("  ", " ")
-
-        logger.log(
-            "EXPRESSION", "To  UNICODE: " + out,
-        )
+        if self.expression is None:
+            expression = parse(self.string, evaluate=False)
+        else:
+            expression = self.expression
+        out = to_unicode(expression)
 
+        logger.log("EXPRESSION", "To  UNICODE: {}", out)
         return out
 
     def to_image(self, filepath, transparent_bg=False):
@@ -168,6 +419,8 @@ class ExpressionString(object):
                 filepath: str, Path. Path to where the image file will be saved
                 transparent_bg: bool. If true the image will have a transparent background
         """
+        from sympy import preview
+
         options = ["-T", "tight", "-z", "0", "--truecolor", "-D 1200"]
         if transparent_bg:
             options.extend(["-bg", "Transparent"])
@@ -210,14 +463,145 @@ class Expression(ExpressionString):
         self.is_derivative = isinstance(self.expression, Derivative)
         self.is_eq = isinstance(self.expression, Eq)
 
-        logger.log(
+        # unicode, value and variables are computed lazily when first used
+        logger.opt(lazy=True).log(
             "EXPRESSION",
-            f"\nCreated: {self.unicode} from string {expression}.\nIs derivative: {self.is_derivative}\nIs eq: {self.is_eq}",
+            "\nCreated: {} from string {}.\nIs derivative: {}\nIs eq: {}",
+            lambda: self.unicode,
+            lambda: expression,
+            lambda: self.is_derivative,
+            lambda: self.is_eq,
         )
-        self.eval()
 
-        # get variabls in the expression
-        self.get_variables()
+    def dumps(self):
+        """
+            Serializes the (parsed) expression, see mathcli.serialization.
+            Expression.loads creates an Expression from it without parsing.
+
+            Returns:
+                str
+        """
+        return dumps(self.expression)
+
+    @classmethod
+    def loads(cls, data):
+        """
+            Creates an Expression from a serialized expression, see Expression.dumps
+
+            Arguments:
+                data: str. Serialized expression
+
+            Raises:
+                ValueError: if the data is not a serialized expression
+        """
+        return cls(loads(data))
+
+    @cached_property
+    def evaluated_expression(self):
+        """
+            The sympy expression with derivatives evaluated
+        """
+        if self.is_derivative:
+            return self.expression.doit()
+        return self.expression
+
+    @cached_property
+    def value(self):
+        """
+            Numerical value of the expression, see eval
+        """
+        return self.eval()
+
+    @property
+    def is_solved(self):
+        """
+            True if the expression's value is a number
+        """
+        return is_number(self.value)
+
+    @cached_property
+    def variables(self):
+        """
+            The expression's variables, sorted by name
+        """
+        return self.get_variables()
+
+    @property
+    def n_variables(self):
+        return len(self.variables)
+
+    @cached_property
+    def complexity(self):
+        """
+            Size of the expression: nodes, operations and
+            polynomial degree, see mathcli.expression.complexity
+        """
+        return complexity(self.expression)
+
+    @property
+    def simplify_tier(self):
+        """
+            The simplification tier used for the expression given its
+            complexity: 'full', 'trig' or 'rational', see simplify
+        """
+        nodes, _, degree = self.complexity
+        if nodes <= small_max_nodes or (
+            nodes <= full_max_nodes and degree <= full_max_degree
+        ):
+            return "full"
+        elif nodes <= trig_max_nodes:
+            return "trig"
+        return "rational"
+
+    @cached_property
+    def function(self):
+        """
+            The (evaluated) expression lambdified with numpy as backend,
+            with the variables as arguments, see get_lambda_function
+        """
+        return get_lambda_function(self.evaluated_expression, self.variables)
+
+    def bind(self, **values):
+        """
+            Partially evaluates the expression, binding some of its variables to values
+            (e.g. 'x y + y^2' with y=2 gives '2x + 4'). Bound expressions are cached
+            by expression and values, and they keep their lambda function: evaluating
+            an expression for many values of a variable with the other ones fixed
+            only substitutes the fixed values and lambdifies the result once.
+
+            Arguments:
+                values: variable number of kwargs with numeric values of some of the variables (e.g. y=1)
+
+            Returns:
+                a new Expression, with the remaining variables
+
+            Raises:
+                ValueError: if some of the values are not for variables of the expression
+        """
+        variables = {str(var): var for var in self.variables}
+        unknown = [name for name in values if name not in variables]
+        if unknown:
+            raise ValueError(
+                f"Can't bind {unknown}, the expression's variables are: {list(variables)}"
+            )
+
+        # numpy scalars as python numbers, so that they can be hashed
+        values = {
+            k: v.item() if hasattr(v, "item") else v for k, v in values.items()
+        }
+        key = (self.string, tuple(sorted(values.items())))
+        expression = bound.get(key)
+        if expression is None:
+            logger.log("EXPRESSION", "{} - bind. Values: {}", self, values)
+            with stage("bind"):
+                # rebuilding the tree evaluates the nodes with bound values
+                expression = Expression(
+                    self.evaluated_expression.xreplace(
+                        {variables[k]: sympify(v) for k, v in values.items()}
+                    )
+                )
+            bound.set(key, expression)
+        return expression
 
     def derivative(self, wrt):
         """
@@ -236,7 +620,7 @@ class Expression(ExpressionString):
             Raises:
                 DerivativeArgumentsNumberError if the number of variable >2 and wrt is not specified
         """
-        logger.log("EXPRESSION", f"{self} - derivative. Wrt: {wrt}")
+        logger.log("EXPRESSION", "{} - derivative. Wrt: {}", self, wrt)
         wrt = wrt or ""
 
         try:
@@ -248,33 +632,101 @@ class Expression(ExpressionString):
 
         return expr
 
-    def simplify(self):
+    def simplify(self, timeout=None, fallback=True, tier="auto"):
         """
-            Simplify the expression, returns a  new instance of Expression
+            Simplify the expression, returns a  new instance of Expression whose `tier`,
+            `strategy` and `timed_out` attributes record how the expression was simplified
+            (the strategy is 'none' if the expression was left as it is).
             For more information about simplification: https://docs.sympy.org/latest/tutorial/simplification.html
+
+            Arguments:
+                timeout: float, optional. Time budget in seconds for the simplification,
+                    including the fallback (a fraction fallback_budget of it is kept for the fallback)
+                fallback: bool. If true and the simplification doesn't complete in time, the
+                    expression is simplified with the cheaper expand and cancel instead (or
+                    left as it is if that doesn't complete in time or gives a longer expression)
+                tier: str. 'full' for sympy's simplify, 'trig' for trigsimp, together and cancel,
+                    'rational' for together and cancel only or 'auto' to choose the tier from
+                    the expression's complexity (see simplify_tier)
+
+            Raises:
+                ValueError: if the tier is not valid
+                OperationTimeoutError: if the simplification doesn't complete in time and fallback is false
         """
-        logger.log("EXPRESSION", (f"{self} - simplify"))
-        return Expression(str(simp(self.expression)))
+        if tier == "auto":
+            tier = self.simplify_tier
+        elif tier not in simplify_tiers:
+            raise ValueError(
+                f"Invalid simplification tier: {tier}, expected one of: auto, {', '.join(simplify_tiers)}"
+            )
+        logger.log("EXPRESSION", "{} - simplify ({} tier)", self, tier)
+
+        # part of the time budget is kept for the fallback
+        budget = timeout
+        if timeout is not None and fallback:
+            budget = timeout * (1 - fallback_budget)
+
+        start = time.perf_counter()
+        try:
+            if tier == "full":
+                result = simplified(self.expression, timeout=budget)
+            else:
+                result = tier_simplified(
+                    self.expression, timeout=budget, tier=tier
+                )
+            expression = Expression.loads(result)
+            expression.strategy = simplify_tiers[tier]
+
+            if tier != "full" and len(str(expression.expression)) > len(
+                str(self.expression)
+            ):
+                # cancel expands products and powers (e.g. (x + 1)^13), if
+                # the cheaper strategies didn't help keep the expression as it is
+                expression = Expression(self.expression)
+                expression.strategy = "none"
+            expression.timed_out = False
+        except OperationTimeoutError:
+            if not fallback:
+                raise
+            logger.warning(
+                f"{simplify_tiers[tier]} didn't complete within {budget:.3g} seconds, falling back to expand and cancel"
+            )
+            # the fallback only gets what's left of the time budget
+            remaining = max(timeout - (time.perf_counter() - start), 0)
+            try:
+                result = loads(
+                    quick_simplified(self.expression, timeout=remaining)
+                )
+            except OperationTimeoutError:
+                result = None
+
+            if result is None or len(str(result)) > len(str(self.expression)):
+                # expand and cancel didn't help, keep the expression as it is
+                expression = Expression(self.expression)
+                expression.strategy = "none"
+            else:
+                expression = Expression(result)
+                expression.strategy = "expand/cancel"
+            expression.timed_out = True
+        expression.tier = tier
+        return expression
 
     def eval(self):
         """
             Evaluate the expression.
             If expression is numerical it can be solved completely and
-            self.value is a number, otherwise self.value is a symbolic
+            the value is a number, otherwise the value is a symbolic
             expression and the expression can be fully solved only
             when the values for the variables are passed.
+
+            Returns:
+                value: number, sympy expression or str if evalf fails.
         """
         try:
-            self.value = self.expression.evalf()
-        except TypeError:
-            self.value = "couldnt evalf"
-
-        if is_number(self.value):
-            # numeric expression completely evalued
-            self.is_solved = True
-        else:
-            # it's a symbolic expression, will need to be value
-            self.is_solved = False
+            with stage("eval"):
+                return self.expression.evalf()
+        except (TypeError, AttributeError):
+            return "couldnt evalf"
 
     def calc(self, **values):
         """
@@ -293,26 +745,18 @@ class Expression(ExpressionString):
                 ArgumentsNumberError: if the number of variable values specified doesn't match
                     the number of values in the expression.
         """
-        logger.log("EXPRESSION", f"{self} - solve. Values: {values}")
+        logger.log("EXPRESSION", "{} - solve. Values: {}", self, values)
 
         # Check that we have the correct number of variables
         if len(values) != self.n_variables:
             raise ArgumentsNumberError(self, **values)
 
-        # turn the expression into a lambda function
-        # but first check if its a derivative
-        if self.is_derivative:
-            expression = self.expression.doit()
-        else:
-            expression = self.expression
-
+        # turn the (evaluated) expression into a lambda function
         try:
-            lambda_function = lambdify(
-                self.variables, expression, modules="numpy"
-            )
+            lambda_function = self.function
         except (SyntaxError, NameError) as e:
-            logger.warn(
-                f'Failed to lambdify expression "{self}" with error: {e}'
+            logger.warning(
+                'Failed to lambdify expression "{}" with error: {}', self, e
             )
             return None
 
@@ -325,18 +769,175 @@ class Expression(ExpressionString):
         # compute
         return lambda_function(*vals)
 
-    def get_variables(self):
+    def calc_precise(self, precision=30, interval=False, **values):
         """
-            Gets the name and number of variables
-            in the expression.
+            Arbitrary precision version of calc. With a single set of values the
+            expression is evaluated with sympy's evalf, which raises the working
+            precision as needed to get all the digits right. Arrays of values are
+            evaluated with the expression lambdified with mpmath (with a few guard digits).
+            In interval mode the expression is evaluated with mpmath's interval
+            arithmetic, giving bounds guaranteed to contain the exact value.
+
+            Arguments:
+                precision: int. Number of significant digits
+                interval: bool. If true, compute bounds with interval arithmetic
+                values: variable number of kwargs with variables values, numbers or arrays
+                    of numbers (broadcasted against each other). Numbers are used as the
+                    decimals they're written as (e.g. 0.1 is 1/10).
+
+            Returns:
+                sympy Float, mpmath mpf or mpmath interval (with interval=True), or a
+                np.ndarray of mpmath numbers if arrays of values are given
+
+            Raises:
+                ArgumentsNumberError: if the number of variable values specified doesn't match
+                    the number of values in the expression.
+                ValueError: in interval mode, if the expression has complex values
         """
-        if self.is_derivative:
-            atoms = self.expression.doit().atoms()
+        import mpmath
+        import numpy as np
+        from sympy import Rational
+
+        logger.log(
+            "EXPRESSION",
+            "{} - precise calc. Precision: {}, interval: {}, values: {}",
+            self,
+            precision,
+            interval,
+            list(values),
+        )
+        if len(values) != self.n_variables:
+            raise ArgumentsNumberError(self, **values)
+        try:
+            vals = [values[str(var)] for var in self.variables]
+        except KeyError:
+            raise ArgumentsNumberError(self, **values)
+        vectorized = any(np.ndim(v) for v in vals)
+
+        if not interval and not vectorized:
+            with stage("eval"):
+                return self.evaluated_expression.evalf(
+                    precision,
+                    subs={
+                        var: Rational(str(v))
+                        for var, v in zip(self.variables, vals)
+                    },
+                )
+
+        context = mpmath.iv if interval else mpmath.mp
+        lambda_function = get_lambda_function(
+            self.evaluated_expression,
+            self.variables,
+            modules="mpmath.iv" if interval else "mpmath",
+        )
+
+        def function(*args):
+            # + evaluates constants (e.g. mpmath.pi) at the working precision
+            return +lambda_function(*args)
+
+        def evaluate(dps):
+            with working_precision(context, dps):
+                if not vectorized:
+                    return function(*[context.mpf(str(v)) for v in vals])
+                convert = np.frompyfunc(lambda v: context.mpf(str(v)), 1, 1)
+                return np.frompyfunc(function, len(vals), 1)(
+                    *[convert(np.asarray(v)) for v in vals]
+                )
+
+        with stage("eval"):
+            if not interval:
+                return evaluate(precision + 10)
+
+            # interval bounds are guaranteed at any working precision, but
+            # rounding errors widen them: double the precision until the
+            # bounds agree to the number of digits requested
+            dps = precision
+            for _ in range(max_precision_doublings):
+                result = evaluate(dps)
+                if all(
+                    _interval_digits(r) >= precision
+                    for r in np.ravel(np.asarray(result, dtype=object))
+                ):
+                    break
+                dps *= 2
+            return result
+
+    def compile(self, backend="auto"):
+        """
+            Compiles the expression to a function evaluating it over
+            arrays of values, see mathcli.compiled.
+
+            Arguments:
+                backend: str. One of 'auto', 'c', 'numba' or 'numpy'
+
+            Returns:
+                function taking an array of values for each variable (in the order of self.variables)
+        """
+        from .compiled import get_compiled_function
+
+        return get_compiled_function(
+            self.evaluated_expression, self.variables, backend=backend
+        )
+
+    def calc_batch(self, backend="numpy", **values):
+        """
+            Vectorized version of calc: the expression is lambdified (or compiled)
+            once and evaluated over whole arrays of variables values with a single call.
+            Scalar values are broadcasted against the arrays.
+
+            Arguments:
+                backend: str. 'numpy' to lambdify the expression, or 'auto', 'c', 'numba'
+                    to compile it to native code first (see Expression.compile)
+                values: variable number of kwargs with arrays of variables values (e.g. x=[1, 2], y=[3, 4])
+
+            Returns:
+                np.ndarray: the value of the expression for each set of variables values
+
+            Raises:
+                ArgumentsNumberError: if the number of variable values specified doesn't match
+                    the number of values in the expression.
+                ValueError: if the arrays of values have incompatible shapes
+        """
+        import numpy as np
+
+        logger.log(
+            "EXPRESSION", "{} - batch calc. Values: {}", self, list(values)
+        )
+
+        arrays = {k: np.asarray(v, dtype=float) for k, v in values.items()}
+        try:
+            shape = np.broadcast_shapes(*[a.shape for a in arrays.values()])
+        except ValueError:
+            raise ValueError(
+                f"Variables values have incompatible shapes: {[a.shape for a in arrays.values()]}"
+            )
+
+        if self.is_solved:
+            # numeric expression, already evaluated
+            if arrays:
+                raise ArgumentsNumberError(self, **values)
+            result = float(self.value)
+        elif backend == "numpy":
+            result = self.calc(**arrays)
         else:
-            atoms = self.expression.atoms()
+            try:
+                arguments = [arrays.pop(str(var)) for var in self.variables]
+            except KeyError:
+                raise ArgumentsNumberError(self, **values)
+            if arrays:
+                raise ArgumentsNumberError(self, **values)
+            result = self.compile(backend)(*arguments)
+
+        if result is None:
+            return None
+        return np.array(np.broadcast_to(result, shape))
 
-        self.variables = [x for x in list(atoms) if not is_number(x)]
-        self.n_variables = len(self.variables)
+    def get_variables(self):
+        """
+            Gets the variables in the expression,
+            sorted by name.
+        """
+        return sorted(self.evaluated_expression.free_symbols, key=str)
 
 
 def to_sympy(expression):
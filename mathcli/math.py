@@ -1,25 +1,165 @@
-from sympy import solveset
-from loguru import logger
+from sympy import solveset, Eq
+from pathlib import Path
+import json
+import sys
+from ._log import logger
 from rich import print
 
-from .expression import Expression, to_sympy
-from .results import Result
-from ._utils import parse_solveset, fmt_number
-from .cache import cache_expression
+from .expression import Expression, to_sympy, evaluated
+from . import derivatives, systems
+from ._utils import (
+    parse_solveset,
+    fmt_number,
+    fmt_precise,
+    load_values,
+    to_json,
+)
+from .cache import cache_expression, results
+from .errors import OperationTimeoutError
+from .profiling import stage
 from mathcli import theme
 
+# ways results can be shown, see print_text
+formats = ("rich", "plain", "json")
+
+# significant digits of interval results, if not given
+default_precision = 15
+
+
+def print_text(render, op, expression, result, **fields):
+    """
+        Prints the result of an operation as plain text (just the result)
+        or as a compact JSON object, without building a rich Result panel.
+
+        Arguments:
+            render: str. One of 'rich', 'plain' or 'json'
+            op: str. Name of the operation
+            expression: Expression, list of Expression. The expression(s) the operation was applied to
+            result: the operation's result
+            fields: kwargs, optional. Other fields to include in the JSON output (e.g. values)
+
+        Returns:
+            printed: bool. False if render is 'rich' and the result should be shown as a Result panel
+
+        Raises:
+            ValueError: if render is not one of mathcli.math.formats
+    """
+    if render not in formats:
+        raise ValueError(
+            f"Unrecognized render format: {render}, should be one of {formats}"
+        )
+
+    with stage("render"):
+        if render == "plain":
+            if isinstance(result, dict):
+                # one line per item, e.g. the values of the unknowns of a system
+                result = [[k, v] for k, v in result.items()]
+            elif (
+                isinstance(result, list)
+                and result
+                and isinstance(result[0], dict)
+            ):
+                # one line per dictionary, with its values
+                result = [list(r.values()) for r in result]
+
+            if isinstance(result, list):
+                # one line per item, e.g. a matrix' rows
+                rows = [
+                    "\t".join(map(str, to_json(r)))
+                    if isinstance(r, list)
+                    else str(to_json(r))
+                    for r in result
+                ]
+                sys.stdout.write("\n".join(rows) + "\n")
+            else:
+                sys.stdout.write(f"{to_json(result)}\n")
+        elif render == "json":
+            if isinstance(expression, list):
+                expression = [e.string for e in expression]
+            else:
+                expression = expression.string
+
+            output = dict(
+                op=op,
+                expression=expression,
+                result=to_json(result),
+                **{k: to_json(v) for k, v in fields.items()},
+            )
+            sys.stdout.write(json.dumps(output, separators=(",", ":")) + "\n")
+        else:
+            return False
+    return True
+
 
 def make_eq(expression):
     """
         Return a sympy expression representing an equation
     """
+    if not isinstance(expression, str):
+        # sympy expression
+        if not isinstance(expression, Eq):
+            expression = Eq(expression, 0, evaluate=False)
+        return expression
+
     if "=" not in expression:
         expression += " = 0"
     return to_sympy(expression)
 
 
+@results.cached("solveset")
+def solved(eq, solve_for):
+    """
+        Solves an equation for a variable, results are
+        cached on disk across processes. Accepts a timeout
+        keyword argument, see ResultsCache.cached.
+
+        Arguments:
+            eq: sympy.Eq. Equation to solve
+            solve_for: str. Name of the variable to solve for
+
+        Returns:
+            solutions: list of str. String expressions with all the solutions
+
+        Raises:
+            NotImplementedError: if the solutions can't be expressed as a finite set of expressions
+    """
+    return parse_solveset(solveset(eq, solve_for), all_solutions=True)
+
+
+@results.cached("nonlinsolve")
+def solved_system(equations, unknowns):
+    """
+        Solves a nonlinear system of equations symbolically, results
+        are cached on disk across processes. Accepts a timeout
+        keyword argument, see ResultsCache.cached.
+
+        Arguments:
+            equations: sympy.Tuple of expressions f, for the equations f = 0
+            unknowns: list of str. Names of the unknowns
+
+        Returns:
+            solutions: list of list of str. The value of each unknown for each solution
+
+        Raises:
+            NotImplementedError: if the solutions can't be expressed as a finite set of expressions
+    """
+    from sympy import nonlinsolve, Symbol
+
+    unknowns = [Symbol(name) for name in unknowns]
+    return systems.nonlinear_solutions(
+        nonlinsolve(list(equations), unknowns), list(equations), unknowns
+    )
+
+
 @cache_expression
-def calc(expression, **values):
+def calc(
+    expression,
+    show_result=True,
+    render="rich",
+    precision=None,
+    interval=False,
+    **values,
+):
     """
         Calculate the value of an expression. 
         If the expression is numeric (e.g. '3 + sqrt(10)') then no other arguments  are necessary.
@@ -29,39 +169,132 @@ def calc(expression, **values):
 
         Arguments:
             expression: str. Numeric or symbolic expression.
+            show_result: bool. If false the result is not shown.
+            render: str. How to show the result: 'rich' (a panel), 'plain' (just the result)
+                or 'json' (a compact JSON object), see print_text
+            precision: int, optional. Number of significant digits to compute the value with,
+                using arbitrary precision arithmetic, see Expression.calc_precise
+            interval: bool. If true the value is computed with interval arithmetic, giving
+                guaranteed bounds (to `precision` digits, 15 by default)
             values: kwargs, dict, optional. Dictionary of values like: 'x=1 y=2'
 
         Returns:
-            the expression's value. A float.
+            the expression's value. A float, or a sympy Float, mpmath mpf or mpmath
+            interval with precision or interval.
     """
     logger.log("MATH", f'called CALC with "{expression}" and values {values}')
     expression = Expression(expression)
 
-    if expression.is_solved:
+    if precision or interval:
+        precision = precision or default_precision
+        result = expression.calc_precise(precision, interval, **values)
+    elif expression.is_solved:
         # numeric expression is solved already
-        res = Result(expression, footer="calculate")
         result = expression.value
     else:
         # calc
         result = expression.calc(**values)
 
+    if not show_result:
+        return result
+
+    # show all digits of arbitrary precision results
+    shown = fmt_precise(result, precision) if precision else result
+    if print_text(render, "calc", expression, shown, values=values):
+        return result
+
+    from .results import Result
+
+    if expression.is_solved and not precision:
+        res = Result(expression, footer="calculate")
+    else:
         # if expression is a derivative, add the derivative's value. Then print
         if expression.is_derivative:
             res = Result(expression, footer="calculate")
-            deriv = Expression(expression.expression.doit())
-            res.add_expression(deriv, message="Derivative", result=result)
+            deriv = Expression(expression.evaluated_expression)
+            res.add_expression(deriv, message="Derivative", result=shown)
 
         else:
-            res = Result(expression, footer="calculate", result=result)
+            res = Result(expression, footer="calculate", result=shown)
 
-        res.add_variables(**values)
+        if values:
+            res.add_variables(**values)
 
-    print(res)
+    with stage("render"):
+        print(res)
     return result
 
 
+def calc_batch(
+    expression,
+    values=None,
+    backend="numpy",
+    precision=None,
+    interval=False,
+    **columns,
+):
+    """
+        Calculate the value of an expression for many sets of variables values at once.
+        The expression is parsed and compiled once and then evaluated over whole arrays
+        of values, which is much faster than calling `calc` for each set of values.
+
+        Arguments:
+            expression: str. Numeric or symbolic expression.
+            values: str, Path, dict, np.ndarray, optional. Either a path to a .csv, .npy or .npz file
+                with the variables values (see _utils.load_values), a dictionary of arrays of values
+                or a 2D array with one column per variable (variables sorted by name).
+            backend: str. 'numpy' to evaluate the lambdified expression, or 'auto', 'c' or 'numba'
+                to compile it to native code first, see mathcli.compiled. Useful for long sweeps.
+            precision: int, optional. Number of significant digits to compute the values with,
+                using arbitrary precision arithmetic (mpmath), see Expression.calc_precise
+            interval: bool. If true the values are computed with interval arithmetic
+            columns: kwargs, optional. Arrays (or scalars) of values for each variable, e.g. x=[1, 2, 3]
+
+        Returns:
+            the expression's values. A np.ndarray (of mpmath numbers with precision or interval).
+    """
+    logger.log(
+        "MATH", f'called CALC BATCH with "{expression}" and values {values}'
+    )
+    expression = Expression(expression)
+
+    if isinstance(values, (str, Path)):
+        values = load_values(values)
+
+    if hasattr(values, "shape"):
+        # 2D np.ndarray with one column per variable
+        values = values.reshape(len(values), -1)
+        if values.shape[1] != expression.n_variables:
+            raise ValueError(
+                f"Got {values.shape[1]} columns of values for {expression.n_variables} variables: {expression.variables}"
+            )
+        values = {
+            str(var): values[:, n]
+            for n, var in enumerate(expression.variables)
+        }
+
+    values = {**(values or {}), **columns}
+    if precision or interval:
+        import numpy as np
+
+        return np.asarray(
+            expression.calc_precise(
+                precision or default_precision, interval, **values
+            ),
+            dtype=object,
+        )
+    return expression.calc_batch(backend=backend, **values)
+
+
 @cache_expression
-def simplify(expression, show_result=True):
+def simplify(
+    expression,
+    show_result=True,
+    timeout=None,
+    fallback=True,
+    render="rich",
+    tier="auto",
+):
     """
         Simplify an expression.
         Simplifies an expression, e.g. '3x + 2x -1' becomes '5x -1'
@@ -70,24 +303,54 @@ def simplify(expression, show_result=True):
         Arguments:
             expression: str. Numeric or symbolic expression.
             show_result: bool. If false the result is not shown.
+            timeout: float, optional. Time budget in seconds for the simplification.
+            fallback: bool. If true and the simplification doesn't complete in time,
+                cheaper strategies are used instead (expand and cancel).
+            render: str. How to show the result: 'rich', 'plain' or 'json', see print_text
+            tier: str. 'auto' to choose how thoroughly to simplify from the expression's
+                size, or 'full', 'trig' or 'rational' to force it, see Expression.simplify
 
         Returns:
             the simplified expression as a string.
+
+        Raises:
+            ValueError: if the tier is not valid
+            OperationTimeoutError: if the simplification doesn't complete in time and fallback is false
     """
     logger.log("MATH", f'called SIMPLIFY with "{expression}"')
     expression = Expression(expression)
-    simplified = expression.simplify()
+    simplified = expression.simplify(
+        timeout=timeout, fallback=fallback, tier=tier
+    )
+
+    if show_result and not print_text(
+        render,
+        "simplify",
+        expression,
+        simplified.string,
+        tier=simplified.tier,
+        strategy=simplified.strategy,
+    ):
+        from .results import Result
+
+        ttl = "Simplified"
+        if simplified.timed_out:
+            ttl += f" [dim](timed out, used {simplified.strategy})[/]"
+        elif simplified.strategy == "none":
+            ttl += f" [dim]({simplified.tier} tier, kept as it is)[/]"
+        elif simplified.tier != "full":
+            ttl += f" [dim]({simplified.tier} tier, used {simplified.strategy})[/]"
 
-    if show_result:
         res = Result(expression, footer="simplify")
-        res.add_expression(simplified, "Simplified")
-        print(res)
+        res.add_expression(simplified, ttl)
+        with stage("render"):
+            print(res)
 
     return simplified.string
 
 
 @cache_expression
-def derivative(expression, wrt=None):
+def derivative(expression, wrt=None, show_result=True, render="rich"):
     """
         Compute the derivative of an expression.
         For expressions with no or single variables, no other argument is necessary:
@@ -101,6 +364,8 @@ def derivative(expression, wrt=None):
         Arguments:
             expression: str. Numeric or symbolic expression.
             wrt: str, optional. String of variables names and derivative order, e.g. 'x2'
+            show_result: bool. If false the result is not shown.
+            render: str. How to show the result: 'rich', 'plain' or 'json', see print_text
 
         Returns:
             derivative: str. String with the (partial) derivative of the expression
@@ -120,19 +385,37 @@ def derivative(expression, wrt=None):
         # split wrt into letters/numbers
         wrt = [s if s not in "123456789" else int(s) for s in wrt]
 
-    res = Result(expression, footer="derivative")
-
     der = expression.derivative(wrt)
-    res.add_expression(
-        der, ttl, result=der.expression.doit(), result_arrow=True
-    )
-    print(res)
+    if not show_result:
+        return der.string
+
+    result = Expression.loads(evaluated(der.expression))
+    if not print_text(
+        render, "derivative", expression, result.string, derivative=der.string
+    ):
+        from .results import Result
+
+        res = Result(expression, footer="derivative")
+        res.add_expression(der, ttl, result=result, result_arrow=True)
+        with stage("render"):
+            print(res)
 
     return der.string
 
 
 @cache_expression
-def solve(expression, solve_for=None, **given):
+def solve(
+    expression,
+    solve_for=None,
+    show_result=True,
+    timeout=None,
+    render="rich",
+    method="auto",
+    interval=(-10, 10),
+    all_solutions=False,
+    backend="numpy",
+    **given,
+):
     """
         Solve an equation.
         Given an expression for an equation e.g. '3x + 2y = 0` it attempts to solve the equation and 
@@ -148,20 +431,61 @@ def solve(expression, solve_for=None, **given):
         the values of the other variables (not being solved for) can be passed with the 
         optional keyword arguments given (e.g. 'solve()'3x + 2y = 1' solve_for='x', y=1).
         For more information: https://docs.sympy.org/latest/modules/solvers/solveset.html
+
+        Equations that can't be solved symbolically (or not within the timeout) are solved
+        numerically if the values of all other variables are given, finding all the real
+        roots in an interval (see mathcli.numeric). Given values can be arrays, to
+        find the roots for many sets of values at once.
+        Systems of equations (a list of equations or a string with equations
+        separated by ';') are solved with solve_system.
         
         Arguments:
             expression: str. Numeric or symbolic expression. Can be an equation. 
             solve_for: str, optional. Name or the variable to solve for.
+            show_result: bool. If false the result is not shown.
+            timeout: float, optional. Time budget in seconds for solving the equation symbolically.
+            render: str. How to show the result: 'rich', 'plain' or 'json', see print_text
+            method: str. 'symbolic', 'numeric' or 'auto' (symbolic, falling back to numeric)
+            interval: tuple of two floats. Interval in which roots are searched numerically
+            all_solutions: bool. If true all solutions are returned, otherwise only the first one
+            backend: str. Backend to compile solutions (or the equation) with when arrays of values
+                are given, see mathcli.compiled
             given: kwargs, optional. Dictionary of values for variables not solving for (e.g. 'x=1')
 
         Returns: 
             value: float, str. If no variables values are given, and the expression is
                 symbolic then an expression string is return, otherwise a float.
+                None if there are no solutions. If all_solutions is true a list of values,
+                and if arrays of values are given a list of solutions for each set of values.
+
+        Raises:
+            OperationTimeoutError: if the equation is not solved in time and can't be solved numerically
+            NotImplementedError: if the equation can't be solved symbolically nor numerically
+            ValueError: if the method is not recognized
     """
+    if isinstance(expression, (list, tuple)) or (
+        isinstance(expression, str) and ";" in expression
+    ):
+        return solve_system(
+            expression,
+            solve_for,
+            show_result=show_result,
+            timeout=timeout,
+            render=render,
+            method=method,
+            interval=interval,
+            all_solutions=all_solutions,
+            **given,
+        )
+
     logger.log(
         "MATH",
         f'called SOLVE with "{expression}" and solve_for "{solve_for}", given {given}',
     )
+    if method not in ("auto", "symbolic", "numeric"):
+        raise ValueError(
+            f"Unrecognized method: {method}, should be one of 'auto', 'symbolic' or 'numeric'"
+        )
 
     # compute solution to expression
     eq = make_eq(expression)
@@ -169,47 +493,658 @@ def solve(expression, solve_for=None, **given):
 
     # numeric
     if expression.n_variables == 0:
-        return solveset(eq)
+        with stage("sympy"):
+            value = solveset(eq)
+        if show_result and render != "rich":
+            print_text(render, "solve", expression, value)
+        return value
 
     # symbolic
     if expression.n_variables == 1:
-        solve_for = expression.variables[0]
-    solution = parse_solveset(solveset(eq, solve_for))
+        solve_for = str(expression.variables[0])
+    solve_for = str(solve_for)
+    params = {
+        name: value for name, value in given.items() if name != solve_for
+    }
+    numeric = len(params) == expression.n_variables - 1
+
+    solutions = _symbolic_solutions(
+        eq, solve_for, numeric, timeout=timeout, method=method
+    )
+    strategy = "numeric" if solutions is None else "symbolic"
+
+    # compute the solutions' values
+    import numpy as np
+
+    vectorized = any(np.ndim(v) for v in params.values())
+    if strategy == "numeric":
+        from .numeric import find_roots
+
+        roots = find_roots(
+            eq, solve_for, interval=interval, backend=backend, **params
+        )
+        if vectorized:
+            values = [[float(r) for r in rts] for rts in roots]
+        else:
+            values = [float(r) for r in roots]
+        solutions = values
+    elif vectorized:
+        # solutions for each set of values
+        values = [
+            [float(v) for v in sols]
+            for sols in _evaluate_solutions(
+                solutions, params, backend=backend
+            ).reshape(-1, len(solutions))
+        ]
+    else:
+        values = [_solution_value(solution, params) for solution in solutions]
+
+    if all_solutions:
+        value = values
+    elif vectorized:
+        value = [v[0] if v else None for v in values]
+    else:
+        value = values[0] if values else None
+
+    if vectorized and render == "rich":
+        # one line for each set of values, too many for a panel
+        render = "plain"
+    if not show_result or print_text(
+        render,
+        "solve",
+        expression,
+        value,
+        solve_for=solve_for,
+        given=given,
+        strategy=strategy,
+    ):
+        return value
 
     # Create Result
+    from .results import Result
+
     res = Result(expression, footer="solve")
+    ttl = f"Solve for [{theme.variable}]{solve_for} [/]"
+    if strategy == "numeric":
+        ttl += f" [dim](numeric, in {list(interval)})[/]"
+    if not solutions:
+        res.add_expression("no solution", ttl, format=False)
 
-    # add solution
-    if not Expression(solution).n_variables:
-        sol = Expression(solution)
-        solution = fmt_number(sol.value)
-        value = solution
+    for n, (solution, val) in enumerate(zip(solutions, values)):
+        title = ttl
+        if len(solutions) > 1:
+            title += f" [dim]{n + 1}/{len(solutions)}[/]"
 
-        res.add_expression(
-            sol,
-            f"Solve for [{theme.variable}]{solve_for} [/]",
-            prepend=f"{solve_for}  ",
-            result=value,
+        sol = Expression(solution) if strategy == "symbolic" else None
+        if sol is None or not sol.n_variables:
+            res.add_expression(
+                solution, title, prepend=f"{solve_for}  ", result=val,
+            )
+        else:
+            res.add_expression(
+                solve_for + " ", title, format=False, result=sol,
+            )
+            if params:
+                res.add_expression(
+                    solve_for + " ", "Solution", format=False, result=val,
+                )
+
+    if params:
+        res.add_variables(**params, message="Given")
+
+    with stage("render"):
+        print(res)
+    return value
+
+
+def solve_batch(
+    expression,
+    given=None,
+    solve_for=None,
+    backend="numpy",
+    timeout=None,
+    method="auto",
+    interval=(-10, 10),
+    all_solutions=False,
+    **columns,
+):
+    """
+        Solve an equation for many sets of values of the other variables at once.
+        The equation is solved symbolically once (the solutions are cached on disk),
+        the solutions are compiled to a single function and evaluated over whole
+        arrays of values, which is much faster than calling `solve` for each set of values.
+        If the equation can't be solved symbolically, its roots are found numerically
+        for all sets of values at once (see mathcli.numeric).
+
+        Arguments:
+            expression: str. Equation, see solve.
+            given: str, Path, dict, np.ndarray, optional. Either a path to a .csv, .npy or .npz file
+                with the variables values (see _utils.load_values), a dictionary of arrays of values
+                or a 2D array with one column per variable (variables not solving for, sorted by name).
+            solve_for: str, optional. Name or the variable to solve for.
+            backend: str. 'numpy' to evaluate the lambdified solutions, or 'auto', 'c' or 'numba'
+                to compile them to native code first, see mathcli.compiled.
+            timeout: float, optional. Time budget in seconds for solving the equation symbolically.
+            method: str. 'symbolic', 'numeric' or 'auto' (symbolic, falling back to numeric)
+            interval: tuple of two floats. Interval in which roots are searched numerically
+            all_solutions: bool. If true all solutions are returned, otherwise only the first
+                real one for each set of values
+            columns: kwargs, optional. Arrays (or scalars) of values for each variable, e.g. y=[1, 2, 3]
+
+        Returns:
+            np.ndarray with the solution for each set of values (nan if there's no real solution).
+                If all_solutions is true an extra last dimension with all solutions, padded
+                with nan if sets of values have different numbers of (numeric) solutions.
+
+        Raises:
+            OperationTimeoutError: if the equation is not solved in time and can't be solved numerically
+            NotImplementedError: if the equation can't be solved symbolically nor numerically
+            ValueError: if values are missing for some of the variables
+    """
+    import numpy as np
+
+    logger.log(
+        "MATH",
+        f'called SOLVE BATCH with "{expression}" and solve_for "{solve_for}", given {given}',
+    )
+    if method not in ("auto", "symbolic", "numeric"):
+        raise ValueError(
+            f"Unrecognized method: {method}, should be one of 'auto', 'symbolic' or 'numeric'"
         )
+    eq = make_eq(expression)
+    expression = Expression(expression)
 
+    if expression.n_variables == 1:
+        solve_for = str(expression.variables[0])
+    solve_for = str(solve_for)
+    others = [var for var in expression.variables if str(var) != solve_for]
+
+    if isinstance(given, (str, Path)):
+        given = load_values(given)
+    if hasattr(given, "shape"):
+        # 2D np.ndarray with one column per variable
+        given = given.reshape(len(given), -1)
+        if given.shape[1] != len(others):
+            raise ValueError(
+                f"Got {given.shape[1]} columns of values for {len(others)} variables: {others}"
+            )
+        given = {str(var): given[:, n] for n, var in enumerate(others)}
+    given = {**(given or {}), **columns}
+    given = {
+        name: np.asarray(value, dtype=float)
+        for name, value in given.items()
+        if name != solve_for
+    }
+
+    solutions = _symbolic_solutions(
+        eq,
+        solve_for,
+        all(str(var) in given for var in others),
+        timeout=timeout,
+        method=method,
+    )
+    if solutions is not None:
+        values = _evaluate_solutions(solutions, given, backend=backend)
     else:
-        res.add_expression(
-            solve_for + " " if solution else "no solution",
-            f"Solve for [{theme.variable}]{solve_for} [/]",
-            format=False,
-            result=Expression(solution) if solution else None,
+        from .numeric import find_roots
+
+        shape = np.broadcast_shapes(*[v.shape for v in given.values()])
+        # always a list of roots, one for each set of values
+        roots = find_roots(
+            eq,
+            solve_for,
+            interval=interval,
+            backend=backend,
+            **{k: np.broadcast_to(v, shape).ravel() for k, v in given.items()},
         )
+        values = np.full((len(roots), max(map(len, roots), default=0)), np.nan)
+        for n, rts in enumerate(roots):
+            values[n, : len(rts)] = rts
+        values = values.reshape((*shape, values.shape[-1]))
 
-    # If values are given, we can substitute them into the solution string and compute
-    if Expression(solution).n_variables:
-        if given:
-            value = Expression(solution).calc(**given)
-            res.add_variables(**given, message="Given")
-            res.add_expression(
-                solve_for + " ", f"Solution", format=False, result=value,
+    if all_solutions:
+        return values
+
+    # first real solution for each set of values
+    if not values.shape[-1]:
+        return np.full(values.shape[:-1], np.nan)
+    finite = np.isfinite(values)
+    first = np.take_along_axis(
+        values, finite.argmax(axis=-1)[..., None], axis=-1
+    )[..., 0]
+    return np.where(finite.any(axis=-1), first, np.nan)
+
+
+def solve_system(
+    equations,
+    solve_for=None,
+    show_result=True,
+    timeout=None,
+    render="rich",
+    method="auto",
+    interval=(-10, 10),
+    all_solutions=False,
+    **given,
+):
+    """
+        Solve a system of equations for several unknowns at once.
+        Linear systems are solved as a (sparse) matrix equation: numerically if all
+        coefficients are numbers, which scales to hundreds of unknowns, or symbolically.
+        Nonlinear systems are solved symbolically and, if that fails (or doesn't complete
+        within the timeout) and the values of all other variables are given, numerically
+        with Newton's method from many starting points in an interval (see mathcli.numeric).
+        For more information: https://docs.sympy.org/latest/modules/solvers/solveset.html
+
+        Arguments:
+            equations: str, list. List of equations or string with equations separated
+                by ';' (e.g. 'x + y = 3; x - y = 1'). `= 0` is optional.
+            solve_for: str, list, optional. Names of the unknowns (e.g. 'x, y'). By default
+                all variables without a given value.
+            show_result: bool. If false the result is not shown.
+            timeout: float, optional. Time budget in seconds for solving nonlinear systems symbolically.
+            render: str. How to show the result: 'rich', 'plain' or 'json', see print_text
+            method: str. 'symbolic', 'numeric' or 'auto' (symbolic, falling back to numeric)
+            interval: tuple of two floats. Interval in which roots are searched numerically
+            all_solutions: bool. If true all solutions are returned, otherwise only the first one
+            given: kwargs, optional. Values of variables not solving for (e.g. 'a=1')
+
+        Returns:
+            solution: dict of unknown name -> value (a float, or an expression string for
+                symbolic solutions), None if there are no solutions. If all_solutions
+                is true a list of solutions.
+
+        Raises:
+            OperationTimeoutError: if the system is not solved in time and can't be solved numerically
+            NotImplementedError: if the system can't be solved symbolically nor numerically
+            ValueError: if the method is not recognized or given values are not numbers
+    """
+    logger.log(
+        "MATH",
+        f'called SOLVE SYSTEM with "{equations}" and solve_for "{solve_for}", given {given}',
+    )
+    if method not in ("auto", "symbolic", "numeric"):
+        raise ValueError(
+            f"Unrecognized method: {method}, should be one of 'auto', 'symbolic' or 'numeric'"
+        )
+    from sympy import Tuple, sympify
+
+    equations = systems.parse_equations(equations)
+    unknowns = systems.parse_unknowns(solve_for, equations, given)
+    names = [str(var) for var in unknowns]
+
+    # substitute the given values
+    params = {}
+    for var in set().union(*[e.free_symbols for e in equations]):
+        if str(var) in given and var not in unknowns:
+            value = sympify(given[str(var)])
+            if not value.is_number:
+                raise ValueError(
+                    f"Given values of systems of equations should be numbers, got {var}={given[str(var)]}"
+                )
+            params[var] = value
+    expressions = equations
+    if params:
+        equations = [e.xreplace(params) for e in equations]
+    numeric = not (
+        set().union(*[e.free_symbols for e in equations]) - set(unknowns)
+    )
+
+    solutions, strategy = None, "linear"
+    if method != "numeric":
+        solutions = systems.solve_linear(equations, unknowns)
+
+    if solutions is None and method != "numeric":
+        strategy = "symbolic"
+        try:
+            solutions = [
+                dict(zip(names, values))
+                for values in solved_system(
+                    Tuple(*equations), unknowns=names, timeout=timeout
+                )
+            ]
+        except (NotImplementedError, OperationTimeoutError) as e:
+            if method == "symbolic" or not numeric:
+                raise
+            logger.debug(
+                f"SOLVE SYSTEM symbolically failed ({e}), solving numerically"
             )
-        else:
-            value = solution
 
-    print(res)
+    if solutions is None:
+        from .numeric import find_system_roots
+
+        strategy = "numeric"
+        roots = find_system_roots(equations, unknowns, interval=interval)
+        solutions = [dict(zip(names, root.tolist())) for root in roots]
+
+    if all_solutions:
+        value = solutions
+    else:
+        value = solutions[0] if solutions else None
+
+    expressions = [Expression(e) for e in expressions] if show_result else []
+    if not show_result or print_text(
+        render,
+        "solve",
+        expressions,
+        value,
+        solve_for=names,
+        given=given,
+        strategy=strategy,
+    ):
+        return value
+
+    from .results import Result, matrix_table
+
+    res = Result(footer="solve")
+    for n, expression in enumerate(expressions[:10]):
+        res.add_expression(expression, f"Equation {n + 1}")
+    if len(expressions) > 10:
+        res.add(f"[dim]... and {len(expressions) - 10} more equations")
+        res.spacer()
+    if given:
+        res.add_variables(**given, message="Given")
+
+    ttl = f"Solve for [{theme.variable}]{', '.join(names)} [/]"
+    if strategy == "numeric":
+        ttl += f" [dim](numeric, in {list(interval)})[/]"
+    res.add(f"[{theme.text_accent}]{ttl}:")
+    if solutions:
+        res.add(
+            matrix_table(
+                [
+                    [str(fmt_number(sol[name])) for sol in solutions]
+                    for name in names
+                ],
+                [f"solution {n + 1}" for n in range(len(solutions))]
+                if len(solutions) > 1
+                else [""],
+                names,
+            ),
+            "rich",
+        )
+    else:
+        res.add("   no solution")
+    res.spacer()
+
+    with stage("render"):
+        print(res)
     return value
+
+
+def _solution_value(solution, given):
+    """
+        Computes the value of a symbolic solution of an equation.
+
+        Arguments:
+            solution: str. Solution expression
+            given: dict. Values of variables in the solution
+
+        Returns:
+            value: str, float. The solution's value, or the solution (with the
+                given values substituted) if the values of some of its variables are not given
+    """
+    sol = Expression(solution)
+    if not sol.n_variables:
+        return fmt_number(sol.value)
+    if not given:
+        return solution
+
+    # substitute the given values into the solution, the bound
+    # solutions are cached so repeated calls don't lambdify again
+    names = [str(var) for var in sol.variables]
+    sol = sol.bind(**{name: v for name, v in given.items() if name in names})
+    if sol.n_variables:
+        return sol.string
+    return sol.calc()
+
+
+def _symbolic_solutions(eq, solve_for, numeric, timeout=None, method="auto"):
+    """
+        Solves an equation symbolically, unless it should be solved numerically.
+
+        Arguments:
+            eq: sympy.Eq. Equation to solve
+            solve_for: str. Name of the variable to solve for
+            numeric: bool. True if the equation can be solved numerically (the
+                values of all other variables are given)
+            timeout: float, optional. Time budget in seconds to solve the equation symbolically
+            method: str. 'symbolic', 'numeric' or 'auto' (symbolic, falling back to numeric)
+
+        Returns:
+            solutions: list of str with the solutions, or None if the equation
+                should be solved numerically
+    """
+    if method == "numeric":
+        return None
+
+    try:
+        return solved(eq, solve_for=solve_for, timeout=timeout)
+    except (NotImplementedError, OperationTimeoutError) as e:
+        if method == "symbolic" or not numeric:
+            raise
+        logger.debug(f"SOLVE symbolically failed ({e}), solving numerically")
+        return None
+
+
+def _evaluate_solutions(solutions, given, backend="numpy"):
+    """
+        Evaluates the solutions of an equation for arrays of values of the
+        other variables. All solutions are compiled to a single function,
+        evaluated once over the whole arrays.
+
+        Arguments:
+            solutions: list of str. Solutions expressions
+            given: dict. Arrays (or scalars) of values of the variables in the solutions
+            backend: str. Backend to compile the solutions with, see mathcli.compiled
+
+        Returns:
+            np.ndarray with shape (*values shape, n solutions). Complex values are nan
+
+        Raises:
+            ValueError: if values are missing for some of the variables
+    """
+    import numpy as np
+    from .compiled import get_compiled_function
+
+    expressions = [Expression(s).evaluated_expression for s in solutions]
+    variables = sorted(
+        set().union(*[e.free_symbols for e in expressions]), key=str
+    )
+    missing = [str(var) for var in variables if str(var) not in given]
+    if missing:
+        raise ValueError(
+            f"Values for {missing} are needed to compute the solutions"
+        )
+
+    shape = np.broadcast_shapes(*[np.shape(v) for v in given.values()])
+    if not expressions:
+        return np.empty((*shape, 0))
+
+    function = get_compiled_function(expressions, variables, backend=backend)
+    with np.errstate(invalid="ignore"):
+        values = function(*[given[str(var)] for var in variables])
+    return np.moveaxis(
+        np.broadcast_to(values, (len(expressions), *shape)), 0, -1
+    )
+
+
+def show_matrix(
+    op, expressions, matrix, variables, show_result=True, render="rich"
+):
+    """
+        Shows a matrix of partial derivatives of one or more expressions.
+
+        Arguments:
+            op: str. Name of the operation (e.g. 'jacobian')
+            expressions: list of Expression
+            matrix: sympy.Matrix
+            variables: list of sympy symbols. The variables of differentiation
+            show_result: bool. If false the result is not shown.
+            render: str. How to show the result: 'rich', 'plain' or 'json', see print_text
+
+        Returns:
+            entries: list of lists of str with the matrix' entries
+    """
+    entries = [[str(entry) for entry in row] for row in matrix.tolist()]
+    if not show_result or print_text(
+        render,
+        op,
+        expressions if op == "jacobian" else expressions[0],
+        entries,
+        wrt=[str(var) for var in variables],
+    ):
+        return entries
+
+    from .results import Result, matrix_table
+
+    if op == "hessian":
+        rows = [str(var) for var in variables]
+    elif op == "gradient":
+        rows = ["∇"]
+    else:
+        rows = [f"f{n}" for n in range(len(expressions))]
+
+    res = Result(footer=op)
+    for label, expression in zip(rows, expressions):
+        res.add_expression(
+            expression,
+            "Expression" if op != "jacobian" else f"Expression {label}",
+        )
+    res.add(f"[{theme.text_accent}]{op.capitalize()}:")
+    res.add(matrix_table(entries, variables, rows), "rich")
+    res.spacer()
+
+    with stage("render"):
+        print(res)
+    return entries
+
+
+@cache_expression
+def gradient(
+    expression,
+    wrt=None,
+    show_result=True,
+    render="rich",
+    as_function=False,
+    backend="numpy",
+):
+    """
+        Compute the gradient of an expression: its partial derivatives
+        w.r.t. each of its variables (or each of the variables in wrt).
+        For more information about derivatives: https://docs.sympy.org/latest/tutorial/calculus.html
+
+        Arguments:
+            expression: str. Symbolic expression.
+            wrt: str, list, optional. Variables names, e.g. 'x, y'. All variables by default.
+            show_result: bool. If false the result is not shown.
+            render: str. How to show the result: 'rich', 'plain' or 'json', see print_text
+            as_function: bool. If true a function evaluating the gradient at many points is
+                returned instead, see derivatives.matrix_function
+            backend: str. Backend used to compile the function, see mathcli.compiled
+
+        Returns:
+            gradient: list of str with the partial derivatives, or a function taking the variables
+                values (e.g. x=[1, 2]) and returning an array with shape (n variables, *values shape)
+    """
+    logger.log("MATH", f'called GRADIENT with "{expression}" and wrt "{wrt}"')
+    matrix, variables = derivatives.gradient_matrix(expression, wrt=wrt)
+
+    if as_function:
+        function = derivatives.matrix_function(matrix, variables, backend)
+        return lambda **values: function(**values)[0]
+
+    return show_matrix(
+        "gradient",
+        [Expression(expression)],
+        matrix,
+        variables,
+        show_result=show_result,
+        render=render,
+    )[0]
+
+
+@cache_expression
+def jacobian(
+    expressions,
+    wrt=None,
+    show_result=True,
+    render="rich",
+    as_function=False,
+    backend="numpy",
+):
+    """
+        Compute the Jacobian matrix of one or several expressions: the partial
+        derivatives of each expression w.r.t. each variable.
+        For more information about derivatives: https://docs.sympy.org/latest/tutorial/calculus.html
+
+        Arguments:
+            expressions: str, list. List of expressions, or a string with expressions separated by ';'
+            wrt: str, list, optional. Variables names, e.g. 'x, y'. All variables by default.
+            show_result: bool. If false the result is not shown.
+            render: str. How to show the result: 'rich', 'plain' or 'json', see print_text
+            as_function: bool. If true a function evaluating the matrix at many points is
+                returned instead, see derivatives.matrix_function
+            backend: str. Backend used to compile the function, see mathcli.compiled
+
+        Returns:
+            jacobian: list of lists of str, with a row for each expression, or a function taking the
+                variables values and returning an array with shape (n expressions, n variables, *values shape)
+    """
+    logger.log("MATH", f'called JACOBIAN with "{expressions}" and wrt "{wrt}"')
+    expressions = derivatives.parse_expressions(expressions)
+    matrix, variables = derivatives.jacobian_matrix(expressions, wrt=wrt)
+
+    if as_function:
+        return derivatives.matrix_function(matrix, variables, backend)
+
+    return show_matrix(
+        "jacobian",
+        expressions,
+        matrix,
+        variables,
+        show_result=show_result,
+        render=render,
+    )
+
+
+@cache_expression
+def hessian(
+    expression,
+    wrt=None,
+    show_result=True,
+    render="rich",
+    as_function=False,
+    backend="numpy",
+):
+    """
+        Compute the Hessian matrix of an expression: its second order
+        partial derivatives w.r.t. each pair of variables.
+        For more information about derivatives: https://docs.sympy.org/latest/tutorial/calculus.html
+
+        Arguments:
+            expression: str. Symbolic expression.
+            wrt: str, list, optional. Variables names, e.g. 'x, y'. All variables by default.
+            show_result: bool. If false the result is not shown.
+            render: str. How to show the result: 'rich', 'plain' or 'json', see print_text
+            as_function: bool. If true a function evaluating the matrix at many points is
+                returned instead, see derivatives.matrix_function
+            backend: str. Backend used to compile the function, see mathcli.compiled
+
+        Returns:
+            hessian: list of lists of str, or a function taking the variables values and
+                returning an array with shape (n variables, n variables, *values shape)
+    """
+    logger.log("MATH", f'called HESSIAN with "{expression}" and wrt "{wrt}"')
+    matrix, variables = derivatives.hessian_matrix(expression, wrt=wrt)
+
+    if as_function:
+        return derivatives.matrix_function(matrix, variables, backend)
+
+    return show_matrix(
+        "hessian",
+        [Expression(expression)],
+        matrix,
+        variables,
+        show_result=show_result,
+        render=render,
+    )
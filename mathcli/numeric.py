@@ -0,0 +1,331 @@
+from ._log import logger
+from .profiling import stage
+
+"""
+    Numeric root finding, used by mathcli.math.solve when an equation
+    can't be solved symbolically (or not in time).
+
+    The equation (as f(x) = 0) and its derivative are compiled to a single
+    function (see mathcli.compiled) which is evaluated on a grid of points
+    over an interval to find the intervals where f changes sign. All the
+    roots are then refined at once with a safeguarded Newton method:
+    Newton steps falling outside of a root's bracket are replaced by
+    bisection steps, so it always converges. Points where |f| has a local
+    minimum without a sign change (e.g. x^2 = 0) are refined with plain
+    Newton steps and kept only if they converge to a root.
+
+    Since everything is done with arrays, the roots can be found for many
+    sets of values of the other variables (parameters) at once.
+
+    Roots of systems of equations are found with Newton's method started
+    from many random points at once, using the compiled Jacobian matrix.
+"""
+
+
+def _equation(expression):
+    """
+        Returns an equation as a sympy expression f, to solve f = 0
+    """
+    from sympy import Eq, sympify
+    from .expression import Expression
+
+    if isinstance(expression, str):
+        from .math import make_eq
+
+        expression = make_eq(expression)
+    elif isinstance(expression, Expression):
+        expression = expression.evaluated_expression
+    expression = sympify(expression)
+
+    if isinstance(expression, Eq):
+        return expression.lhs - expression.rhs
+    return expression
+
+
+def _refine(function, x, a, b, params, tol, max_iter):
+    """
+        Refines estimates of roots with Newton steps, replacing steps
+        falling outside of their bracket [a, b] by bisection steps.
+        If a and b are None, plain Newton steps are used.
+
+        Arguments:
+            function: compiled function returning f and df/dx, see find_roots
+            x: np.ndarray. Initial estimates
+            a, b: np.ndarray, optional. Brackets with a sign change of f
+            params: list of np.ndarray. Values of the other variables for each estimate
+            tol: float. Tolerance on the roots' values
+            max_iter: int. Maximum number of iterations
+
+        Returns:
+            x: np.ndarray. Refined roots
+            fx: np.ndarray. Value of f at the roots
+    """
+    import numpy as np
+
+    bracketed = a is not None
+    if bracketed:
+        fa = function(a, *params)[0]
+
+    for _ in range(max_iter):
+        fx, dfx = function(x, *params)
+        step = fx / dfx
+        new = x - step
+
+        if bracketed:
+            # shrink the brackets around the roots
+            left = np.sign(fx) == np.sign(fa)
+            a, fa = np.where(left, x, a), np.where(left, fx, fa)
+            b = np.where(left, b, x)
+
+            bisect = ~np.isfinite(new) | (new <= a) | (new >= b)
+            new = np.where(bisect, (a + b) / 2, new)
+            done = (np.abs(b - a) <= tol * (1 + np.abs(x))) | (fx == 0)
+        else:
+            done = ~np.isfinite(new) | (np.abs(step) <= tol * (1 + np.abs(x)))
+
+        x = np.where(done | ~np.isfinite(new), x, new)
+        if done.all():
+            break
+
+    return x, function(x, *params)[0]
+
+
+def _unique(roots, tol):
+    """
+        Sorts roots and removes duplicates (closer than tol)
+    """
+    import numpy as np
+
+    roots = np.sort(roots)
+    if len(roots) < 2:
+        return roots
+    keep = np.diff(roots) > tol * (1 + np.abs(roots[1:]))
+    return roots[np.concatenate([[True], keep])]
+
+
+def find_roots(
+    expression,
+    variable,
+    interval=(-10, 10),
+    n_points=1000,
+    tol=1e-12,
+    max_iter=100,
+    backend="numpy",
+    **given,
+):
+    """
+        Finds all the real roots of an equation in an interval.
+
+        Arguments:
+            expression: str, sympy expression, Expression. Equation (e.g. 'log(x) = 2')
+                or expression f to solve f = 0 for
+            variable: str, sympy symbol. Variable to solve for
+            interval: tuple of two floats. Interval in which roots are searched
+            n_points: int. Number of points in the grid used to bracket roots: roots closer
+                to each other than the grid spacing may be missed
+            tol: float. Relative tolerance on the roots' values
+            max_iter: int. Maximum number of refinement iterations
+            backend: str. Backend to compile the equation with, see mathcli.compiled
+            given: kwargs. Values of all other variables in the equation: numbers or
+                arrays of values (broadcasted against each other) to find the roots
+                for many sets of values at once
+
+        Returns:
+            roots: np.ndarray with the sorted roots. If arrays of values are given a list
+                with the roots for each set of values (in the order of the flattened arrays)
+
+        Raises:
+            ValueError: if values are missing for some of the variables
+    """
+    import numpy as np
+    from sympy import Symbol
+    from .compiled import get_compiled_function
+
+    f = _equation(expression)
+    variable = Symbol(str(variable)) if isinstance(variable, str) else variable
+    others = sorted(f.free_symbols - {variable}, key=str)
+
+    missing = [str(var) for var in others if str(var) not in given]
+    if missing:
+        raise ValueError(
+            f"Values for {missing} are needed to solve numerically for {variable}"
+        )
+    logger.debug(f"FIND ROOTS of {f} for {variable} in {interval}")
+
+    function = get_compiled_function(
+        [f, f.diff(variable)], [variable, *others], backend=backend
+    )
+
+    values = np.broadcast_arrays(
+        *[np.asarray(given[str(var)], dtype=float) for var in others]
+    )
+    vectorized = any(np.ndim(given[str(var)]) for var in others)
+    # (n sets of values, 1), broadcasted against the grid
+    params = [v.reshape(-1, 1) for v in values]
+    n_sets = params[0].shape[0] if params else 1
+
+    with stage("roots"), np.errstate(all="ignore"):
+        grid = np.linspace(*interval, n_points)
+        fx = np.broadcast_to(function(grid, *params)[0], (n_sets, n_points))
+
+        # brackets of sign changes
+        sign = np.sign(fx)
+        changes = (sign[:, :-1] * sign[:, 1:] < 0) & np.isfinite(
+            fx[:, :-1] * fx[:, 1:]
+        )
+        sets, idx = np.nonzero(changes)
+        a, b = grid[idx], grid[idx + 1]
+        x, fr = _refine(
+            function,
+            (a + b) / 2,
+            a,
+            b,
+            [p[sets, 0] for p in params],
+            tol,
+            max_iter,
+        )
+        # discard sign changes at poles (e.g. tan(x) at pi/2)
+        bound = np.minimum(np.abs(fx[sets, idx]), np.abs(fx[sets, idx + 1]))
+        valid = np.abs(fr) <= bound
+        roots, roots_sets = [x[valid]], [sets[valid]]
+
+        # roots on the grid and roots without sign changes (local minima of |f|)
+        absf = np.abs(fx)
+        minima = np.zeros_like(changes[:, :-1])
+        minima |= (absf[:, 1:-1] <= absf[:, :-2]) & (
+            absf[:, 1:-1] <= absf[:, 2:]
+        )
+        minima &= ~changes[:, :-1] & ~changes[:, 1:]
+        sets, idx = np.nonzero(minima)
+        x, fr = _refine(
+            function,
+            grid[idx + 1],
+            None,
+            None,
+            [p[sets, 0] for p in params],
+            tol,
+            max_iter,
+        )
+        scale = np.maximum(np.nanmax(absf, axis=1), 1)[sets]
+        valid = (
+            (np.abs(fr) <= 1e-9 * scale)
+            & (x >= interval[0])
+            & (x <= interval[1])
+        )
+        exact = sign[:, [0, -1]] == 0
+        roots += [x[valid], grid[[0, -1]][np.nonzero(exact)[1]]]
+        roots_sets += [sets[valid], np.nonzero(exact)[0]]
+
+        roots, roots_sets = np.concatenate(roots), np.concatenate(roots_sets)
+        found = [
+            _unique(roots[roots_sets == n], np.sqrt(tol))
+            for n in range(n_sets)
+        ]
+
+    return found if vectorized else found[0]
+
+
+def find_system_roots(
+    equations,
+    variables,
+    interval=(-10, 10),
+    n_starts=64,
+    tol=1e-12,
+    max_iter=100,
+    backend="numpy",
+    seed=0,
+    **given,
+):
+    """
+        Finds real roots of a system of equations with Newton's method,
+        started from many points in a box at once.
+
+        Arguments:
+            equations: list of sympy expressions f, for the equations f = 0
+            variables: list of sympy symbols. Unknowns to solve for
+            interval: tuple of two floats. Interval (for each unknown) in which roots are searched
+            n_starts: int. Number of random starting points
+            tol: float. Relative tolerance on the roots' values
+            max_iter: int. Maximum number of Newton iterations
+            backend: str. Backend to compile the equations with, see mathcli.compiled
+            seed: int. Seed of the random starting points
+            given: kwargs. Values of all other variables in the equations
+
+        Returns:
+            roots: np.ndarray with shape (n roots, n unknowns), with unique roots sorted
+                lexicographically. Roots are not guaranteed to be all the roots in the box
+
+        Raises:
+            ValueError: if values are missing for some of the variables
+    """
+    import numpy as np
+    from sympy import Matrix
+    from .compiled import get_compiled_function
+
+    functions = Matrix(equations)
+    others = sorted(
+        set().union(*[f.free_symbols for f in equations]) - set(variables),
+        key=str,
+    )
+    missing = [str(var) for var in others if str(var) not in given]
+    if missing:
+        raise ValueError(
+            f"Values for {missing} are needed to solve numerically for {variables}"
+        )
+    logger.debug(f"FIND SYSTEM ROOTS of {equations} for {variables}")
+
+    n_equations, n_variables = len(equations), len(variables)
+    function = get_compiled_function(
+        list(functions) + list(functions.jacobian(variables)),
+        [*variables, *others],
+        backend=backend,
+    )
+    params = [float(given[str(var)]) for var in others]
+
+    def evaluate(x):
+        out = function(*x.T, *params).T
+        return (
+            out[:, :n_equations],
+            out[:, n_equations:].reshape(-1, n_equations, n_variables),
+        )
+
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(*interval, size=(n_starts, n_variables))
+
+    with stage("roots"), np.errstate(all="ignore"):
+        fx, _ = evaluate(x)
+        scale = max(np.nanmedian(np.abs(fx)), 1)
+
+        for _ in range(max_iter):
+            fx, jacobian = evaluate(x)
+            finite = np.isfinite(fx).all(axis=1) & np.isfinite(jacobian).all(
+                axis=(1, 2)
+            )
+            step = np.zeros_like(x)
+            # least squares steps, the jacobian may be singular or not square
+            step[finite] = (
+                np.linalg.pinv(jacobian[finite]) @ fx[finite][..., None]
+            )[..., 0]
+            x = np.where(finite[:, None], x - step, np.nan)
+
+            size = np.linalg.norm(step, axis=1)
+            if np.all(
+                ~finite | (size <= tol * (1 + np.linalg.norm(x, axis=1)))
+            ):
+                break
+
+        fx, _ = evaluate(x)
+        valid = (
+            np.isfinite(x).all(axis=1)
+            & (np.abs(fx).max(axis=1) <= 1e-9 * scale)
+            & ((x >= interval[0]) & (x <= interval[1])).all(axis=1)
+        )
+        x = x[valid]
+
+    roots = []
+    for root in x[np.lexsort(x.T[::-1])]:
+        if not roots or np.linalg.norm(root - roots[-1]) > np.sqrt(tol) * (
+            1 + np.linalg.norm(root)
+        ):
+            roots.append(root)
+    return np.array(roots).reshape(-1, n_variables)
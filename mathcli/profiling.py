@@ -0,0 +1,165 @@
+from contextlib import contextmanager, nullcontext
+import time
+
+"""
+    Timing instrumentation for mathcli's hot paths.
+    The time spent in each stage of an operation is recorded:
+        parse:    parsing expression strings to sympy
+        eval:     numerical evaluation of expressions (evalf)
+        lambdify: generating numpy functions from expressions
+        bind:     substituting values of some of the variables (see Expression.bind)
+        compile:  compiling expressions to native code (see mathcli.compiled)
+        roots:    finding roots of equations numerically (see mathcli.numeric)
+        sympy:    sympy operations (simplify, solve, doit...)
+        unicode:  converting expressions to unicode strings
+        render:   rendering results to the terminal
+
+    Stages can be nested (e.g. render includes the unicode conversion
+    of the expressions being rendered), so times are inclusive.
+    When profiling is disabled (the default) stage() returns a shared
+    no-op context manager, so instrumentation has no measurable cost.
+
+        from mathcli import profiling, math
+
+        with profiling.profile() as timings:
+            math.simplify('(x^2 - 1)/(x - 1)')
+        print(timings)  # {'parse': {'time': 0.002, 'calls': 3}, ...}
+"""
+
+enabled = False
+
+# stage name -> [total time in seconds, number of calls]
+_timings = {}
+
+_disabled = nullcontext()
+
+
+class _Stage(object):
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        elapsed = time.perf_counter() - self.start
+        timing = _timings.setdefault(self.name, [0.0, 0])
+        timing[0] += elapsed
+        timing[1] += 1
+
+
+def stage(name):
+    """
+        Context manager timing a stage, if profiling is enabled.
+
+        Arguments:
+            name: str. Name of the stage (e.g. 'parse')
+    """
+    if not enabled:
+        return _disabled
+    return _Stage(name)
+
+
+def enable():
+    """
+        Enables profiling and resets the timings
+    """
+    global enabled
+    enabled = True
+    reset()
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    _timings.clear()
+
+
+def breakdown():
+    """
+        Returns the timings recorded so far.
+
+        Returns:
+            dict of stage name -> dict with total 'time' (seconds) and number of 'calls'
+    """
+    return {
+        name: dict(time=total, calls=calls)
+        for name, (total, calls) in _timings.items()
+    }
+
+
+@contextmanager
+def profile():
+    """
+        Context manager profiling the code it wraps. It yields
+        a dictionary which is filled with the timings breakdown
+        (see breakdown) once the context exits.
+    """
+    timings = {}
+    enable()
+    try:
+        yield timings
+    finally:
+        timings.update(breakdown())
+        disable()
+
+
+@contextmanager
+def cprofile(filepath):
+    """
+        Context manager running the code it wraps under cProfile
+        and saving the stats to a file, to be inspected with pstats
+        (e.g. python -m pstats file) or tools like snakeviz.
+
+        Arguments:
+            filepath: str, Path. Path to the stats file
+    """
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(str(filepath))
+
+
+def report(timings, total=None):
+    """
+        Creates a rich Table showing a timings breakdown.
+
+        Arguments:
+            timings: dict. Timings breakdown, see breakdown
+            total: float, optional. Total time in seconds, to show each stage's share of it
+
+        Returns:
+            rich.table.Table
+    """
+    from rich.table import Table
+    from mathcli import theme
+
+    tb = Table(box=None, title="Profile", title_justify="left")
+    tb.add_column("stage", style=f"bold {theme.variable}")
+    tb.add_column("calls", justify="right")
+    tb.add_column("time (ms)", justify="right")
+    if total:
+        tb.add_column("%", justify="right", style="dim")
+
+    for name, timing in sorted(
+        timings.items(), key=lambda item: item[1]["time"], reverse=True
+    ):
+        row = [name, str(timing["calls"]), f"{timing['time'] * 1000:.2f}"]
+        if total:
+            row.append(f"{timing['time'] / total * 100:.1f}")
+        tb.add_row(*row)
+
+    if total:
+        tb.add_row("[dim]total", "", f"[dim]{total * 1000:.2f}", "")
+    return tb
@@ -1,11 +1,13 @@
-from pyinspect import Report
 from rich.table import Table
+from rich.panel import Panel
+from rich.text import Text
 from sympy import init_printing
+import time
 
 from ._utils import is_number, fmt_number
 from .expression import Expression
 from mathcli import theme
-from .theme import console, Highlighter
+from .theme import highlighter
 
 init_printing(use_unicode=True)
 
@@ -40,32 +42,90 @@ def values_table(values):
     return tb
 
 
-class Result(Report):
+def matrix_table(matrix, columns, rows):
+    """
+        Creates a rich Table showing a matrix of expressions
+        (e.g. a Jacobian matrix)
+
+        Arguments:
+            matrix: list of lists of expressions (str or sympy)
+            columns: list of str. Columns labels
+            rows: list of str. Rows labels
+
+        Return:
+            rich.table.Table with the matrix
+    """
+    tb = Table(box=None, show_lines=False, show_header=True)
+    tb.add_column()
+    for column in columns:
+        tb.add_column(
+            f"[{theme.variable}]" + str(column), justify="center",
+        )
+
+    for label, row in zip(rows, matrix):
+        tb.add_row(
+            f"[dim bold]{label}",
+            *[
+                theme.console.render_str(
+                    Expression(entry).unicode, highlighter=highlighter
+                )
+                for entry in row
+            ],
+        )
+    return tb
+
+
+class Result(object):
     width = 300
 
     def __init__(self, expression=None, footer=None, **kwargs):
         """
-            pyinspect.panels.Report subclass showing
+            Rich renderable panel (in the style of pyinspect.panels.Report) showing
             the results of an operation from mathcli.math
 
             Arguments:
                 expression: instance of Expression.
                 footre: str, name to add to the panel's footer
         """
-        Report.__init__(
-            self,
-            dim=theme.result_panel_footer,
-            color=theme.result_panel,
-            accent=theme.result_panel,
-            show_info=True,
-        )
+        self.dim = theme.result_panel_footer
+        self.color = theme.result_panel
         self._type = f"[b]{footer}[/b]"
 
+        self.tb = Table(box=None, show_lines=None, show_edge=None)
+        self.tb.add_column()
+
         self.expression = expression
 
         if expression:
             self.add_expression(**kwargs)
 
+    def __rich_console__(self, *args):
+        """
+            Yields the panel elements for printing in rich console
+        """
+        yield Panel.fit(
+            self.tb,
+            width=self.width,
+            border_style=self.dim,
+            padding=(0, 2, 1, 2),
+        )
+        yield f"[dim {self.color}]   {self._type} at {time.strftime('%H:%M:%S')}"
+
+    def add(self, obj, *style):
+        """
+            Add a row to the panel, either a string
+            with rich markup or a rich renderable (style='rich')
+        """
+        if not style or style[0] == "text":
+            obj = Text.from_markup(obj)
+        self.tb.add_row(obj)
+
+    def spacer(self):
+        """
+            Add an empty row to the panel
+        """
+        self.add("")
+
     def add_expression(
         self,
         expression=None,
@@ -123,7 +183,7 @@ class Result(Report):
         # add to report
         self.add(f"[{theme.text_accent}]{message}:")
         self.add(
-            console.render_str(string, highlighter=Highlighter()), "rich",
+            theme.console.render_str(string, highlighter=highlighter), "rich",
         )
 
         self.spacer()
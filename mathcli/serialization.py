@@ -0,0 +1,203 @@
+import json
+
+"""
+    Compact serialization of sympy expressions, so that parsed expressions
+    can be stored (e.g. in the results cache) and sent to other processes
+    without having to parse them again: rebuilding an expression from
+    its serialized tree is much faster than sympy's parse_expr.
+
+    Expressions are serialized as JSON objects like:
+        {"types": ["Symbol", "Integer", "Pow", "Add"],
+         "nodes": [[0, "x"], [1, 2], [2, 0, 1], [3, 2, 0]]}
+    for x**2 + x. Each node has the index of its type followed by either
+    the indices of its arguments (nodes listed before it) or, for atoms, its
+    value (e.g. a symbol's name). The last node is the expression itself.
+    Nodes are hash-consed: equal subtrees are stored only once (above,
+    x is stored once for both terms).
+
+    Expressions are rebuilt with sympy's evaluation turned off, so
+    unevaluated expressions (e.g. as parsed by mathcli) are kept as they are.
+"""
+
+# type names of undefined functions, e.g. f(x)
+_function_prefix = "Function:"
+
+
+def _type_name(cls):
+    """
+        Returns the name used to serialize nodes of a sympy class:
+        its name if it's in sympy's namespace, otherwise its module and name
+    """
+    import sympy
+
+    if getattr(sympy, cls.__name__, None) is cls:
+        return cls.__name__
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _get_type(name):
+    """
+        Returns the sympy class (or function to rebuild atoms)
+        given its name, see _type_name
+    """
+    import sympy
+    from importlib import import_module
+
+    if name.startswith(_function_prefix):
+        return sympy.Function(name[len(_function_prefix) :])
+    if ":" not in name:
+        return getattr(sympy, name)
+
+    module, qualname = name.split(":")
+    if module.split(".")[0] != "sympy":
+        raise ValueError(f"Can't deserialize non sympy type: {name}")
+    obj = import_module(module)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _node(expression, types, args):
+    """
+        Returns the serialized node of an expression,
+        given the indices of its arguments' nodes
+    """
+    from sympy import S, Symbol, Dummy, Integer, Rational, Float
+    from sympy.core.function import AppliedUndef
+
+    def type_index(name):
+        return types.setdefault(name, len(types))
+
+    cls = type(expression)
+    if isinstance(expression, AppliedUndef):
+        return [type_index(_function_prefix + cls.__name__), *args]
+    elif args or not expression.is_Atom:
+        return [type_index(_type_name(cls)), *args]
+
+    # atoms
+    if isinstance(expression, Dummy):
+        return [
+            type_index("Dummy"),
+            expression.name,
+            expression.dummy_index,
+            _assumptions(expression),
+        ]
+    elif isinstance(expression, Symbol):
+        assumptions = _assumptions(expression)
+        node = [type_index(_type_name(cls)), expression.name]
+        return node + [assumptions] if assumptions else node
+    elif getattr(S, cls.__name__, None) is expression:
+        # singletons, e.g. pi, oo, 1/2
+        return [type_index("S." + cls.__name__)]
+    elif isinstance(expression, Integer):
+        return [type_index("Integer"), int(expression)]
+    elif isinstance(expression, Rational):
+        return [type_index("Rational"), expression.p, expression.q]
+    elif isinstance(expression, Float):
+        return [type_index("Float"), list(expression._mpf_), expression._prec]
+    raise TypeError(f"Can't serialize {cls.__name__}: {expression}")
+
+
+def _assumptions(symbol):
+    """
+        Returns the assumptions a symbol was created with (but commutative)
+    """
+    assumptions = getattr(symbol, "_assumptions_orig", symbol.assumptions0)
+    return {
+        k: v for k, v in assumptions.items() if k != "commutative" or not v
+    }
+
+
+def dumps(expression):
+    """
+        Serializes a sympy expression
+
+        Arguments:
+            expression: sympy expression
+
+        Returns:
+            str. JSON with the expression's (hash-consed) tree
+    """
+    types, nodes, index = {}, [], {}
+
+    # iterative post order traversal, so that deep trees don't hit the recursion limit
+    stack = [(expression, False)]
+    while stack:
+        node, visited = stack.pop()
+        if node in index:
+            continue
+        if not visited:
+            stack.append((node, True))
+            stack.extend((arg, False) for arg in reversed(node.args))
+            continue
+
+        index[node] = len(nodes)
+        nodes.append(_node(node, types, [index[arg] for arg in node.args]))
+
+    return json.dumps(
+        dict(types=list(types), nodes=nodes), separators=(",", ":")
+    )
+
+
+def loads(data):
+    """
+        Rebuilds a sympy expression serialized with dumps
+
+        Arguments:
+            data: str. Serialized expression
+
+        Returns:
+            sympy expression
+
+        Raises:
+            ValueError: if the data is not a serialized expression
+    """
+    from sympy import S, Dummy, Symbol, Integer, Rational, Float
+    from sympy.core.parameters import evaluate
+    from sympy.concrete.expr_with_limits import ExprWithLimits
+
+    try:
+        data = json.loads(data)
+        types, nodes = data["types"], data["nodes"]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Not a serialized expression")
+
+    singletons = {
+        n: getattr(S, name[2:])
+        for n, name in enumerate(types)
+        if name.startswith("S.")
+    }
+    classes = [
+        None if n in singletons else _get_type(name)
+        for n, name in enumerate(types)
+    ]
+
+    built = []
+    with evaluate(False):
+        for type_index, *args in nodes:
+            cls = classes[type_index]
+            if type_index in singletons:
+                built.append(singletons[type_index])
+            elif cls is Dummy:
+                name, dummy_index, assumptions = args
+                built.append(
+                    Dummy(name, dummy_index=dummy_index, **assumptions)
+                )
+            elif isinstance(cls, type) and issubclass(cls, Symbol):
+                built.append(
+                    cls(args[0], **(args[1] if len(args) > 1 else {}))
+                )
+            elif cls is Integer:
+                built.append(Integer(args[0]))
+            elif cls is Rational:
+                built.append(Rational(*args))
+            elif cls is Float:
+                built.append(Float._new(tuple(args[0]), args[1]))
+            elif issubclass(cls, ExprWithLimits):
+                # integrals, sums... aren't evaluated when created, but
+                # with evaluation off they change their arguments (e.g. 1*x)
+                with evaluate(True):
+                    built.append(cls(*[built[n] for n in args]))
+            else:
+                built.append(cls(*[built[n] for n in args]))
+    return built[-1]
@@ -0,0 +1,146 @@
+from contextlib import redirect_stdout, redirect_stderr
+import socketserver
+import json
+import io
+import os
+
+from ._log import logger
+from .client import socket_path, send
+
+"""
+    Daemon keeping sympy loaded and mathcli's caches warm.
+    It listens on a Unix socket for commands forwarded by mathcli.client
+    and runs them with the same Typer app used by the command line interface,
+    returning the rendered output.
+"""
+
+
+def run_command(argv, cwd=None, color=False, width=80):
+    """
+        Runs a command line command in process, capturing its output.
+
+        Arguments:
+            argv: list of str. Command line arguments (e.g. ['calc', '1+1'])
+            cwd: str, optional. Working directory to run the command in
+            color: bool. If true the output includes terminal colors
+            width: int. Width of the terminal the output is shown in
+
+        Returns:
+            output: str. The command's output
+            exit_code: int
+    """
+    from mathcli import theme
+    from mathcli.cli import app
+
+    output = io.StringIO()
+    previous_console = theme.console
+    console = theme.set_console(file=output, force_terminal=color, width=width)
+
+    previous_cwd = os.getcwd()
+    try:
+        if cwd is not None:
+            os.chdir(cwd)
+        with redirect_stdout(output), redirect_stderr(output):
+            app(argv, prog_name="math")
+        exit_code = 0
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else 1
+    except Exception:
+        console.print_exception()
+        exit_code = 1
+    finally:
+        os.chdir(previous_cwd)
+        theme.set_console(previous_console)
+
+    return output.getvalue(), exit_code
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        """
+            Handles a single JSON request, see mathcli.client.forward
+        """
+        request = json.loads(self.rfile.readline())
+
+        if request.get("ping"):
+            response = dict(output="", exit_code=0)
+        elif request.get("shutdown"):
+            response = dict(output="mathcli daemon stopped\n", exit_code=0)
+            self.server.running = False
+        else:
+            logger.debug(f"DAEMON running: {request['argv']}")
+            output, exit_code = run_command(
+                request["argv"],
+                cwd=request.get("cwd"),
+                color=request.get("color", False),
+                width=request.get("width", 80),
+            )
+            response = dict(output=output, exit_code=exit_code)
+
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class Server(socketserver.UnixStreamServer):
+    def __init__(self, path=None):
+        """
+            Unix socket server running mathcli commands,
+            requests are handled one at a time.
+
+            Arguments:
+                path: str, optional. Path to the socket
+        """
+        self.path = path or socket_path()
+        self.running = True
+
+        if os.path.exists(self.path):
+            if send(dict(ping=True), path=self.path) is not None:
+                raise RuntimeError(
+                    f"A mathcli daemon is already running at {self.path}"
+                )
+            # stale socket left by a daemon that didn't shut down cleanly
+            os.remove(self.path)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        socketserver.UnixStreamServer.__init__(self, self.path, RequestHandler)
+        os.chmod(self.path, 0o600)
+
+    def serve(self):
+        """
+            Handles requests until a shutdown request is received
+        """
+        try:
+            while self.running:
+                self.handle_request()
+        finally:
+            self.server_close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def serve(path=None):
+    """
+        Starts the daemon: imports sympy and mathcli's modules
+        and handles requests until stopped.
+
+        Arguments:
+            path: str, optional. Path to the socket
+    """
+    # import everything upfront so that requests are fast
+    from mathcli import math, cli  # noqa: F401
+
+    server = Server(path)
+    print(f"mathcli daemon listening on {server.path}")
+    server.serve()
+
+
+def stop(path=None):
+    """
+        Stops the daemon listening on a socket, if any.
+
+        Arguments:
+            path: str, optional. Path to the socket
+
+        Returns:
+            stopped: bool. False if no daemon was running
+    """
+    return send(dict(shutdown=True), path=path) is not None
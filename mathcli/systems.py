@@ -0,0 +1,275 @@
+from ._log import logger
+from .profiling import stage
+
+"""
+    Systems of equations, solved for several unknowns at once.
+
+    Linear systems are turned into a sparse matrix of coefficients (one
+    pass over each equation's terms, so that systems with hundreds of
+    unknowns are cheap to set up). If all coefficients are numbers the
+    system is solved with numpy (or scipy.sparse for large sparse systems,
+    if scipy is installed), otherwise symbolically with sympy.linsolve.
+    Nonlinear systems are solved with sympy.nonlinsolve, see mathcli.math.solve_system,
+    and numerically with mathcli.numeric.find_system_roots as a fallback.
+"""
+
+# systems with at least this many unknowns and a small enough
+# fraction of non zero coefficients are solved as sparse systems
+sparse_size = 200
+sparse_density = 0.05
+
+
+def has_scipy():
+    try:
+        import scipy.sparse.linalg  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def parse_equations(equations):
+    """
+        Parses one or several equations.
+
+        Arguments:
+            equations: str, list. Either a list of equations (strings or sympy
+                expressions) or a string with equations separated by ';'.
+                Equations without a rhs are assumed to be equal to 0
+
+        Returns:
+            list of sympy expressions f, such that the equations are f = 0
+    """
+    from sympy import Eq, sympify
+    from .expression import parse, clean
+
+    if isinstance(equations, str):
+        equations = [e for e in equations.split(";") if e.strip()]
+    elif not isinstance(equations, (list, tuple)):
+        equations = [equations]
+
+    # strings are parsed all at once, as a tuple, which is much faster
+    # than parsing each equation on its own for large systems
+    strings = [e for e in equations if isinstance(e, str)]
+    for string in strings:
+        if string.count("=") > 1:
+            raise ValueError(f"Failed to parse equation: {string}")
+    parsed = iter(
+        parse(
+            clean(
+                "("
+                + ", ".join(
+                    "({}) - ({})".format(*s.split("=")) if "=" in s else s
+                    for s in strings
+                )
+                + ",)"
+            )
+        )
+        if strings
+        else []
+    )
+
+    functions = []
+    for equation in equations:
+        equation = (
+            next(parsed) if isinstance(equation, str) else sympify(equation)
+        )
+        if isinstance(equation, Eq):
+            equation = equation.lhs - equation.rhs
+        functions.append(equation.doit())
+    return functions
+
+
+def parse_unknowns(solve_for, equations, given=None):
+    """
+        Returns the unknowns to solve a system of equations for.
+
+        Arguments:
+            solve_for: str, list, optional. List of variables names or a string with names
+                separated by commas or spaces (e.g. 'x, y'). If not given all the
+                variables in the equations without a given value are used, sorted by name
+            equations: list of sympy expressions
+            given: dict, optional. Values of variables not solving for
+
+        Returns:
+            list of sympy symbols
+    """
+    from sympy import Symbol
+
+    given = given or {}
+    variables = {str(var): var for e in equations for var in e.free_symbols}
+    if not solve_for:
+        return [
+            variables[name] for name in sorted(variables) if name not in given
+        ]
+
+    if isinstance(solve_for, str):
+        solve_for = solve_for.replace(",", " ").split()
+    return [variables.get(str(name), Symbol(str(name))) for name in solve_for]
+
+
+def linear_system(equations, unknowns):
+    """
+        Extracts the coefficients of a linear system of equations.
+
+        Arguments:
+            equations: list of sympy expressions f, for the equations f = 0
+            unknowns: list of sympy symbols
+
+        Returns:
+            coefficients: dict of (equation index, unknown index) -> coefficient
+            constants: list with the rhs of each equation
+            None if the equations are not linear in the unknowns
+    """
+    from sympy import Add, S, expand
+
+    index = {var: n for n, var in enumerate(unknowns)}
+    coefficients, constants = {}, []
+    for row, equation in enumerate(equations):
+        constant = S.Zero
+        for term in Add.make_args(expand(equation)):
+            # only look for the few unknowns in the term
+            variables = [var for var in term.free_symbols if var in index]
+            if not variables:
+                constant -= term
+                continue
+            elif len(variables) > 1:
+                return None
+
+            coefficient, factor = term.as_independent(
+                variables[0], as_Add=False
+            )
+            if factor != variables[0]:
+                return None
+            key = (row, index[factor])
+            coefficients[key] = coefficients.get(key, S.Zero) + coefficient
+        constants.append(constant)
+
+    return {k: c for k, c in coefficients.items() if c != 0}, constants
+
+
+def _solve_numeric(coefficients, constants, n_unknowns):
+    """
+        Solves a square linear system with numeric coefficients.
+
+        Returns:
+            np.ndarray with the value of each unknown
+
+        Raises:
+            numpy.linalg.LinAlgError: if the system is singular
+    """
+    import numpy as np
+
+    rows, columns = np.array(list(coefficients), dtype=int).reshape(-1, 2).T
+    values = np.array([float(c) for c in coefficients.values()])
+    b = np.array([float(c) for c in constants])
+
+    density = len(values) / n_unknowns ** 2
+    if n_unknowns >= sparse_size and density <= sparse_density and has_scipy():
+        from scipy.sparse import csc_matrix
+        from scipy.sparse.linalg import spsolve
+
+        logger.debug(f"SYSTEM solving sparse {n_unknowns}x{n_unknowns} system")
+        A = csc_matrix((values, (rows, columns)), shape=(n_unknowns,) * 2)
+        solution = spsolve(A, b)
+        if not np.all(np.isfinite(solution)):
+            raise np.linalg.LinAlgError("Singular matrix")
+        return solution
+
+    A = np.zeros((n_unknowns, n_unknowns))
+    np.add.at(A, (rows, columns), values)
+    return np.linalg.solve(A, b)
+
+
+def solve_linear(equations, unknowns):
+    """
+        Solves a linear system of equations.
+
+        Arguments:
+            equations: list of sympy expressions f, for the equations f = 0
+            unknowns: list of sympy symbols
+
+        Returns:
+            solutions: list of dict of unknown name -> value (float, or str for symbolic
+                solutions). Empty if the system has no solution
+            None if the equations are not linear in the unknowns
+    """
+    import numpy as np
+    from sympy import Matrix, linsolve
+
+    system = linear_system(equations, unknowns)
+    if system is None:
+        return None
+    coefficients, constants = system
+    names = [str(var) for var in unknowns]
+
+    numeric = all(c.is_number for c in coefficients.values()) and all(
+        c.is_number for c in constants
+    )
+    if numeric and len(equations) == len(unknowns):
+        try:
+            with stage("eval"):
+                values = _solve_numeric(coefficients, constants, len(unknowns))
+            return [dict(zip(names, values.tolist()))]
+        except (np.linalg.LinAlgError, TypeError):
+            # singular (or complex) system
+            pass
+
+    # symbolic, as an augmented matrix
+    A = Matrix.zeros(len(equations), len(unknowns))
+    for (row, column), coefficient in coefficients.items():
+        A[row, column] = coefficient
+    with stage("sympy"):
+        solution = linsolve((A, Matrix(constants)), unknowns)
+    if not solution:
+        return []
+
+    # values of underdetermined systems depend on the free unknowns
+    return [
+        {name: str(value) for name, value in zip(names, list(solution)[0])}
+    ]
+
+
+def nonlinear_solutions(solution, equations, unknowns):
+    """
+        Parses the output of sympy.nonlinsolve, keeping
+        only the solutions which satisfy the equations.
+
+        Arguments:
+            solution: sympy set returned by nonlinsolve
+            equations: list of sympy expressions f, for the equations f = 0
+            unknowns: list of sympy symbols
+
+        Returns:
+            list of list of str. The value of each unknown for each solution
+
+        Raises:
+            NotImplementedError: if the solutions can't be expressed as a finite set of
+                tuples of expressions, or sympy's solutions don't satisfy the equations
+    """
+    from sympy import Expr, FiniteSet, Tuple, simplify
+
+    if solution.is_empty:
+        return []
+    if not isinstance(solution, FiniteSet) or not all(
+        isinstance(s, Tuple) and all(isinstance(v, Expr) for v in s)
+        for s in solution
+    ):
+        raise NotImplementedError(
+            f"Unrecognized solution: {type(solution).__name__}"
+        )
+
+    solutions = []
+    for values in solution:
+        replacements = dict(zip(unknowns, values))
+        residuals = [e.xreplace(replacements) for e in equations]
+        if all(
+            abs(r.evalf()) < 1e-9 if r.is_number else simplify(r) == 0
+            for r in residuals
+        ):
+            solutions.append([str(v) for v in values])
+
+    if not solutions:
+        raise NotImplementedError(
+            f"Could not verify the solutions: {solution}"
+        )
+    return solutions
@@ -14,34 +14,50 @@ from myterial import (
 )
 
 import rich
+import re
 from rich.highlighter import RegexHighlighter
 from rich.theme import Theme
+from rich.text import Span
 from rich.style import Style
 from rich.console import Console
 
 
 class Highlighter(RegexHighlighter):
+    """
+        Highlights expressions printed as unicode strings (see mathcli._unicode).
+        The patterns are joined in a single regular expression (an alternation of
+        named groups, one per style), so the text is scanned only once and each
+        character gets at most one style. Earlier patterns take precedence.
+    """
+
     base_style = "."
     highlights = [
-        r"(?P<variables>[xyztαβγΓδΔϵζηHθΘιIκKλΛμnuνNξΞoOπΠρPσΣτTυϒϕΦχXψΨωΩ]+)",
-        r"(?P<operator_name>\w[log]+)",
-        r"(?P<operator_name>\w[sin]+)",
-        r"(?P<operator_name>\w[cos]+)",
-        r"(?P<operator_name>\w[tan]+)",
-        r"(?P<operator_name>\w[atan]+)",
-        r"(?P<operator_name>\w[sinh]+)",
-        r"(?P<operator_name>\w[cosh]+)",
-        r"(?P<operator_name>\w[asin]+)",
-        r"(?P<operator_name>\w[acos]+)",
-        r"(?P<number>[0-9]+)",
-        r"(?P<parentheses>[()]+)",
-        r"(?P<superscript>[ˣʸᶻᵖʳˢᵗᵘᵛʷʰⁱʲᵏˡᵐⁿᵒᵃᵇᶜᵈᵉᶠᵍᴾᴿᵀᵁᵂᴴᴵᴶᴷᴸᴹᴺᴼᴬᴮᴰᴱᴳᵠᵡᵟᵞᵝ⁸⁹˂⁼˃⁰¹²³⁴⁵⁶⁷⁽⁾₉₈₇₆₅₄₃₂₁₀₋₋₊₎₍ᵨᵪᵩᵦᵧ]+)",
-        r"(?P<operators>[-+/*√ᶴ△∫∑Π]+)",
-        r"(?P<equal>[=→⇒]+)",
-        r"(?P<deriv>[∂/∂]+)",
-        r"(?P<deriv>[d/d]+)",
-        r"(?P<mathb>[∅𝒩ℂℛℋℰℒℳℚℤℍℙℝAℬℑℯℒℋℰℛℊ𝒩]+)",
+        # functions names, e.g. sin(x) and sin²(x)
+        r"(?P<operator_name>(?:(?:a(?:rc)?)?(?:sin|cos|tan|cot|sec|csc)h?"
+        r"|log|ln|exp|sqrt|Abs|sign|floor|ceiling|erfc?|gamma|factorial|Max|Min)"
+        r"(?=[⁰¹²³⁴⁵⁶⁷⁸⁹⁻]*\())",
+        r"(?P<deriv>∂)",
+        r"(?P<equal>[=→⇒≠≤≥]+)",
+        r"(?P<number>[0-9]+(?:\.[0-9]+)?)",
+        r"(?P<parentheses>[()\[\]]+)",
+        r"(?P<superscript>[ˣʸᶻᵖʳˢᵗᵘᵛʷʰⁱʲᵏˡᵐⁿᵒᵃᵇᶜᵈᵉᶠᵍᴾᴿᵀᵁᵂᴴᴵᴶᴷᴸᴹᴺᴼᴬᴮᴰᴱᴳᵠᵡᵟᵞᵝ⁸⁹˂⁼˃⁰¹²³⁴⁵⁶⁷⁽⁾⁺⁻₉₈₇₆₅₄₃₂₁₀₋₊₎₍ᵨᵪᵩᵦᵧ]+)",
+        r"(?P<operators>[-+/*⋅√ᶴ△∫∑Π∓]+)",
+        r"(?P<mathb>[∅𝒩ℂℛℋℰℒℳℚℤℍℙℝAℬℑℯℊ∞]+)",
+        r"(?P<variables>[xyztαβγΓδΔϵζηHθΘιIκKλΛμnuνNξΞoOπρPσΣτTυϒϕΦχXψΨωΩ]+)",
     ]
+    pattern = re.compile("|".join(highlights))
+
+    def highlight(self, text):
+        """
+            Highlights a rich.text.Text in place
+        """
+        append = text.spans.append
+        for match in self.pattern.finditer(text.plain):
+            append(Span(*match.span(), self.base_style + match.lastgroup))
+
+
+# shared instance, the pattern is compiled once
+highlighter = Highlighter()
 
 
 theme = Theme(
@@ -58,9 +74,28 @@ theme = Theme(
     }
 )
 
+
+def set_console(new_console=None, **kwargs):
+    """
+        Sets the console used for printing as rich's global console.
+
+        Arguments:
+            new_console: rich.console.Console, optional. If not passed a new console is created
+            kwargs: keyword arguments for rich.console.Console (e.g. file, width)
+
+        Returns:
+            the console
+    """
+    global console
+    if new_console is None:
+        new_console = Console(highlighter=highlighter, theme=theme, **kwargs)
+    console = new_console
+    rich._console = console
+    return console
+
+
 # set console for printing
-console = Console(highlighter=Highlighter(), theme=theme)
-rich._console = console
+console = set_console()
 
 
 """
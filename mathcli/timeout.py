@@ -0,0 +1,91 @@
+import multiprocessing
+
+from ._log import logger
+from .errors import OperationTimeoutError
+
+"""
+    Time budgets for expensive operations (e.g. sympy's simplify and solveset,
+    which can run unboundedly on pathological input). The operation runs in a
+    child process which is terminated if it doesn't complete in time, so that
+    the computation actually stops.
+"""
+
+
+def _get_context():
+    """
+        Forking is much faster than spawning a new interpreter
+        that has to import sympy again, use it when available.
+    """
+    try:
+        return multiprocessing.get_context("fork")
+    except ValueError:
+        return multiprocessing.get_context()
+
+
+def _run(connection, func, args, kwargs):
+    """
+        Runs func in the child process and sends
+        back either its result or the exception raised
+    """
+    try:
+        output = (True, func(*args, **kwargs))
+    except Exception as e:
+        output = (False, e)
+
+    try:
+        connection.send(output)
+    except Exception as e:
+        # the result or the exception can't be pickled
+        connection.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+    finally:
+        connection.close()
+
+
+def call_with_timeout(func, *args, timeout=None, **kwargs):
+    """
+        Calls a function, aborting it if it doesn't return within a time budget.
+
+        Arguments:
+            func: callable. Function to call, its arguments and result must be picklable
+            args: positional arguments for func
+            timeout: float, optional. Time budget in seconds, if None func is called directly
+            kwargs: keyword arguments for func
+
+        Returns:
+            the function's result
+
+        Raises:
+            OperationTimeoutError: if func doesn't return in time
+            any exception raised by func
+    """
+    if timeout is None:
+        return func(*args, **kwargs)
+
+    context = _get_context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_run, args=(sender, func, args, kwargs), daemon=True
+    )
+    process.start()
+    sender.close()
+
+    try:
+        if not receiver.poll(timeout):
+            logger.debug(f"TIMEOUT: {func.__name__} after {timeout} s")
+            process.terminate()
+            raise OperationTimeoutError(func.__name__, timeout)
+
+        try:
+            success, result = receiver.recv()
+        except EOFError:
+            process.join()
+            raise RuntimeError(
+                f"{func.__name__} exited with code {process.exitcode}"
+            )
+    finally:
+        receiver.close()
+        process.join()
+
+    if not success:
+        raise result
+    return result
@@ -6,13 +6,14 @@ with open(path.join(this_directory, "README.md"), encoding="utf-8") as f:
     long_description = f.read()
 
 requirements = [
-    "sympy",
+    "sympy>=1.9",
     "rich",
     "pyinspect",
     "typer",
     "myterial",
-    "unicodeit",
     "loguru",
+    "numpy",
+    "mpmath",
 ]
 
 setup(
@@ -27,17 +28,15 @@ setup(
         "Operating System :: Microsoft :: Windows :: Windows 10",
         "Operating System :: MacOS :: MacOS X",
         "Programming Language :: Python",
-        "Programming Language :: Python :: 3.6",
-        "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Intended Audience :: Developers",
         "Intended Audience :: Science/Research",
     ],
     install_requires=requirements,
-    extras_require={},
-    python_requires=">=3.6",
+    extras_require={"numba": ["numba"]},
+    python_requires=">=3.8",
     packages=find_namespace_packages(exclude=("tests, examples")),
-    entry_points={"console_scripts": ["math = mathcli.cli:app"]},
+    entry_points={"console_scripts": ["math = mathcli.client:main"]},
     include_package_data=True,
     url="https://github.com/FedeClaudi/mathcli",
     author="Federico Claudi",
@@ -0,0 +1,15 @@
+from mathcli import compiled
+from mathcli.cache import results
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """
+        Stores the results cache and compiled functions in a temporary
+        directory, so that tests don't write to ~/.mathcli
+    """
+    monkeypatch.setattr(results, "path", tmp_path / "cache.db")
+    monkeypatch.setattr(results, "_connection", None)
+    monkeypatch.setattr(compiled, "compiled_dir", tmp_path / "compiled")
+    return tmp_path
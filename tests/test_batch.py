@@ -0,0 +1,91 @@
+from mathcli.batch import read_jobs, run, _collect
+from mathcli.cli import app
+from typer.testing import CliRunner
+import json
+
+from tests import expressions, close
+
+
+def test_batch():
+    lines = [e["string"] for e in expressions if e["numeric"]]
+    lines += [
+        json.dumps(dict(op="calc", expression=e["string"], values=e["values"]))
+        for e in expressions
+        if not e["numeric"]
+    ]
+
+    results = list(run(read_jobs(lines)))
+    assert len(results) == len(expressions)
+    for expression, result in zip(
+        sorted(expressions, key=lambda e: not e["numeric"]), results
+    ):
+        assert close(result["result"], expression["calc_res"])
+
+
+def test_batch_errors():
+    lines = ["", '{"op": "nope", "expression": "x"}', "{not json", "3x + y"]
+
+    results = list(run(read_jobs(lines)))
+    assert [r["id"] for r in results] == [1, 2, 3]
+    assert all("error" in r for r in results)
+
+
+def test_cli_batch():
+    jobs = "\n".join(
+        [
+            '{"op": "simplify", "expression": "3x + 2x - 1"}',
+            '{"op": "derivative", "expression": "x**2", "wrt": "x"}',
+            '{"op": "solve", "expression": "3x - y", "solve_for": "y", "given": {"x": 1}}',
+        ]
+    )
+    result = CliRunner().invoke(app, ["batch"], input=jobs)
+    assert result.exit_code == 0
+
+    results = [json.loads(line) for line in result.output.splitlines()]
+    assert [r["result"] for r in results] == ["5*x - 1", "2*x", 3]
+
+
+def test_batch_parallel():
+    lines = [
+        json.dumps(dict(op="simplify", expression=e["string"]))
+        for e in expressions
+    ] + [
+        '{"op": "derivative", "expression": "x^2 + sin(x)"}',
+        '{"op": "solve", "expression": "x^2 - 4 = 0", "solve_for": "x"}',
+        '{"op": "solve", "expression": "x + y = 3; x - y = 1"}',
+    ]
+
+    serial = list(run(read_jobs(lines)))
+    assert list(run(read_jobs(lines), n_jobs=2)) == serial
+
+    unordered = run(read_jobs(lines), n_jobs=2, ordered=False)
+    assert sorted(unordered, key=lambda r: r["id"]) == serial
+
+    # '^' is a power, as when expressions are parsed by Expression
+    (output,) = run(
+        read_jobs(['{"op": "simplify", "expression": "x^2 + x^2"}']), n_jobs=2
+    )
+    assert output["result"] == "2*x**2"
+
+
+def test_batch_pool_errors():
+    from collections import deque
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    # jobs failing in the pool are reported without aborting the batch
+    failed, succeeded = Future(), Future()
+    failed.set_exception(BrokenProcessPool("worker died"))
+    succeeded.set_result(dict(id=1, op="calc", result=2))
+    pending = deque(
+        [
+            (failed, dict(id=0, op="calc", expression="x^2")),
+            (succeeded, dict(id=1, op="calc", expression="1 + 1")),
+        ]
+    )
+
+    outputs = _collect(pending, ordered=True) + _collect(pending, ordered=True)
+    assert outputs[0]["error"].startswith("BrokenProcessPool")
+    assert outputs[0]["expression"] == "x^2"
+    assert outputs[1]["result"] == 2
+    assert not pending
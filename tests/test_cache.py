@@ -0,0 +1,81 @@
+from mathcli.cache import LRUCache, ResultsCache
+from mathcli.expression import Expression, lambdified, parse, parsed
+from sympy import Symbol
+
+
+def test_lru_cache():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts b, the least recently used
+
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    assert cache.info() == dict(hits=1, misses=1, size=2, maxsize=2)
+
+
+def test_lambdified_cache():
+    lambdified.clear()
+
+    Expression("3x + y").calc(x=1, y=2)
+    assert lambdified.info()["misses"] == 1
+
+    # same canonical expression, different values: no new lambdify
+    assert Expression("y + 3*x").calc(x=2, y=3) == 9
+    assert lambdified.info()["hits"] == 1
+    assert len(lambdified) == 1
+
+
+def test_results_cache(tmp_path):
+    cache = ResultsCache(tmp_path / "cache.db", max_entries=2, evict_every=1)
+    x = Symbol("x")
+
+    assert cache.get("simplify", x) is None
+    cache.set("simplify", x, "x")
+    cache.set("solve", x, None, solve_for="x")
+
+    assert cache.get("simplify", x) == "x"
+    assert cache.get("solve", x, default="missing", solve_for="x") is None
+    assert cache.get("solve", x, default="missing", solve_for="y") == "missing"
+
+    # a third entry evicts the least recently used one
+    cache.set("doit", x, "x")
+    assert len(cache) == 2
+
+    # the database is shared with other instances
+    assert ResultsCache(tmp_path / "cache.db").get("doit", x) == "x"
+
+    # eviction only runs every few insertions
+    cache = ResultsCache(tmp_path / "lazy.db", max_entries=2, evict_every=3)
+    for n in range(5):
+        cache.set("simplify", Symbol(f"x_{n}"), "x")
+    assert len(cache) == 4
+    cache.set("simplify", Symbol("y"), "y")
+    assert len(cache) == 2
+    assert cache.get("simplify", Symbol("y")) == "y"
+
+
+def test_results_cache_decorator(tmp_path):
+    cache = ResultsCache(tmp_path / "cache.db")
+    calls = []
+
+    @cache.cached("double")
+    def double(expression):
+        calls.append(expression)
+        return str(2 * expression)
+
+    x = Symbol("x")
+    assert double(x) == double(x) == "2*x"
+    assert len(calls) == 1
+
+
+def test_parse_cache():
+    parsed.clear()
+
+    assert parse("2x + y") is parse("2x + y")
+    parse("2x + y", evaluate=False)
+    assert parsed.info()["misses"] == 2
+    assert parsed.info()["hits"] == 1
@@ -0,0 +1,56 @@
+from mathcli import compiled
+from mathcli.expression import Expression
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def compiled_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(compiled, "compiled_dir", tmp_path)
+    compiled.compiled.clear()
+    return tmp_path
+
+
+expression = "exp(-x^2/2)sin(3x)sqrt(y) + log(1 + y)"
+x = np.linspace(0, 5, 101)
+
+
+@pytest.mark.skipif(compiled.compiler() is None, reason="no C compiler")
+def test_compile_c(compiled_dir):
+    expr = Expression(expression)
+    expected = expr.calc_batch(x=x, y=2)
+
+    assert np.allclose(expr.calc_batch(backend="c", x=x, y=2), expected)
+    assert len(list(compiled_dir.glob("*.so"))) == 1
+
+    # scalars give a float
+    assert np.isclose(expr.compile("c")(1, 2), expr.calc(x=1, y=2))
+
+    # the compiled library is reused from disk
+    compiled.compiled.clear()
+    assert np.allclose(expr.calc_batch(backend="c", x=x, y=2), expected)
+    assert len(list(compiled_dir.glob("*.so"))) == 1
+
+
+def test_compile_numba(compiled_dir):
+    pytest.importorskip("numba")
+
+    expr = Expression(expression)
+    assert np.allclose(
+        expr.calc_batch(backend="numba", x=x, y=2), expr.calc_batch(x=x, y=2),
+    )
+
+
+def test_compile_fallback(compiled_dir, monkeypatch):
+    monkeypatch.setenv("CC", "no-such-compiler")
+    expr = Expression(expression)
+
+    for backend in ("auto", "c"):
+        assert np.allclose(
+            expr.calc_batch(backend=backend, x=x, y=2),
+            expr.calc_batch(x=x, y=2),
+        )
+    assert not list(compiled_dir.glob("*.so"))
+
+    with pytest.raises(ValueError):
+        expr.compile("fortran")
@@ -0,0 +1,86 @@
+from mathcli import gradient, jacobian, hessian
+from mathcli.cli import app
+import numpy as np
+import pytest
+from typer.testing import CliRunner
+
+
+def test_gradient():
+    assert gradient("x^2 y + z", show_result=False) == ["2*x*y", "x**2", "1"]
+    assert gradient("x^2 y + z", wrt="y, x", show_result=False) == [
+        "x**2",
+        "2*x*y",
+    ]
+
+
+def test_jacobian():
+    matrix = jacobian("x*y; x + y^2", show_result=False)
+    assert matrix == [["y", "x"], ["1", "2*y"]]
+    assert jacobian(["x*y", "x + y^2"], render="json") == matrix
+
+
+def test_hessian():
+    matrix = hessian("x^3 y^2", show_result=False)
+    assert matrix == [["6*x*y**2", "6*x**2*y"], ["6*x**2*y", "2*x**3"]]
+
+
+@pytest.mark.parametrize("backend", ["numpy", "auto"])
+def test_matrix_function(backend):
+    x = np.linspace(0, 1, 11)
+    y = 2.0
+
+    function = jacobian(
+        "x*y; x + y^2; exp(x)", as_function=True, backend=backend
+    )
+    values = function(x=x, y=y)
+    assert values.shape == (3, 2, 11)
+    assert np.allclose(values[0, 0], y)
+    assert np.allclose(values[2, 0], np.exp(x))
+    assert np.allclose(values[2, 1], 0)
+
+    values = gradient("x^2 y", as_function=True, backend=backend)(x=x, y=y)
+    assert values.shape == (2, 11)
+    assert np.allclose(values[1], x ** 2)
+
+    with pytest.raises(ValueError):
+        function(x=x)
+
+    # constant entries and entries depending on some of the variables
+    values = hessian("x^2 + y^2", as_function=True, backend=backend)(
+        x=x, y=np.zeros(11)
+    )
+    assert values.shape == (2, 2, 11)
+    assert np.allclose(values[0, 0], 2)
+    values = gradient("x^2 + 2y", as_function=True, backend=backend)(x=x, y=y)
+    assert values.shape == (2, 11)
+    assert np.allclose(values[1], 2)
+
+    # w.r.t. some of the variables, the others' values are needed too
+    function = gradient("x*y", wrt="x", as_function=True, backend=backend)
+    values = function(x=x, y=y)
+    assert values.shape == (1, 11)
+    assert np.allclose(values[0], y)
+    with pytest.raises(ValueError):
+        function(x=x)
+    with pytest.raises(ValueError):
+        function(x=x, y=y, z=1)
+
+
+def test_cli_matrix(tmp_path):
+    values = tmp_path / "values.csv"
+    values.write_text("x,y\n1,2\n3,4\n")
+
+    result = CliRunner().invoke(
+        app, ["jacobian", "x*y; x + y^3", "--values-file", str(values)]
+    )
+    assert result.exit_code == 0
+    assert result.output.split("\n")[:2] == ["2 1 1 12", "4 3 1 48"]
+
+    result = CliRunner().invoke(
+        app, ["gradient", "x + 2y", "--values-file", str(values)]
+    )
+    assert result.exit_code == 0
+    assert result.output.split("\n")[:2] == ["1 2", "1 2"]
+
+    result = CliRunner().invoke(app, ["hessian", "x^2 y", "--format", "plain"])
+    assert result.output == "2*y\t2*x\n2*x\t0\n"
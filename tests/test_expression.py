@@ -0,0 +1,105 @@
+from mathcli.expression import Expression
+
+
+def test_lazy_attributes():
+    expr = Expression("x^2 + y")
+    assert "value" not in expr.__dict__
+    assert "unicode" not in expr.__dict__
+    assert "variables" not in expr.__dict__
+
+    assert [str(v) for v in expr.variables] == ["x", "y"]
+    assert expr.n_variables == 2
+    assert not expr.is_solved
+    assert "value" in expr.__dict__
+
+    numeric = Expression("2 + 3")
+    assert numeric.is_solved
+    assert float(numeric.value) == 5
+
+
+def test_lambdify_cse():
+    import inspect
+    from mathcli.expression import get_lambda_function
+
+    expr = Expression("exp(2x)sqrt(x) + sin(exp(2x)sqrt(x))")
+    function = get_lambda_function(expr.expression, expr.variables)
+
+    # the shared subexpression is computed once
+    assert inspect.getsource(function).count("exp(") == 1
+    assert abs(function(1.0) - expr.calc(x=1)) < 1e-12
+
+
+def test_unicode():
+    from sympy import Symbol, Add
+    from mathcli._unicode import to_unicode
+
+    assert Expression("x^2 - 4").unicode == "x² -4"
+    assert Expression("a_1 + x_10").unicode == "a₁ +x₁₀"
+    assert Expression("sqrt(x) + log(x)").unicode == "√x +log(x)"
+    assert Expression("exp(2x) - cos(y)").unicode == "e²ˣ -cos(y)"
+
+    # signs of negative factors in unevaluated products
+    assert Expression("exp(-x^2/2)").unicode == "exp(-x²/2)"
+    assert Expression("x*(-1)*y").unicode == "-xy"
+    assert Expression("(-b)/a").unicode == "-b/a"
+    assert Expression("(-1)*(-1)").unicode == "1"
+
+    # large sums are printed in sympy's order
+    terms = [Symbol(f"x_{n}") ** 2 for n in range(1000)]
+    assert to_unicode(Add(*terms)).count("+") == 999
+
+
+def test_bind():
+    import pytest
+
+    expr = Expression("x y + y^2 + sin(z)")
+    partial = expr.bind(y=2, z=0)
+    assert partial.string == "2*x + 4"
+    assert [str(v) for v in partial.variables] == ["x"]
+    assert partial.calc(x=3) == 10
+
+    # bound expressions are cached with their lambda function
+    assert Expression("x y + y^2 + sin(z)").bind(z=0, y=2) is partial
+    assert "function" in partial.__dict__
+
+    with pytest.raises(ValueError):
+        expr.bind(w=1)
+
+
+def test_complexity():
+    expr = Expression("x y^3 + sqrt(z) = 2^x")
+    assert "complexity" not in expr.__dict__
+    assert expr.complexity == (13, 6, 4)
+    assert expr.simplify_tier == "full"
+
+    # large expressions get cheaper simplification tiers
+    terms = [f"(x^{n} - 1)/(x - 1) + sin(x)^2" for n in range(1, 40)]
+    assert Expression(" + ".join(terms[:10])).simplify_tier == "trig"
+    assert Expression(" + ".join(terms)).simplify_tier == "rational"
+
+
+def test_simplify_tier():
+    import pytest
+
+    expr = Expression("sin(x)^2 + cos(x)^2 + (x^2 - 1)/(x - 1)")
+    simplified = expr.simplify()
+    assert (simplified.tier, simplified.strategy) == ("full", "simplify")
+    assert simplified.string == "x + 2"
+
+    simplified = expr.simplify(tier="trig")
+    assert simplified.string == "x + 2"
+    assert simplified.strategy == "trigsimp/together/cancel"
+
+    simplified = expr.simplify(tier="rational")
+    assert simplified.string == "x + sin(x)**2 + cos(x)**2 + 1"
+
+    with pytest.raises(ValueError):
+        expr.simplify(tier="fast")
+
+    # small expressions are simplified fully whatever their degree, and
+    # expressions the cheaper tiers make longer are left as they are
+    expr = Expression("(x + 1)^13")
+    assert expr.simplify_tier == "full"
+    assert expr.simplify().string == "(x + 1)**13"
+    simplified = expr.simplify(tier="rational")
+    assert (simplified.string, simplified.strategy) == ("(x + 1)**13", "none")
@@ -1,8 +1,9 @@
-from mathcli import calc, simplify, derivative, solve
+from mathcli import calc, calc_batch, simplify, derivative, solve, solve_batch
 from mathcli._utils import is_number
 from mathcli.cli import app
 import pytest
 from typer.testing import CliRunner
+import numpy as np
 
 from tests import expressions, close
 
@@ -20,6 +21,18 @@ def test_calc(expression):
     ), f"exptected {expression['calc_res']} got {res}"
 
 
+@pytest.mark.parametrize("expression", expressions)
+def test_calc_batch(expression):
+    if expression["numeric"]:
+        res = calc_batch(expression["string"])
+    else:
+        values = {k: np.full(5, v) for k, v in expression["values"].items()}
+        res = calc_batch(expression["string"], **values)
+        assert res.shape == (5,)
+
+    assert np.allclose(res, expression["calc_res"], atol=0.01)
+
+
 @pytest.mark.parametrize("expression", expressions)
 def test_simplify(expression):
     simplify(expression["string"])
@@ -70,3 +83,163 @@ def test_cli(expression):
 
     runner.invoke(app, ["latex", expression["string"]])
     runner.invoke(app, ["unicode", expression["string"]])
+
+
+def test_cli_values_file(tmp_path):
+    values = tmp_path / "values.csv"
+    values.write_text("x,y\n1,2\n3,4\n")
+
+    result = runner.invoke(
+        app, ["calc", "2x + y", "--values-file", str(values)]
+    )
+    assert result.exit_code == 0
+    assert result.output.split() == ["4", "10"]
+
+    output = tmp_path / "output.npy"
+    runner.invoke(
+        app,
+        ["calc", "2x + y", "--values-file", str(values), "--output", output],
+    )
+    assert np.allclose(np.load(output), [4, 10])
+
+    # backends are validated by the cli
+    args = ["calc", "2x + y", "--values-file", str(values), "--backend"]
+    assert runner.invoke(app, args + ["numpy"]).exit_code == 0
+    result = runner.invoke(app, args + ["nunpy"])
+    assert result.exit_code == 2
+
+
+def test_solve_batch():
+    a = np.array([1, 4, -1])
+    assert np.allclose(
+        solve_batch("x^2 = a", solve_for="x", a=a),
+        [1, 2, np.nan],
+        equal_nan=True,
+    )
+    solutions = solve_batch(
+        "x^2 = a", solve_for="x", given=a[:, None], all_solutions=True
+    )
+    assert solutions.shape == (3, 2)
+    assert np.allclose(solutions[:2], [[1, -1], [2, -2]])
+
+    # x = log(-a^2 - 1) + i pi is complex for any value of a
+    solutions = solve_batch("exp(x) + a^2 + 1", solve_for="x", a=[1, 2])
+    assert np.isnan(solutions).all()
+
+    # solved numerically
+    assert np.allclose(
+        solve_batch("log(x) + a sqrt(x)", solve_for="x", a=[1, 2]),
+        [0.4948664, 0.3216515],
+    )
+
+
+def test_cli_given_file(tmp_path):
+    given = tmp_path / "given.csv"
+    given.write_text("a,b\n1,0\n4,5\n")
+
+    result = runner.invoke(
+        app,
+        [
+            "solve",
+            "x^2 = a + b",
+            "--solve-for",
+            "x",
+            "--given-file",
+            str(given),
+        ],
+    )
+    assert result.exit_code == 0
+    assert result.output.split() == ["1", "3"]
+
+
+def test_render(capsys):
+    import json
+
+    assert calc("2x + y", render="plain", x=1, y=2) == 4
+    assert capsys.readouterr().out == "4\n"
+
+    simplify("(x^2 - 1)/(x - 1)", render="json")
+    output = json.loads(capsys.readouterr().out)
+    assert output["op"] == "simplify"
+    assert output["result"] == "x + 1"
+
+    solve("3x + 2y = 1", "x", render="json", y=1)
+    output = json.loads(capsys.readouterr().out)
+    assert close(output["result"], -1 / 3)
+    assert output["given"] == dict(y=1)
+
+    with pytest.raises(ValueError):
+        derivative("x^2", render="html")
+
+
+def test_cli_format():
+    result = runner.invoke(app, ["derivative", "x^3", "--format", "plain"])
+    assert result.exit_code == 0
+    assert result.output == "3*x**2\n"
+
+
+def test_cli_simplify_tier():
+    import json
+
+    result = runner.invoke(
+        app,
+        [
+            "simplify",
+            "(x^2 - 1)/(x - 1)",
+            "--tier",
+            "rational",
+            "--format",
+            "json",
+        ],
+    )
+    assert result.exit_code == 0
+    output = json.loads(result.output)
+    assert output["result"] == "x + 1"
+    assert (output["tier"], output["strategy"]) == (
+        "rational",
+        "together/cancel",
+    )
+
+
+def test_calc_precise():
+    from mathcli._utils import fmt_precise
+
+    sqrt2 = "1.414213562373095048801688724209698078570"
+    assert str(calc("sqrt(2)", precision=40, show_result=False)) == sqrt2
+
+    # cancellation: exp(x) - 1 = x + x^2/2 + ...
+    value = calc("exp(x) - 1", precision=20, show_result=False, x=1e-10)
+    assert str(value) == "1.0000000000500000000e-10"
+
+    # bounds are guaranteed and tight to the digits requested
+    bounds = calc("pi x", interval=True, precision=30, show_result=False, x=2)
+    assert fmt_precise(bounds, 30) == (
+        "[6.28318530717958647692528676655, 6.28318530717958647692528676656]"
+    )
+
+    values = calc_batch("x/3", precision=25, x=np.array([1, 2]))
+    assert [fmt_precise(v, 25) for v in values] == [
+        "0.3333333333333333333333333",
+        "0.6666666666666666666666667",
+    ]
+
+
+def test_cli_precision():
+    result = runner.invoke(
+        app, ["calc", "sqrt(2)", "--precision", "30", "--format", "plain"]
+    )
+    assert result.exit_code == 0
+    assert result.output == "1.41421356237309504880168872421\n"
+
+    result = runner.invoke(
+        app,
+        ["calc", "1/3", "--interval", "--precision", "5", "--format", "plain"],
+    )
+    assert result.exit_code == 0
+    assert result.output == "[0.33333, 0.33334]\n"
+
+
+def test_solve_given():
+    # the given values are substituted in the symbolic solution
+    assert solve("a x + b = 0", "x", show_result=False, a=2) == "-b/2"
+    assert solve("a x + b = 0", "x", show_result=False, a=2, b=1) == -0.5
@@ -0,0 +1,80 @@
+from mathcli import solve
+from mathcli.numeric import find_roots
+from mathcli.cli import app
+import numpy as np
+import pytest
+from typer.testing import CliRunner
+
+
+@pytest.mark.parametrize(
+    "expression, roots",
+    [
+        ("x^2 - 4", [-2, 2]),
+        ("log(x) + sqrt(x)", [0.4948664145]),
+        ("sin(x) = x/3", [-2.2788626601, 0, 2.2788626601]),
+        ("x^2", [0]),
+        ("x^2 + 1", []),
+        ("tan(x)", [-np.pi, 0, np.pi]),
+    ],
+)
+def test_find_roots(expression, roots):
+    found = find_roots(expression, "x", interval=(-4, 4))
+    assert len(found) == len(roots)
+    assert np.allclose(found, roots, atol=1e-8)
+
+
+def test_find_roots_vectorized():
+    a = np.array([1, 4, 9, -1])
+    found = find_roots("x^2 = a", "x", a=a)
+    assert len(found) == 4
+    for roots, value in zip(found[:3], a[:3]):
+        assert np.allclose(roots, [-np.sqrt(value), np.sqrt(value)])
+    assert len(found[3]) == 0
+
+    with pytest.raises(ValueError):
+        find_roots("x^2 = a", "x")
+
+
+def test_solve_numeric():
+    # solveset returns a ConditionSet
+    assert np.isclose(solve("log(x) + sqrt(x)", show_result=False), 0.4948664)
+
+    roots = solve("x^2 - 4", method="numeric", all_solutions=True)
+    assert roots == [-2, 2]
+    assert solve("x^2 - 4", all_solutions=True, show_result=False) == [
+        "-2",
+        "2",
+    ]
+
+    roots = solve(
+        "exp(x) = a x",
+        solve_for="x",
+        method="numeric",
+        all_solutions=True,
+        show_result=False,
+        a=np.array([1, 3]),
+    )
+    assert roots[0] == []
+    assert np.allclose(np.exp(roots[1]), 3 * np.array(roots[1]))
+
+    with pytest.raises(NotImplementedError):
+        solve("log(x) + sqrt(x)", method="symbolic", show_result=False)
+
+
+def test_cli_solve_numeric():
+    result = CliRunner().invoke(
+        app,
+        [
+            "solve",
+            "sin(x) = x/3",
+            "--all",
+            "--interval",
+            "0, 10",
+            "--format",
+            "plain",
+        ],
+    )
+    assert result.exit_code == 0
+    assert [float(r) for r in result.stdout.split()] == pytest.approx(
+        [0, 2.2788626601]
+    )
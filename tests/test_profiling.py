@@ -0,0 +1,41 @@
+from mathcli import profiling
+from mathcli.cli import app
+from mathcli.expression import Expression, parsed
+from typer.testing import CliRunner
+
+
+def test_profile():
+    # no timings are recorded unless profiling is enabled
+    assert profiling.stage("parse") is profiling.stage("eval")
+
+    parsed.clear()
+    with profiling.profile() as timings:
+        expression = Expression("3x^2 + sin(y)")
+        expression.unicode
+        expression.calc(x=1, y=2)
+
+    assert not profiling.enabled
+    assert {"parse", "unicode", "lambdify"} <= set(timings)
+    assert timings["parse"]["calls"] >= 1
+    assert all(timing["time"] >= 0 for timing in timings.values())
+
+
+def test_cli_profile(tmp_path):
+    stats = tmp_path / "stats.prof"
+    result = CliRunner().invoke(
+        app,
+        [
+            "--profile",
+            "--profile-output",
+            str(stats),
+            "calc",
+            "2x",
+            "--v",
+            "x=1",
+        ],
+    )
+    assert result.exit_code == 0
+    assert "Profile" in result.output
+    assert "lambdify" in result.output
+    assert stats.exists()
+    assert not profiling.enabled
@@ -0,0 +1,67 @@
+import json
+import pytest
+from sympy import (
+    Derivative,
+    Dummy,
+    Float,
+    Function,
+    Integral,
+    S,
+    Symbol,
+    srepr,
+)
+
+from mathcli.cache import load_last, to_cache
+from mathcli.expression import Expression, parse, parsed
+from mathcli.serialization import dumps, loads
+
+x = Symbol("x")
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        parse("3*x + log(y) - sqrt(10) + cos(pi)", evaluate=False),
+        parse("x**2 - x/3 + 0.1 = 2", evaluate=False),
+        Derivative(x ** 3, (x, 2)),
+        Function("f")(x) + Integral(x ** 2, (x, 0, 1)),
+        Float("1.234567890123456789012345", 30) * S.Half + S.Infinity,
+        Symbol("z", positive=True) * Dummy("n"),
+    ],
+)
+def test_round_trip(expression):
+    loaded = loads(dumps(expression))
+    assert loaded == expression
+    assert srepr(loaded) == srepr(expression)
+
+
+def test_shared_subtrees():
+    expression = parse("sin(x^2)^2 + sin(x^2)".replace("^", "**"))
+    nodes = json.loads(dumps(expression))["nodes"]
+
+    # x, 2, x^2, sin(x^2), sin(x^2)^2 and the sum
+    assert len(nodes) == 6
+
+    with pytest.raises(ValueError):
+        loads("x**2")
+
+
+def test_expression_dumps():
+    expression = Expression("3x^2 + y")
+    loaded = Expression.loads(expression.dumps())
+    assert loaded.expression == expression.expression
+    assert loaded.string == "3*x**2 + y"
+
+
+def test_last_tree(monkeypatch, tmp_path):
+    from mathcli.cache import ResultsCache
+
+    monkeypatch.setattr(
+        "mathcli.cache.results", ResultsCache(tmp_path / "c.db")
+    )
+    to_cache("2*x + 1")
+    parsed.clear()
+
+    # the last result is loaded already parsed
+    assert load_last() == "2*x + 1"
+    assert ("2*x + 1", False) in parsed
@@ -0,0 +1,44 @@
+from mathcli.client import forward, send
+from mathcli.server import Server, stop
+import threading
+import pytest
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    path = str(tmp_path / "mathcli.sock")
+    server = Server(path)
+    thread = threading.Thread(target=server.serve)
+    thread.start()
+
+    yield path
+
+    stop(path)
+    thread.join()
+
+
+def test_daemon(daemon):
+    response = send(dict(argv=["latex", "x^2"]), path=daemon)
+    assert response == dict(output="$$x^{2}$$\n", exit_code=0)
+
+    response = send(
+        dict(argv=["calc", "3x + y", "--v", "x=1 y=2"]), path=daemon
+    )
+    assert response["exit_code"] == 0
+    assert "=5" in response["output"]
+
+    response = send(dict(argv=["not-a-command"]), path=daemon)
+    assert response["exit_code"] != 0
+
+
+def test_no_daemon(tmp_path):
+    assert send(dict(ping=True), path=str(tmp_path / "mathcli.sock")) is None
+
+
+def test_forward_local_commands(daemon):
+    # batch and serve read stdin or block, they always run locally
+    assert forward(["batch"], path=daemon) is None
+    assert forward(["--profile", "batch"], path=daemon) is None
+    argv = ["--profile-output", "out.prof", "serve"]
+    assert forward(argv, path=daemon) is None
+    assert forward(["latex", "x^2"], path=daemon) == 0
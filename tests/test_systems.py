@@ -0,0 +1,84 @@
+from mathcli import solve, solve_system
+from mathcli.cli import app
+from mathcli.systems import parse_equations, linear_system
+import numpy as np
+import pytest
+from typer.testing import CliRunner
+
+
+def test_parse_equations():
+    equations = parse_equations("x + y = 3; x - y")
+    assert [str(e) for e in equations] == ["x + y - 3", "x - y"]
+    assert parse_equations(["x^2 = 2", equations[1]])[1] == equations[1]
+
+    x, y = sorted(equations[0].free_symbols, key=str)
+    assert linear_system(equations, [x, y]) == (
+        {(0, 0): 1, (0, 1): 1, (1, 0): 1, (1, 1): -1},
+        [3, 0],
+    )
+    assert linear_system(parse_equations("x y = 1; x = 2"), [x, y]) is None
+
+
+def test_solve_linear():
+    assert solve("x + y = 3; x - y = 1", show_result=False) == dict(x=2, y=1)
+    assert solve_system(
+        ["a x + y = 3", "x - y = 1"], solve_for="x, y", render="json"
+    ) == dict(x="4/(a + 1)", y="(3 - a)/(a + 1)")
+    assert solve(
+        "a x + y = 3; x - y = 1", solve_for="x, y", show_result=False, a=2
+    ) == pytest.approx(dict(x=4 / 3, y=1 / 3))
+
+    # no solution and infinitely many solutions
+    assert solve("x + y = 3; x + y = 1", show_result=False) is None
+    assert solve("x + y = 3; 2x + 2y = 6", show_result=False) == dict(
+        x="3 - y", y="y"
+    )
+
+
+def test_solve_large_linear():
+    n = 300
+    equations = [
+        f"2 x_{i} - {f'x_{i - 1}' if i else 0} - {f'x_{i + 1}' if i < n - 1 else 0} = 1"
+        for i in range(n)
+    ]
+    solution = solve_system(equations, show_result=False)
+
+    # discrete poisson equation: x_i = (i + 1)(n - i) / 2
+    i = np.arange(n)
+    expected = (i + 1) * (n - i) / 2
+    assert np.allclose([solution[f"x_{k}"] for k in i], expected)
+
+
+def test_solve_nonlinear():
+    solutions = solve(
+        "x^2 + y^2 = 1; x = y", all_solutions=True, show_result=False
+    )
+    assert solutions == [
+        dict(x="-sqrt(2)/2", y="-sqrt(2)/2"),
+        dict(x="sqrt(2)/2", y="sqrt(2)/2"),
+    ]
+
+    # numeric fallback
+    solutions = solve(
+        "exp(x) + y = 4; x y = 1", all_solutions=True, show_result=False
+    )
+    assert len(solutions) == 2
+    for solution in solutions:
+        assert np.isclose(np.exp(solution["x"]) + solution["y"], 4)
+        assert np.isclose(solution["x"] * solution["y"], 1)
+
+
+def test_cli_solve_system():
+    result = CliRunner().invoke(
+        app,
+        [
+            "solve",
+            "x + y = 3; x - y = 1",
+            "--solve-for",
+            "x, y",
+            "--format",
+            "plain",
+        ],
+    )
+    assert result.exit_code == 0
+    assert result.stdout.split() == ["x", "2", "y", "1"]
@@ -0,0 +1,19 @@
+from rich.text import Text
+from mathcli.theme import highlighter
+
+
+def test_highlighter():
+    text = Text("∂/∂x [sin²(x) +2.5y] = 3")
+    highlighter.highlight(text)
+    styles = {text.plain[s.start : s.end]: s.style for s in text.spans}
+
+    assert styles["sin"] == ".operator_name"
+    assert styles["²"] == ".superscript"
+    assert styles["2.5"] == ".number"
+    assert styles["y"] == ".variables"
+    assert styles["∂"] == ".deriv"
+    assert styles["="] == ".equal"
+
+    # each character has at most one style
+    spans = sorted((s.start, s.end) for s in text.spans)
+    assert all(a[1] <= b[0] for a, b in zip(spans, spans[1:]))
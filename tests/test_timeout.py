@@ -0,0 +1,64 @@
+from mathcli.timeout import call_with_timeout
+from mathcli.errors import OperationTimeoutError
+from mathcli.expression import Expression
+from mathcli.batch import read_jobs, run
+from mathcli.cache import results
+from mathcli import expression
+import pytest
+import time
+
+
+def slow(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def fails():
+    raise ValueError("failed")
+
+
+def test_call_with_timeout():
+    assert call_with_timeout(slow, 0.01, timeout=5) == 0.01
+
+    start = time.time()
+    with pytest.raises(OperationTimeoutError):
+        call_with_timeout(slow, 10, timeout=0.2)
+    assert time.time() - start < 5
+
+    with pytest.raises(ValueError):
+        call_with_timeout(fails, timeout=5)
+
+
+@pytest.fixture
+def slow_simplify(monkeypatch):
+    monkeypatch.setattr(results, "enabled", False)
+    monkeypatch.setattr(expression, "simp", lambda expr: slow(10))
+
+
+def test_simplify_timeout(slow_simplify):
+    expr = Expression("(x**2 - 1)/(x - 1)")
+
+    with pytest.raises(OperationTimeoutError):
+        expr.simplify(timeout=0.2, fallback=False)
+
+    # a quarter of the budget is kept for expand and cancel
+    simplified = expr.simplify(timeout=1)
+    assert simplified.strategy == "expand/cancel"
+    assert simplified.string == "x + 1"
+
+
+def test_simplify_time_budget(slow_simplify, monkeypatch):
+    # the fallback only gets what's left of the time budget
+    monkeypatch.setattr(expression, "expand", lambda expr: slow(10))
+    expr = Expression("(x**2 - 1)/(x - 1)")
+
+    start = time.time()
+    simplified = expr.simplify(timeout=1)
+    assert time.time() - start < 1.5
+    assert simplified.strategy == "none"
+
+
+def test_batch_timeout(slow_simplify):
+    lines = ['{"op": "simplify", "expression": "x + x", "fallback": false}']
+    (output,) = run(read_jobs(lines, timeout=0.2))
+    assert output["timeout"]